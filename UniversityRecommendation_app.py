@@ -1,15 +1,27 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-import openpyxl
-from openpyxl import load_workbook
-from io import BytesIO
 import os
-import re
-from datetime import datetime, timedelta
 import hashlib
-import time
-import json
+import zipfile
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from recommendation_core import (
+    DATA_FILE, DATA_DIR, ADMISSIONS_COLUMNS, POLICY_FILE, DEFAULT_POLICY, NO_CUT_CATEGORY, load_policies,
+    SYNONYM_FILE, load_major_synonyms, build_synonym_graph, synonym_major_rows, format_expanded_terms,
+    get_data_version, compact_admissions_frame,
+    read_upload_bytes, extract_student_workbook, parse_student_info, parse_student_grade,
+    get_major_keywords, build_major_index, match_major_rows, fuzzy_major_rows, format_fuzzy_matches,
+    aggregate_programs, find_recommendations, create_excel_output,
+    collect_batch_workbooks, extract_student_record, run_batch_recommendations,
+    create_batch_zip_output, create_batch_excel_output,
+    grade_range, sweep_recommendations, policy_category_counts,
+)
+from activity_log import ActivityLogger, JsonlSink, SqliteSink, GoogleSheetsSink
+from license_table import get_license_table
+from admissions_store import AdmissionsStore
+from stage_metrics import METRICS, STAGE_LABELS
 
 # 페이지 설정
 st.set_page_config(
@@ -26,10 +38,9 @@ if 'authenticated' not in st.session_state:
 
 # 라이센스 체크 함수
 def check_license():
-    """라이센스 확인"""
+    """라이센스 확인 - 해시된 키 테이블 (secrets 변경 시 자동 갱신)"""
     try:
-        licenses = st.secrets["licenses"]
-        return licenses
+        return get_license_table(st.secrets)
     except KeyError:
         return None
 
@@ -41,43 +52,92 @@ def test_google_sheets_connection():
     """Google Sheets 연결 테스트 함수 - 비활성화"""
     return False, "Google Sheets 기능이 비활성화되었습니다."
 
-def log_user_activity(user, activity_type="login"):
-    """사용자 활동 로그 기록 - 실패해도 앱은 계속 실행"""
+@st.cache_resource
+def get_activity_logger():
+    """활동 로그 기록기 (프로세스당 1개, 백그라운드 스레드에서 일괄 기록)
+
+    secrets 의 [activity_log] sink = "jsonl" | "sqlite" | "none", path = 파일 경로
+    """
+    try:
+        config = dict(st.secrets.get("activity_log", {}))
+    except Exception:
+        config = {}
+    
+    sinks = []
+    sink_type = config.get("sink", "jsonl")
+    if sink_type == "jsonl":
+        sinks.append(JsonlSink(config.get("path", os.path.join("logs", "activity.jsonl"))))
+    elif sink_type == "sqlite":
+        sinks.append(SqliteSink(config.get("path", os.path.join("logs", "activity.sqlite3"))))
+    
+    # Google Sheets 는 클라이언트와 스프레드시트가 설정된 경우에만
     try:
-        client = get_gsheet_client()
-        if not client:
-            # 로그만 남기고 계속 진행
-            return False
-            
         spreadsheet_id = st.secrets.get("gsheets", {}).get("spreadsheet_id")
-        if not spreadsheet_id:
-            return False
-            
-        # 스프레드시트 열기
-        sheet = client.open_by_key(spreadsheet_id)
-        
-        # 로그 워크시트 찾기 또는 생성
-        try:
-            log_sheet = sheet.worksheet("사용자로그")
-        except:
-            # 워크시트가 없으면 생성
-            log_sheet = sheet.add_worksheet(title="사용자로그", rows=1000, cols=10)
-            # 헤더 추가
-            log_sheet.update('A1:E1', [['사용자', '활동유형', '시간', 'IP', '세부정보']])
-        
-        # 새 로그 추가
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        new_row = [user, activity_type, timestamp, "", ""]
-        
-        # 다음 빈 행에 추가
-        log_sheet.append_row(new_row)
-        
-        return True
-        
+    except Exception:
+        spreadsheet_id = None
+    if spreadsheet_id and get_gsheet_client():
+        sinks.append(GoogleSheetsSink(get_gsheet_client, spreadsheet_id))
+    
+    return ActivityLogger(sinks)
+
+def log_user_activity(user, activity_type="login"):
+    """사용자 활동 로그 기록 - 큐에 넣고 바로 반환, 실패해도 앱은 계속 실행"""
+    try:
+        return get_activity_logger().log(user, activity_type)
     except Exception as e:
         # 오류가 나도 앱은 계속 실행
         return False
 
+@st.cache_resource
+def get_stage_metrics():
+    """단계별 처리 시간 측정기 설정 (프로세스당 1회)
+
+    secrets 의 [metrics] path = Prometheus 텍스트 파일 (빈 문자열이면 저장 안 함, {pid} 사용 가능),
+    write_interval = 저장 주기(초), trace_memory = true 면 단계별 최대 메모리도 기록
+    """
+    try:
+        config = dict(st.secrets.get("metrics", {}))
+    except Exception:
+        config = {}
+    
+    METRICS.configure(
+        path=config.get("path", os.path.join("logs", "stage_metrics.prom")),
+        write_interval=float(config.get("write_interval", 10.0)),
+        trace_memory=bool(config.get("trace_memory", False)),
+    )
+    return METRICS
+
+def is_admin(user):
+    """secrets 의 [admin] users 목록에 있는 사용자인지"""
+    try:
+        return user in st.secrets.get("admin", {}).get("users", [])
+    except Exception:
+        return False
+
+def show_stage_metrics(metrics):
+    """관리자용 단계별 처리 시간 (p50/p95 는 최근 측정 기준)"""
+    with st.sidebar.expander("⏱️ 단계별 처리 시간"):
+        stats = metrics.summary()
+        if not stats:
+            st.caption("아직 측정된 단계가 없습니다.")
+            return
+        
+        table = pd.DataFrame([{
+            '단계': STAGE_LABELS.get(stat['stage'], stat['stage']),
+            '횟수': stat['count'],
+            'p50 (ms)': round(stat['p50'] * 1000, 1),
+            'p95 (ms)': round(stat['p95'] * 1000, 1),
+            '최대 (ms)': round(stat['max'] * 1000, 1),
+            '평균 행 수': round(stat['mean_rows']) if stat['mean_rows'] is not None else None,
+            '최대 메모리 (MB)': round(stat['peak_bytes'] / 1e6, 1) if stat['peak_bytes'] is not None else None,
+        } for stat in stats])
+        st.dataframe(table, hide_index=True, use_container_width=True)
+        if metrics.path:
+            st.caption(f"메트릭 파일: {metrics.path}")
+        if st.button("측정 초기화", key="reset_stage_metrics"):
+            metrics.reset()
+            st.rerun()
+
 # 라이센스 인증 화면
 if not st.session_state.authenticated:
     st.title("🎓 코드스튜디오 입시연구소")
@@ -96,26 +156,24 @@ if not st.session_state.authenticated:
         
         if st.button("확인", use_container_width=True, type="primary"):
             if license_key:
-                # 라이센스 검증
-                valid = False
-                for license in licenses:
-                    if license["key"] == license_key:
-                        st.session_state.authenticated = True
-                        st.session_state.user = license["user"]
-                        st.session_state.license_key = license_key
-                        valid = True
-                        
-                        # 로그인 로그 기록 시도 (실패해도 계속 진행)
-                        try:
-                            log_user_activity(license["user"], "login")
-                        except Exception as e:
-                            # 로그 실패해도 계속 진행
-                            pass
-                        
-                        st.success(f"✅ 환영합니다, {license['user']}님!")
-                        st.balloons()
-                        st.rerun()
-                        break
+                # 라이센스 검증 (해시 조회)
+                user = licenses.lookup(license_key)
+                valid = user is not None
+                if valid:
+                    st.session_state.authenticated = True
+                    st.session_state.user = user
+                    st.session_state.license_key = license_key
+                    
+                    # 로그인 로그 기록 시도 (실패해도 계속 진행)
+                    try:
+                        log_user_activity(user, "login")
+                    except Exception as e:
+                        # 로그 실패해도 계속 진행
+                        pass
+                    
+                    st.success(f"✅ 환영합니다, {user}님!")
+                    st.balloons()
+                    st.rerun()
                 
                 if not valid:
                     st.error("❌ 유효하지 않은 라이센스 키입니다.")
@@ -157,60 +215,68 @@ with col2:
 
 st.markdown("---")
 
+
 # CSV 데이터 로드
-@st.cache_data
-def load_admissions_data():
-    """입시 데이터 CSV 로드"""
-    import chardet
-    
-    file_path = '2025_2021_result.csv'
-    
-    # 파일 존재 확인
-    if not os.path.exists(file_path):
-        st.error(f"CSV 파일을 찾을 수 없습니다: {file_path}")
+@st.cache_resource
+def get_admissions_store():
+    """입시 데이터 저장소 (프로세스당 1개, data 폴더의 새 년도 CSV 는 추가로만 읽음)
+
+    secrets 의 [shared_memory] enabled = false 가 아니면 데이터/통계표/검색 인덱스를
+    공유 메모리에 올려 서버 프로세스끼리 한 벌만 사용
+    """
+    try:
+        shared = bool(st.secrets.get("shared_memory", {}).get("enabled", True))
+    except Exception:
+        shared = True
+    return AdmissionsStore(DATA_FILE, DATA_DIR, shared=shared)
+
+@st.cache_resource
+def get_batch_executor():
+    """일괄 추천의 학생별 엑셀 생성용 프로세스 풀 (프로세스당 1개, 시작 비용은 처음 한 번)
+
+    secrets 의 [batch] workers (기본값: CPU 수), 2 미만이면 None (순서대로 생성)
+    """
+    try:
+        workers = int(st.secrets.get("batch", {}).get("workers", os.cpu_count() or 1))
+    except Exception:
+        workers = os.cpu_count() or 1
+    if workers < 2:
         return None
+    # 서버는 여러 스레드로 실행되므로 fork 대신 spawn
+    return ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'))
+
+@st.cache_data(show_spinner=False)
+def load_uploaded_admissions(file_bytes):
+    """업로드한 CSV 파싱 결과를 내용별로 캐시"""
+    df = pd.read_csv(io.BytesIO(file_bytes), encoding='utf-8-sig')
+    if len(df.columns) != 13:
+        return None
+    df.columns = ADMISSIONS_COLUMNS
     
-    # 인코딩 감지
-    try:
-        with open(file_path, 'rb') as f:
-            raw_data = f.read(100000)
-            result = chardet.detect(raw_data)
-            detected_encoding = result['encoding']
-            st.sidebar.info(f"감지된 인코딩: {detected_encoding}")
-    except:
-        detected_encoding = None
-    
-    # 여러 인코딩으로 시도
-    encodings = [detected_encoding, 'utf-8-sig', 'utf-8', 'cp949', 'euc-kr', 'latin1']
-    encodings = [e for e in encodings if e]
-    
-    for encoding in encodings:
-        try:
-            df = pd.read_csv(file_path, encoding=encoding)
-            
-            # 데이터 검증
-            if len(df.columns) == 13 and len(df) > 0:
-                # 컬럼명 설정
-                df.columns = [
-                    'year', 'university_name', 'admission_type', 'admission_name',
-                    'major_name', 'quota', 'comp_rate', 'pass_rank',
-                    'cut_grade_50', 'cut_grade_70', 'cut_grade_85', 'cut_grade_90',
-                    'reflected_subjects'
-                ]
-                
-                # 데이터 타입 변환
-                numeric_cols = ['quota', 'comp_rate', 'pass_rank', 
-                               'cut_grade_50', 'cut_grade_70', 'cut_grade_85', 'cut_grade_90']
-                for col in numeric_cols:
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-                
-                st.sidebar.success(f"✅ CSV 로드 성공 (인코딩: {encoding})")
-                st.sidebar.write(f"데이터 수: {len(df):,}개")
-                
-                return df
-                
-        except Exception as e:
-            continue
+    df = compact_admissions_frame(df)
+    df.attrs['data_version'] = hashlib.sha256(file_bytes).hexdigest()
+    return df
+
+def load_admissions_data():
+    """입시 데이터 로드 - 기본 CSV + data 폴더 년도별 CSV (바뀐 파일만 다시 읽음)"""
+    store = get_admissions_store()
+    store.refresh()
+    
+    # 검증에 실패한 년도 파일은 빼고 나머지로 계속 진행
+    for file_name, error in store.error_messages().items():
+        st.sidebar.warning(f"⚠️ {file_name}: {error}")
+    for file_name, notice in store.notice_messages().items():
+        st.sidebar.warning(f"⚠️ {file_name}: {notice}")
+    
+    df = store.df
+    if df is not None:
+        st.sidebar.success(f"✅ 데이터 로드 성공 (파일 {len(store.partitions)}개)")
+        st.sidebar.write(f"데이터 수: {len(df):,}개")
+        return df
+    
+    if not os.path.exists(DATA_FILE):
+        st.error(f"CSV 파일을 찾을 수 없습니다: {DATA_FILE}")
+        return None
     
     # 파일 업로드 옵션 제공
     st.sidebar.error("자동 로드 실패. 파일을 직접 업로드해주세요.")
@@ -222,16 +288,8 @@ def load_admissions_data():
     
     if uploaded_file:
         try:
-            df = pd.read_csv(uploaded_file, encoding='utf-8-sig')
-            
-            if len(df.columns) == 13:
-                df.columns = [
-                    'year', 'university_name', 'admission_type', 'admission_name',
-                    'major_name', 'quota', 'comp_rate', 'pass_rank',
-                    'cut_grade_50', 'cut_grade_70', 'cut_grade_85', 'cut_grade_90',
-                    'reflected_subjects'
-                ]
-                
+            df = load_uploaded_admissions(uploaded_file.getvalue())
+            if df is not None:
                 st.sidebar.success("✅ 업로드 파일 로드 성공!")
                 return df
         except Exception as e:
@@ -239,53 +297,25 @@ def load_admissions_data():
     
     return None
 
+@st.cache_data(show_spinner=False)
+def extract_student_workbook_cached(file_bytes):
+    """평가표 추출 결과를 업로드 내용별로 캐시"""
+    return extract_student_workbook(file_bytes)
+
 def read_student_info_from_excel(excel_file):
     """내신분석 시트에서 학생 정보 추출"""
     try:
-        wb = load_workbook(excel_file, data_only=True)
+        workbook = extract_student_workbook_cached(read_upload_bytes(excel_file))
         
-        st.info(f"📋 엑셀 시트 목록: {wb.sheetnames}")
+        st.info(f"📋 엑셀 시트 목록: {workbook['sheetnames']}")
         
         # Index 시트에서 정보 추출
-        if 'Index' in wb.sheetnames:
-            ws = wb['Index']
-            
-            # 학교명: F4, F5
-            school_name = ws['F4'].value or ws['F5'].value
-            
-            # 학년: I4, I5
-            grade = ws['I4'].value or ws['I5'].value
-            
-            # 이름: K4, K5, L4, L5
-            student_name = (ws['K4'].value or ws['K5'].value or 
-                          ws['L4'].value or ws['L5'].value)
-            
-            wb.close()
-            
-            # 학년 처리
-            if grade:
-                grade_str = str(grade).strip()
-                numbers = re.findall(r'\d+', grade_str)
-                if numbers:
-                    grade = f"{numbers[0]}학년"
-                elif '학년' in grade_str:
-                    grade = grade_str
-                else:
-                    grade = f"{grade_str}학년"
-            else:
-                grade = "2학년"
-            
-            result = {
-                'name': str(student_name).strip() if student_name else '',
-                'school': str(school_name).strip() if school_name else '',
-                'grade': grade
-            }
-            
+        result = parse_student_info(workbook)
+        if result is not None:
             st.success(f"✅ 추출된 학생 정보: {result}")
             return result
         else:
             st.error("'Index' 시트를 찾을 수 없습니다.")
-            wb.close()
             return None
     except Exception as e:
         st.error(f"❌ 학생 정보 추출 오류: {str(e)}")
@@ -294,437 +324,301 @@ def read_student_info_from_excel(excel_file):
 def get_student_grade_from_excel(excel_file):
     """성적분석 시트의 X13 셀에서 평균 등급 추출"""
     try:
-        wb = load_workbook(excel_file, data_only=True)
+        avg_grade = parse_student_grade(extract_student_workbook_cached(read_upload_bytes(excel_file)))
         
-        if '성적분석' in wb.sheetnames:
-            ws = wb['성적분석']
-            
-            # X13 셀에서 전과목 평균 읽기
-            avg_grade = ws['X13'].value
-            
-            wb.close()
-            
-            if avg_grade and isinstance(avg_grade, (int, float)):
-                st.success(f"✅ 전과목 평균: {avg_grade}등급")
-                return float(avg_grade)
+        if avg_grade is not None:
+            st.success(f"✅ 전과목 평균: {avg_grade}등급")
+            return avg_grade
         
-        wb.close()
         return 2.5
     except Exception as e:
         st.warning(f"성적 자동 추출 실패: {str(e)}")
         return 2.5
 
-def get_major_keywords(df):
-    """학과명에서 핵심 단어 추출"""
-    if df is None or 'major_name' not in df.columns:
-        return []
-    
-    all_majors = df['major_name'].dropna().unique()
-    
-    # 키워드 빈도 계산
-    keyword_freq = {}
-    
-    # 제외할 단어들
-    exclude_words = {
-        '학과', '과', '전공', '부', '학부', '계열', '및', '와', '의', 
-        '(', ')', '・', ',', '-', '/', ' ', '전공학'
-    }
-    
-    for major in all_majors:
-        major = str(major)
-        
-        # 괄호 안 내용 제거
-        major = re.sub(r'\([^)]*\)', '', major)
-        
-        # 여러 구분자로 단어 분리
-        words = re.split(r'[(\s)・,/-]+', major)
-        
-        for word in words:
-            word = word.strip()
-            
-            # 2글자 이상, 제외 단어 아님
-            if len(word) >= 2 and word not in exclude_words:
-                keyword_freq[word] = keyword_freq.get(word, 0) + 1
-    
-    # 빈도수 순으로 정렬
-    popular_keywords = [
-        k for k, v in sorted(keyword_freq.items(), key=lambda x: x[1], reverse=True) 
-        if len(k) >= 2
-    ]
-    
-    return popular_keywords[:300]
+@st.cache_data
+def get_major_keywords_cached(data_version, _df):
+    """데이터 버전별 학과 키워드 캐시"""
+    return get_major_keywords(_df)
 
-def flexible_search(text, keyword):
-    """유연한 검색"""
-    if pd.isna(text) or not keyword:
-        return False
-    
-    text = str(text).lower()
-    keyword = str(keyword).lower()
-    
-    # 공백으로 구분된 여러 키워드
-    keywords = keyword.split()
-    
-    if not keywords:
-        return False
-    
-    # 각 키워드에 대해 검사
-    for kw in keywords:
-        kw = kw.strip()
-        if not kw:
-            continue
-            
-        # 공백 제거하여 검색
-        text_no_space = text.replace(' ', '').replace('・', '')
-        kw_no_space = kw.replace(' ', '').replace('・', '')
-        
-        # 키워드가 텍스트에 포함되어 있으면 True
-        if kw in text or kw_no_space in text_no_space:
-            return True
-    
-    return False
-
-def categorize_university(student_grade, cut_grade):
-    """대학을 구분별로 분류"""
-    # 학생 등급 - 합격선 등급
-    diff = student_grade - cut_grade
-    
-    if diff >= 1.5:
-        return '강상향'
-    elif diff >= 0.8:
-        return '상향'
-    elif diff >= 0.3:
-        return '약상향'
-    elif diff >= -0.3:
-        return '적정'
-    elif diff >= -0.8:
-        return '강적정'
-    elif diff >= -1.5:
-        return '안정'
-    else:
-        return '강안정'
-
-def get_category_color(category):
-    """구분별 색상"""
-    colors = {
-        '강상향': '#ef4444',
-        '상향': '#f97316',
-        '약상향': '#eab308',
-        '적정': '#22c55e',
-        '강적정': '#10b981',
-        '안정': '#3b82f6',
-        '강안정': '#6366f1',
-        '정보없음': '#9ca3af'
+@st.cache_data
+def get_dataset_stats(data_version, _df):
+    """데이터 버전별 상세 통계 캐시"""
+    admission_type = _df['admission_type']
+    return {
+        'total': len(_df),
+        'year_counts': _df['year'].value_counts().sort_index().to_dict(),
+        'universities': _df['university_name'].nunique(),
+        'majors': _df['major_name'].nunique(),
+        'jonghap': int(admission_type.str.contains('종합', na=False).sum()),
+        'gyogwa': int(admission_type.str.contains('교과', na=False).sum()),
     }
-    return colors.get(category, '#6b7280')
 
-def find_recommendations(df, major_keyword, student_grade, num_results=30):
-    """대학 추천"""
-    
-    # 유연한 검색 적용
-    filtered = df[df['major_name'].apply(lambda x: flexible_search(x, major_keyword))]
-    
-    if len(filtered) == 0:
-        return None, None, f"'{major_keyword}' 관련 학과를 찾을 수 없습니다."
-    
-    # 년도별 가중치 설정
-    year_weights = {
-        '2025': 1.0,
-        '2024': 0.8,
-        '2023': 0.6,
-        '2022': 0.4,
-        '2021': 0.3
-    }
-    
-    results = []
-    category_distribution = {}
+@st.cache_resource
+def get_major_index(data_version, _df):
+    """데이터 버전별 학과명 검색 인덱스 (세션 간 공유)"""
+    return build_major_index(_df)
+
+@st.cache_resource
+def load_synonym_groups(file_path, modified_time):
+    """관련 학과 키워드 파일 읽기 - 파일이 바뀌면(수정 시각) 다시 읽음"""
+    return load_major_synonyms(file_path)
+
+@st.cache_resource
+def build_synonym_graph_cached(data_version, synonym_key, _index, _keywords, _groups):
+    """데이터 버전 / 관련 학과 파일별 확장 그래프 (세션 간 공유)"""
+    return build_synonym_graph(_index, _keywords, _groups)
+
+def get_synonym_graph(data_version, major_index, major_keywords):
+    """관련 학과 확장 그래프
+
+    secrets 의 [synonyms] path 또는 major_synonyms.toml, 없으면 학과명 키워드 동시 출현만 사용
+    """
+    try:
+        file_path = st.secrets.get("synonyms", {}).get("path", SYNONYM_FILE)
+    except Exception:
+        file_path = SYNONYM_FILE
     
-    # 대학-학과별로 그룹화
-    grouped = filtered.groupby(['university_name', 'major_name', 'admission_type', 'admission_name'])
+    groups, synonym_key = [], None
+    if os.path.exists(file_path):
+        try:
+            modified_time = os.path.getmtime(file_path)
+            groups = load_synonym_groups(file_path, modified_time)
+            synonym_key = (file_path, modified_time)
+        except (OSError, ValueError) as e:
+            st.sidebar.warning(f"⚠️ 관련 학과 키워드 파일 오류 (동시 출현만 사용): {str(e)}")
+    return build_synonym_graph_cached(data_version, synonym_key, major_index, major_keywords, groups)
+
+@st.cache_data
+def build_program_summary(data_version, policy_key, _df, _policy):
+    """전체 데이터의 대학-학과-전형별 통계표 (데이터 버전 / 추천 기준별 1회 계산)"""
+    return aggregate_programs(_df, policy=_policy)
+
+@st.cache_resource
+def remove_stale_shared_segments(data_version, policy_keys, _policies):
+    """데이터 버전 / 추천 기준 목록별 1회 - 다른 버전이나 쓰지 않는 기준의 공유 메모리 블록 정리"""
+    return get_admissions_store().remove_stale_segments(_policies)
+
+@st.cache_resource
+def load_recommendation_policies(file_path, modified_time):
+    """추천 기준 파일 읽기 - 파일이 바뀌면(수정 시각) 다시 읽음"""
+    return load_policies(file_path)
+
+def get_recommendation_policies():
+    """추천 기준 목록 {이름: 정책}
+
+    secrets 의 [policy] path 또는 recommendation_policy.toml, 없으면 기본 기준
+    """
+    try:
+        file_path = st.secrets.get("policy", {}).get("path", POLICY_FILE)
+    except Exception:
+        file_path = POLICY_FILE
     
-    for (univ, major, adm_type, adm_name), group in grouped:
-        # 가중평균 계산을 위한 변수
-        weighted_cuts = []
-        weights_sum = 0
-        comp_rates = []
-        
-        # 최신 데이터 가져오기
-        latest_row = group[group['year'] == group['year'].max()].iloc[0]
-        latest_cut_70 = None
-        
-        # 최신 년도의 70%컷 찾기
-        if pd.notna(latest_row['cut_grade_70']) and latest_row['cut_grade_70'] > 0:
-            latest_cut_70 = float(latest_row['cut_grade_70'])
-        
-        for _, row in group.iterrows():
-            year = str(row.get('year', '2025'))
-            weight = year_weights.get(year, 0.5)
-            
-            # 여러 컷 중 하나 선택
-            cut_grade = None
-            for col in ['cut_grade_70', 'cut_grade_50', 'cut_grade_85', 'cut_grade_90']:
-                if pd.notna(row[col]) and row[col] > 0:
-                    try:
-                        cut_grade = float(row[col])
-                        break
-                    except:
-                        continue
-            
-            if cut_grade:
-                weighted_cuts.append(cut_grade * weight)
-                weights_sum += weight
-            
-            # 경쟁률 수집
-            if pd.notna(row['comp_rate']):
-                comp_rates.append(float(row['comp_rate']))
-        
-        # 가중평균 컷라인 계산
-        if weights_sum > 0:
-            avg_cut_grade = sum(weighted_cuts) / weights_sum
-        else:
-            avg_cut_grade = None
-        
-        # 종합전형 여부 확인
-        is_jonghap = '종합' in str(adm_type)
-        
-        # 카테고리 분류
-        if avg_cut_grade and avg_cut_grade > 0:
-            category = categorize_university(float(student_grade), avg_cut_grade)
-            diff = abs(float(student_grade) - avg_cut_grade)
-        else:
-            category = '정보없음'
-            diff = 999
-        
-        # 안정성 계산
-        if len(weighted_cuts) > 1:
-            grades = [c/w for c, w in zip(weighted_cuts, [year_weights.get(str(row.get('year', '2025')), 0.5) for _, row in group.iterrows()]) if w > 0]
-            if len(grades) > 1:
-                stability = np.std(grades)
-            else:
-                stability = 0
-        else:
-            stability = 999
-        
-        # 평균 경쟁률
-        avg_comp_rate = np.mean(comp_rates) if comp_rates else latest_row.get('comp_rate', None)
-        
-        # 카테고리별 개수 세기
-        category_distribution[category] = category_distribution.get(category, 0) + 1
-        
-        results.append({
-            'university': univ,
-            'major': major,
-            'admission_type': adm_type,
-            'admission_name': adm_name,
-            'category': category,
-            'diff': diff,
-            'cut_grade': avg_cut_grade,
-            'comp_rate': avg_comp_rate,
-            'is_jonghap': is_jonghap,
-            'priority': 0 if is_jonghap else 1,
-            'stability': stability,
-            'years_data': len(group),
-            'latest_cut_70': latest_cut_70
-        })
-    
-    # 구분별 분포 표시
+    if not os.path.exists(file_path):
+        return {DEFAULT_POLICY.name: DEFAULT_POLICY}
+    try:
+        return load_recommendation_policies(file_path, os.path.getmtime(file_path))
+    except (OSError, ValueError) as e:
+        st.sidebar.warning(f"⚠️ 추천 기준 파일 오류 (기본 기준 사용): {str(e)}")
+        return {DEFAULT_POLICY.name: DEFAULT_POLICY}
+
+def show_category_distribution(distribution, policy=DEFAULT_POLICY):
+    """구분별 학과 분포 표시"""
     with st.expander("📊 구분별 학과 분포"):
-        jonghap_count = sum(1 for r in results if r['is_jonghap'])
-        st.write(f"**종합전형**: {jonghap_count}개 | **교과전형**: {len(results) - jonghap_count}개")
+        jonghap_count = distribution['jonghap']
+        st.write(f"**종합전형**: {jonghap_count}개 | **교과전형**: {distribution['total'] - jonghap_count}개")
         st.write("---")
-        for cat in ['강상향', '상향', '약상향', '적정', '강적정', '안정', '강안정', '정보없음']:
-            count = category_distribution.get(cat, 0)
+        for cat in policy.categories + [NO_CUT_CATEGORY]:
+            count = distribution['categories'].get(cat, 0)
             if count > 0:
                 st.write(f"**{cat}**: {count}개")
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def build_excel_bytes(student_info, recommendations, filtered_rows, data_version, _df):
+    """추천 결과 엑셀 파일 - (학생 정보, 추천 목록, 검색 행) 기준으로 캐시"""
+    all_results_df = _df.loc[filtered_rows] if filtered_rows is not None else None
+    return create_excel_output(student_info, recommendations, all_results_df).getvalue()
+
+def batch_main(df, program_summary, major_index, policy=DEFAULT_POLICY, fuzzy=True, synonyms=None):
+    """반 전체 일괄 추천 화면"""
+    st.subheader("📦 반 전체 일괄 추천")
+    st.info("💡 평가표 여러 개 또는 평가표를 묶은 zip 파일을 업로드하고, 학생별 희망 전공을 입력하세요.")
+    
+    uploaded_files = st.file_uploader(
+        "평가표 엑셀 / zip 파일을 업로드하세요",
+        type=['xlsx', 'zip'],
+        accept_multiple_files=True,
+        key='batch_files'
+    )
+    if not uploaded_files:
+        return
     
-    # 추천 전략
-    recommendations = []
-    used = set()
-    
-    # 카테고리별 목표 개수
-    category_targets = {
-        '강상향': 3,
-        '상향': 5,
-        '약상향': 5,
-        '적정': 7,
-        '강적정': 5,
-        '안정': 3,
-        '강안정': 2
-    }
-    
-    # 각 구분별로 목표 개수만큼 선택
-    for cat, target_count in category_targets.items():
-        cat_results = [r for r in results if r['category'] == cat]
-        if cat_results:
-            sorted_results = sorted(cat_results, 
-                key=lambda x: (x['priority'], x['diff'], x['stability']))
-            
-            added = 0
-            for result in sorted_results:
-                if added >= target_count:
-                    break
-                key = (result['university'], result['major'])
-                if key not in used:
-                    recommendations.append(result)
-                    used.add(key)
-                    added += 1
-    
-    # 30개가 안 되면 추가
-    if len(recommendations) < num_results:
-        remaining = [r for r in results if (r['university'], r['major']) not in used]
-        sorted_remaining = sorted(remaining, 
-            key=lambda x: (x['priority'], x['diff'], x['stability']))
-        
-        for result in sorted_remaining:
-            if len(recommendations) >= num_results:
-                break
-            key = (result['university'], result['major'])
-            if key not in used:
-                recommendations.append(result)
-                used.add(key)
-    
-    return recommendations[:num_results], filtered, None
-
-def create_excel_output(student_info, recommendations, all_results_df=None):
-    """엑셀 파일 생성"""
-    from openpyxl import Workbook
-    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-    
-    wb = Workbook()
-    
-    # 첫 번째 시트: 학교추천
-    ws1 = wb.active
-    ws1.title = "학교추천"
-    
-    # 스타일 정의
-    orange_fill = PatternFill(start_color="FF8C00", end_color="FF8C00", fill_type="solid")
-    white_font = Font(bold=True, color="FFFFFF", size=11)
-    black_font = Font(size=11)
-    center_align = Alignment(horizontal='center', vertical='center')
-    thin_border = Border(left=Side(style='thin'), right=Side(style='thin'), 
-                        top=Side(style='thin'), bottom=Side(style='thin'))
-    
-    # 1행 - 학교 정보 헤더
-    headers_row1 = [
-        ('A1', '학교명', orange_fill, white_font),
-        ('C1', '학년', orange_fill, white_font),
-        ('E1', '이름', orange_fill, white_font),
-        ('G1', '희망진로', orange_fill, white_font)
+    try:
+        workbooks = collect_batch_workbooks(uploaded_files)
+    except zipfile.BadZipFile as e:
+        st.error(f"❌ zip 파일 오류: {str(e)}")
+        return
+    if not workbooks:
+        st.warning("⚠️ 업로드한 파일에서 평가표(.xlsx)를 찾을 수 없습니다.")
+        return
+    
+    students = [
+        extract_student_record(file_name, file_bytes, extract=extract_student_workbook_cached)
+        for file_name, file_bytes in workbooks
     ]
-    
-    for cell_addr, value, fill, font in headers_row1:
-        cell = ws1[cell_addr]
-        cell.value = value
-        cell.fill = fill
-        cell.font = font
-        cell.alignment = center_align
-        cell.border = thin_border
-    
-    # 1행 - 학교 정보 데이터
-    ws1['B1'] = student_info['school']
-    ws1['D1'] = student_info['grade']
-    ws1['F1'] = student_info['name']
-    ws1['H1'] = student_info['major']
-    
-    # 병합할 셀들
-    ws1.merge_cells('H1:J1')
-    
-    # 3행 - 테이블 헤더
-    headers_row3 = ['학교', '학과명', '전형', '전형요소', '구분', '최근70%컷', '데이터년수', '평균경쟁률']
-    for idx, header in enumerate(headers_row3, start=1):
-        cell = ws1.cell(row=3, column=idx)
-        cell.value = header
-        cell.fill = orange_fill
-        cell.font = white_font
-        cell.alignment = center_align
-        cell.border = thin_border
-    
-    # 4행부터 데이터 입력
-    for idx, rec in enumerate(recommendations, start=4):
-        ws1[f'A{idx}'] = rec['university']
-        ws1[f'B{idx}'] = rec['major']
-        ws1[f'C{idx}'] = rec['admission_type']
-        ws1[f'D{idx}'] = rec['admission_name']
-        ws1[f'E{idx}'] = rec['category']
-        ws1[f'F{idx}'] = f"{rec.get('latest_cut_70', '-'):.2f}" if rec.get('latest_cut_70') and rec.get('latest_cut_70') != 999 else "-"
-        ws1[f'G{idx}'] = f"{rec.get('years_data', 1)}년"
-        ws1[f'H{idx}'] = f"{rec.get('comp_rate', '-'):.1f}" if rec.get('comp_rate') else "-"
-        
-        # 모든 셀에 테두리와 정렬 적용
-        for col in range(1, 9):
-            cell = ws1.cell(row=idx, column=col)
-            cell.border = thin_border
-            cell.alignment = center_align
-            cell.font = black_font
-        
-        # 구분 셀 색상 적용
-        category_colors = {
-            '강상향': 'FF9999', '상향': 'FFB366', '약상향': 'FFCC66',
-            '적정': '99FF99', '강적정': '66FFB3', '안정': '99CCFF', 
-            '강안정': '9999FF', '정보없음': 'E6E6E6'
-        }
-        
-        color = category_colors.get(rec['category'], 'FFFFFF')
-        ws1[f'E{idx}'].fill = PatternFill(start_color=color, end_color=color, fill_type="solid")
+    failed = [s['file'] for s in students if 'error' in s]
+    if failed:
+        st.warning(f"⚠️ 정보 추출 실패 (기본값 사용): {', '.join(failed)}")
+    
+    default_major = st.text_input("공통 희망 전공 (비어있는 학생에게 적용)", placeholder="예: 컴퓨터", key='batch_default_major')
+    
+    table = pd.DataFrame(students)[['file', 'name', 'school', 'grade', 'student_grade', 'major']]
+    table.columns = ['파일', '이름', '학교명', '학년', '내신 평균 등급', '희망 전공']
+    edited = st.data_editor(table, disabled=['파일'], hide_index=True, use_container_width=True, key='batch_table')
+    
+    output_mode = st.radio("결과 파일", ["학생별 엑셀 (zip)", "통합 엑셀 1개"], horizontal=True)
+    
+    if st.button(f"🚀 일괄 추천 실행 ({len(students)}명)", type="primary", use_container_width=True):
+        students = [
+            {
+                'name': row['이름'],
+                'school': row['학교명'],
+                'grade': row['학년'],
+                'student_grade': row['내신 평균 등급'],
+                'major': row['희망 전공'] or default_major
+            }
+            for _, row in edited.iterrows()
+        ]
         
-        # 평균경쟁률 셀 색상
-        ws1[f'H{idx}'].fill = PatternFill(start_color="F0F0F0", end_color="F0F0F0", fill_type="solid")
-    
-    # 열 너비 조정
-    ws1.column_dimensions['A'].width = 15
-    ws1.column_dimensions['B'].width = 30
-    ws1.column_dimensions['C'].width = 15
-    ws1.column_dimensions['D'].width = 20
-    ws1.column_dimensions['E'].width = 12
-    ws1.column_dimensions['F'].width = 15
-    ws1.column_dimensions['G'].width = 12
-    ws1.column_dimensions['H'].width = 15
-    
-    # 두 번째 시트: 전체 검색 결과
-    if all_results_df is not None:
-        try:
-            ws2 = wb.create_sheet("전체검색결과")
-            
-            # 헤더
-            headers = ['년도', '대학명', '학과명', '전형', '경쟁률', '50%컷', '70%컷']
-            for col_idx, header in enumerate(headers, start=1):
-                cell = ws2.cell(row=1, column=col_idx)
-                cell.value = header
-                cell.fill = orange_fill
-                cell.font = white_font
-                cell.alignment = center_align
-                cell.border = thin_border
+        with st.spinner(f"{len(students)}명 추천 중..."):
+            try:
+                log_user_activity(st.session_state.user, f"batch_recommend_{len(students)}")
+            except:
+                pass
             
-            # 데이터 입력
-            row_idx = 2
-            for _, row in all_results_df.iterrows():
-                ws2.cell(row=row_idx, column=1).value = str(row['year']) if pd.notna(row['year']) else ''
-                ws2.cell(row=row_idx, column=2).value = str(row['university_name']) if pd.notna(row['university_name']) else ''
-                ws2.cell(row=row_idx, column=3).value = str(row['major_name']) if pd.notna(row['major_name']) else ''
-                ws2.cell(row=row_idx, column=4).value = str(row['admission_type']) if pd.notna(row['admission_type']) else ''
-                ws2.cell(row=row_idx, column=5).value = row['comp_rate'] if pd.notna(row['comp_rate']) else '-'
-                ws2.cell(row=row_idx, column=6).value = row['cut_grade_50'] if pd.notna(row['cut_grade_50']) else '-'
-                ws2.cell(row=row_idx, column=7).value = row['cut_grade_70'] if pd.notna(row['cut_grade_70']) else '-'
-                
-                row_idx += 1
+            batch_results = run_batch_recommendations(df, students, program_summary, major_index, policy=policy,
+                                                      fuzzy=fuzzy, synonyms=synonyms)
             
-            # 열 너비 조정
-            ws2.column_dimensions['A'].width = 10
-            ws2.column_dimensions['B'].width = 20
-            ws2.column_dimensions['C'].width = 35
-            ws2.column_dimensions['D'].width = 15
-            ws2.column_dimensions['E'].width = 10
-            ws2.column_dimensions['F'].width = 10
-            ws2.column_dimensions['G'].width = 10
-        except Exception as e:
-            st.warning(f"전체 검색 결과 시트 생성 중 오류: {str(e)}")
+            if output_mode == "통합 엑셀 1개":
+                output = create_batch_excel_output(batch_results)
+                file_name = "대학추천_일괄 by COdeStudio.xlsx"
+                mime = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            else:
+                # 저장소 공유 데이터면 작업 프로세스는 공유 메모리에 붙어서 행 번호만 받음
+                store = get_admissions_store()
+                shared_version = df.attrs.get('data_version') if store.shared and df is store.df else None
+                output = create_batch_zip_output(batch_results, get_batch_executor(), shared_version)
+                file_name = "대학추천_일괄 by COdeStudio.zip"
+                mime = "application/zip"
+            st.session_state['batch_output'] = (output.getvalue(), file_name, mime)
+        
+        summary_rows = [
+            {
+                '이름': r['student_info']['name'],
+                '희망 전공': r['student_info']['major'],
+                '추천 수': len(r['recommendations']) if r['recommendations'] else 0,
+                '관련 학과로 찾은 추천': sum(1 for rec in r['recommendations'] or [] if rec.get('via_synonym')),
+                '함께 검색한 관련 학과': ', '.join(r['expanded_terms'][:5]) if r['expanded_terms'] else '',
+                '비슷한 학과로 검색': ', '.join(name for name, _ in r['fuzzy_matches'][:3]) if r['fuzzy_matches'] else '',
+                '오류': r['error'] or ''
+            }
+            for r in batch_results
+        ]
+        success_count = sum(1 for r in batch_results if not r['error'])
+        st.success(f"✅ {success_count}/{len(batch_results)}명 추천 완료!")
+        st.dataframe(pd.DataFrame(summary_rows), use_container_width=True, hide_index=True)
+    
+    if 'batch_output' in st.session_state:
+        data, file_name, mime = st.session_state['batch_output']
+        if st.download_button("📥 일괄 추천 결과 다운로드", data, file_name, mime=mime, use_container_width=True):
+            try:
+                log_user_activity(st.session_state.user, "download_batch")
+            except:
+                pass
+
+def sweep_main(df, program_summary, major_index, policy=DEFAULT_POLICY, fuzzy=True, synonyms=None, policies=None):
+    """성적/전공 비교 (what-if) 화면 - policies 에 기준이 여러 개면 기준별 구분 개수도 비교"""
+    st.subheader("🔀 성적/전공 비교")
+    st.info("💡 희망 전공 여러 개와 내신 범위를 입력하면 성적별 추천 결과를 한 번에 비교합니다.")
     
-    # BytesIO로 저장
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
+    keywords_text = st.text_input("비교할 전공 (쉼표로 구분)", placeholder="예: 컴퓨터, 전자, 경영", key='sweep_keywords')
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        low, high = st.slider("내신 범위", 1.0, 9.0, (2.3, 2.7), 0.1, key='sweep_range')
+    with col2:
+        step = st.number_input("간격", 0.05, 1.0, 0.2, 0.05, key='sweep_step')
+    
+    if st.button("🔀 비교 실행", type="primary", use_container_width=True):
+        keywords = [k.strip() for k in keywords_text.split(',') if k.strip()]
+        if not keywords:
+            st.warning("⚠️ 비교할 전공을 입력해주세요.")
+            return
+        
+        try:
+            log_user_activity(st.session_state.user, f"sweep_{len(keywords)}")
+        except:
+            pass
+        
+        result, error = sweep_recommendations(
+            df, keywords, grade_range(low, high, step), summary=program_summary, index=major_index,
+            policy=policy, fuzzy=fuzzy, synonyms=synonyms
+        )
+        if error:
+            st.error(f"❌ {error}")
+            st.session_state.pop('sweep_result', None)
+            return
+        st.session_state['sweep_result'] = result
+    
+    result = st.session_state.get('sweep_result')
+    if result is None:
+        return
+    if result['missing']:
+        st.warning(f"⚠️ 관련 학과 없음: {', '.join(result['missing'])}")
+    for keyword, terms in result.get('expanded_terms', {}).items():
+        st.info(f"🔗 {format_expanded_terms(keyword, terms)}")
+    for keyword, matches in result.get('fuzzy_matches', {}).items():
+        st.info(f"🔎 {format_fuzzy_matches(keyword, matches)}")
+    
+    # 키워드별 성적 × 구분 개수 표
+    categories = result['policy'].categories + [NO_CUT_CATEGORY]
+    grades = result['grades'].tolist()
+    for keyword in result['keywords']:
+        if keyword in result['missing']:
+            continue
+        matrix = result['categories'][:, result['keyword_masks'][keyword]]
+        counts = pd.DataFrame(
+            {cat: (matrix == cat).sum(axis=1) for cat in categories},
+            index=[f"{grade:g}" for grade in grades]
+        )
+        counts.index.name = '내신'
+        st.write(f"**{keyword}** - 후보 {matrix.shape[1]}개")
+        st.dataframe(counts.loc[:, counts.sum() > 0], use_container_width=True)
     
-    return output
+    # 선택한 조합의 추천 목록
+    col1, col2 = st.columns(2)
+    with col1:
+        keyword = st.selectbox("전공", [k for k in result['keywords'] if k not in result['missing']], key='sweep_pick_keyword')
+    with col2:
+        grade = st.selectbox("내신", grades, format_func=lambda g: f"{g:g}", key='sweep_pick_grade')
+    recommendations = result['recommendations'].get((keyword, grade)) or []
+    if recommendations:
+        df_results = pd.DataFrame(recommendations)
+        display_df = df_results[['category', 'university', 'major', 'admission_type',
+                                 'cut_grade', 'comp_rate', 'years_data']].copy()
+        display_df.columns = ['구분', '대학명', '학과명', '전형', '평균합격선', '평균경쟁률', '데이터년수']
+        display_df['평균합격선'] = display_df['평균합격선'].apply(lambda x: f"{x:.2f}" if pd.notna(x) else "-")
+        display_df['평균경쟁률'] = display_df['평균경쟁률'].apply(lambda x: f"{x:.1f}" if pd.notna(x) else "-")
+        display_df['데이터년수'] = display_df['데이터년수'].apply(lambda x: f"{x}년")
+        if 'via_synonym' in df_results:
+            display_df['검색'] = df_results['via_synonym'].map({True: '🔗 관련 학과', False: ''})
+        st.dataframe(display_df, use_container_width=True, height=600)
+    
+    # 추천 기준별 비교 - 현재 기준의 합격선에 각 기준의 구분 경계만 적용
+    if policies and len(policies) > 1 and keyword is not None:
+        cut_grades = result['programs']['cut_grade'].to_numpy()[result['keyword_masks'][keyword]]
+        counts = policy_category_counts(policies.values(), grade, cut_grades)
+        st.write(f"**추천 기준별 구분 비교** - {keyword} / 내신 {grade:g}")
+        st.caption(f"'{result['policy'].name}' 기준의 합격선으로 각 추천 기준의 구분 경계를 비교합니다.")
+        st.dataframe(counts.loc[:, counts.sum() > 0], use_container_width=True)
 
 # 메인 애플리케이션
 def main():
@@ -733,6 +627,10 @@ def main():
         st.info("5개년 데이터 기반 30개 대학 추천")
         st.write(f"**사용자**: {st.session_state.user}")
     
+    metrics = get_stage_metrics()
+    if is_admin(st.session_state.user):
+        show_stage_metrics(metrics)
+    
     df = load_admissions_data()
     
     if df is None:
@@ -760,26 +658,63 @@ def main():
             """)
         st.stop()
     
-    st.success(f"✅ 입시 데이터: {len(df):,}개 (2021~2025)")
+    years = pd.to_numeric(df['year'], errors='coerce')
+    st.success(f"✅ 입시 데이터: {len(df):,}개 ({int(years.min())}~{int(years.max())})")
+    
+    # 파생 데이터는 CSV 내용 해시 기준으로 캐시
+    data_version = get_data_version(df)
+    
+    # 대학-학과-전형별 통계표 (학생 성적과 무관한 값은 미리 계산)
+    # 추천 기준 (여러 개면 사이드바에서 선택)
+    policies = get_recommendation_policies()
+    if len(policies) > 1:
+        policy = policies[st.sidebar.selectbox("추천 기준", list(policies))]
+    else:
+        policy = next(iter(policies.values()))
+    # 저장소 데이터면 새 년도 파일이 추가돼도 바뀐 프로그램만 다시 계산됨
+    remove_stale_shared_segments(data_version, tuple(sorted(p.aggregate_fingerprint for p in policies.values())),
+                                 list(policies.values()))
+    program_summary = get_admissions_store().program_summary(policy, df)
+    if program_summary is None:
+        program_summary = build_program_summary(data_version, policy.aggregate_fingerprint, df, policy)
+    
+    # 학과명 검색 인덱스
+    major_index = get_admissions_store().major_index(df)
+    if major_index is None:
+        major_index = get_major_index(data_version, df)
     
     # 데이터 통계 정보
     with st.expander("📊 데이터 상세 정보"):
+        stats = get_dataset_stats(data_version, df)
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric("총 데이터", f"{len(df):,}개")
-            year_stats = df['year'].value_counts().sort_index()
-            for year, count in year_stats.items():
+            st.metric("총 데이터", f"{stats['total']:,}개")
+            for year, count in stats['year_counts'].items():
                 st.write(f"{year}년: {count:,}개")
         with col2:
-            st.metric("대학 수", f"{df['university_name'].nunique():,}개")
-            st.metric("학과 수", f"{df['major_name'].nunique():,}개")
+            st.metric("대학 수", f"{stats['universities']:,}개")
+            st.metric("학과 수", f"{stats['majors']:,}개")
         with col3:
-            st.metric("종합전형", f"{df[df['admission_type'].str.contains('종합', na=False)].shape[0]:,}개")
-            st.metric("교과전형", f"{df[df['admission_type'].str.contains('교과', na=False)].shape[0]:,}개")
+            st.metric("종합전형", f"{stats['jonghap']:,}개")
+            st.metric("교과전형", f"{stats['gyogwa']:,}개")
     
-    major_keywords = get_major_keywords(df)
+    major_keywords = get_major_keywords_cached(data_version, df)
     st.sidebar.info(f"✅ {len(major_keywords)}개의 학과 키워드 추출 완료")
     
+    # 관련 학과 확장 (컴퓨터 → 소프트웨어, 정보통신 ...)
+    synonyms = None
+    if st.sidebar.checkbox("관련 학과 함께 검색", value=False,
+                           help="컴퓨터 → 소프트웨어, 정보통신, AI 처럼 같은 계열 학과까지 한 번에 검색합니다."):
+        synonyms = get_synonym_graph(data_version, major_index, major_keywords)
+    
+    mode = st.sidebar.radio("추천 방식", ["개별 추천", "반 전체 일괄 추천", "성적/전공 비교"])
+    if mode == "반 전체 일괄 추천":
+        batch_main(df, program_summary, major_index, policy, synonyms=synonyms)
+        return
+    if mode == "성적/전공 비교":
+        sweep_main(df, program_summary, major_index, policy, synonyms=synonyms, policies=policies)
+        return
+    
     st.subheader("📄 1. 평가표 업로드")
     uploaded_file = st.file_uploader(
         "엑셀 파일을 업로드하세요",
@@ -802,7 +737,7 @@ def main():
             if student_info['grade']:
                 grade = student_info['grade']
         
-        uploaded_file.seek(0)
+        # 같은 업로드는 캐시된 추출 결과 재사용
         auto_grade = get_student_grade_from_excel(uploaded_file)
         if auto_grade:
             student_grade = auto_grade
@@ -833,10 +768,20 @@ def main():
     else:
         hope_major = st.text_input("키워드 입력", placeholder="예: 컴퓨터, 기계, 전자")
     
+    fuzzy = st.checkbox("오타 허용 (일치하는 학과가 없으면 비슷한 학과명으로 검색)", value=True)
+    
     if hope_major:
-        matching = df[df['major_name'].apply(lambda x: flexible_search(x, hope_major))]
-        unique_majors = matching.groupby(['university_name', 'major_name']).size().reset_index()
-        st.metric("매칭 학과", f"{len(unique_majors)}개 대학/학과")
+        if synonyms is not None:
+            _, num_programs, expanded_terms = synonym_major_rows(df, major_index, synonyms, hope_major)
+            if expanded_terms:
+                st.info(f"🔗 {format_expanded_terms(hope_major, expanded_terms)}")
+        else:
+            _, num_programs = match_major_rows(df, major_index, hope_major)
+        if num_programs == 0 and fuzzy:
+            _, num_programs, matches = fuzzy_major_rows(df, major_index, hope_major)
+            if matches:
+                st.info(f"🔎 {format_fuzzy_matches(hope_major, matches)}")
+        st.metric("매칭 학과", f"{num_programs}개 대학/학과")
     
     st.markdown("---")
     
@@ -851,11 +796,17 @@ def main():
                 except:
                     pass
                 
-                recommendations, filtered, error = find_recommendations(df, hope_major, student_grade)
+                distribution = {}
+                recommendations, filtered, error = find_recommendations(
+                    df, hope_major, student_grade,
+                    summary=program_summary, index=major_index, distribution=distribution,
+                    policy=policy, fuzzy=fuzzy, synonyms=synonyms
+                )
                 
                 if error:
                     st.error(error)
                 else:
+                    show_category_distribution(distribution, policy)
                     st.success(f"✅ {len(recommendations)}개 대학 추천 완료!")
                     
                     st.session_state['recommendations'] = recommendations
@@ -865,7 +816,9 @@ def main():
                         'grade': grade,
                         'major': hope_major
                     }
-                    st.session_state['filtered_df'] = filtered
+                    # 세션에는 DataFrame 복사본 대신 공유 데이터의 행 번호만 저장
+                    st.session_state['filtered_rows'] = filtered.index.to_numpy()
+                    st.session_state['data_version'] = data_version
                     
                     # 결과 표시
                     df_results = pd.DataFrame(recommendations)
@@ -878,6 +831,9 @@ def main():
                     display_df['평균합격선'] = display_df['평균합격선'].apply(lambda x: f"{x:.2f}" if pd.notna(x) and x != 999 else "-")
                     display_df['평균경쟁률'] = display_df['평균경쟁률'].apply(lambda x: f"{x:.1f}" if pd.notna(x) else "-")
                     display_df['데이터년수'] = display_df['데이터년수'].apply(lambda x: f"{x}년")
+                    if 'via_synonym' in df_results:
+                        # 희망 전공과 직접 일치하지 않고 관련 학과 확장으로 찾은 학과
+                        display_df['검색'] = df_results['via_synonym'].map({True: '🔗 관련 학과', False: ''})
                     
                     # 스타일 적용
                     st.dataframe(
@@ -912,17 +868,18 @@ def main():
                 for years, count in year_counts.items():
                     st.write(f"- {years}년 데이터: {count}개")
         
-        # 엑셀 다운로드
-        output_file = create_excel_output(
-            st.session_state['student_info'],
-            st.session_state['recommendations'],
-            st.session_state.get('filtered_df', None)
-        )
+        # 검색 결과 행 (데이터가 바뀌었으면 생략)
+        filtered_rows = None
+        if 'filtered_rows' in st.session_state and st.session_state.get('data_version') == data_version:
+            filtered_rows = st.session_state['filtered_rows']
+        student_info = st.session_state['student_info']
+        recommendations = st.session_state['recommendations']
         
+        # 엑셀 다운로드 - 버튼을 누를 때만 생성 (같은 결과는 캐시 재사용)
         # 다운로드 로그 시도 (실패해도 계속 진행)
         if st.download_button(
             "📥 엑셀 파일 다운로드",
-            output_file,
+            lambda: build_excel_bytes(student_info, recommendations, filtered_rows, data_version, df),
             f"대학추천_{st.session_state['student_info']['name']} by COdeStudio.xlsx",
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             use_container_width=True
@@ -0,0 +1,167 @@
+"""사용자 활동 로그 (백그라운드 일괄 기록)
+
+log() 는 큐에 넣기만 하고 바로 반환한다. 별도 스레드가 이벤트를 모아
+개수(batch_size) 또는 시간(flush_interval) 기준으로 sink 에 한 번에 기록한다.
+큐가 가득 차면 기다리지 않고 이벤트를 버린다 (dropped 로 개수 확인).
+
+sink 는 write_batch(events) 메서드만 있으면 된다.
+"""
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+# 로그 컬럼 (Google Sheets 헤더와 같은 순서)
+LOG_FIELDS = ['user', 'activity', 'timestamp', 'ip', 'detail']
+LOG_HEADERS = ['사용자', '활동유형', '시간', 'IP', '세부정보']
+
+
+class JsonlSink:
+    """로컬 JSON Lines 파일에 기록 (오프라인에서도 동작)"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def write_batch(self, events):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for event in events:
+                f.write(json.dumps(event, ensure_ascii=False) + '\n')
+
+
+class SqliteSink:
+    """로컬 SQLite 파일에 기록"""
+
+    def __init__(self, path):
+        self.path = path
+        self._initialized = False
+
+    def write_batch(self, events):
+        with sqlite3.connect(self.path) as conn:
+            if not self._initialized:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS activity_log "
+                    "(user TEXT, activity TEXT, timestamp TEXT, ip TEXT, detail TEXT)"
+                )
+                self._initialized = True
+            conn.executemany(
+                "INSERT INTO activity_log (user, activity, timestamp, ip, detail) VALUES (?, ?, ?, ?, ?)",
+                [[event.get(field, '') for field in LOG_FIELDS] for event in events]
+            )
+
+
+class GoogleSheetsSink:
+    """Google Sheets '사용자로그' 워크시트에 기록 (배치마다 append_rows 한 번)"""
+
+    def __init__(self, client_factory, spreadsheet_id, worksheet_title="사용자로그"):
+        self.client_factory = client_factory
+        self.spreadsheet_id = spreadsheet_id
+        self.worksheet_title = worksheet_title
+        self._worksheet = None
+
+    def _get_worksheet(self):
+        if self._worksheet is None:
+            client = self.client_factory()
+            if not client:
+                raise RuntimeError("Google Sheets 클라이언트를 만들 수 없습니다.")
+            sheet = client.open_by_key(self.spreadsheet_id)
+
+            # 로그 워크시트 찾기 또는 생성
+            try:
+                self._worksheet = sheet.worksheet(self.worksheet_title)
+            except Exception:
+                self._worksheet = sheet.add_worksheet(title=self.worksheet_title, rows=1000, cols=10)
+                self._worksheet.update('A1:E1', [LOG_HEADERS])
+        return self._worksheet
+
+    def write_batch(self, events):
+        try:
+            self._get_worksheet().append_rows(
+                [[event.get(field, '') for field in LOG_FIELDS] for event in events]
+            )
+        except Exception:
+            # 연결이 끊겼을 수 있으므로 다음 배치에서 다시 연결
+            self._worksheet = None
+            raise
+
+
+class ActivityLogger:
+    """크기 제한 큐 + 백그라운드 스레드로 로그를 모아서 기록"""
+
+    def __init__(self, sinks, max_queue=10000, batch_size=50, flush_interval=5.0):
+        self.sinks = list(sinks)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.failed = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="activity-logger", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def log(self, user, activity_type, detail="", ip=""):
+        """이벤트를 큐에 넣고 바로 반환 - 큐가 가득 차면 버리고 False"""
+        event = {
+            'user': user,
+            'activity': activity_type,
+            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'ip': ip,
+            'detail': detail
+        }
+        try:
+            self._queue.put_nowait(event)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _write(self, batch):
+        for sink in self.sinks:
+            try:
+                sink.write_batch(batch)
+            except Exception:
+                # 로그 실패해도 다른 sink 는 계속 진행
+                self.failed += len(batch)
+
+    def _run(self):
+        batch = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                event = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                event = None
+
+            if event is not None:
+                batch.append(event)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            # 개수 또는 시간 기준으로 기록, 종료 요청이면 남은 것까지 기록
+            stopping = self._stop.is_set() and self._queue.empty()
+            if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline or stopping):
+                self._write(batch)
+                batch = []
+                deadline = None
+            if stopping:
+                return
+
+    def close(self, timeout=5.0):
+        """남은 로그를 기록하고 스레드 종료"""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        try:
+            # 대기 중인 스레드 깨우기
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
@@ -0,0 +1,331 @@
+"""년도별 입시 데이터 저장소 (새 년도 CSV 만 추가로 읽기)
+
+기본 CSV(2025_2021_result.csv)와 data 폴더의 년도별 CSV 를 파일(파티션) 단위로 관리한다.
+refresh() 는 파일 목록과 수정시각만 확인하고, 새로 생기거나 바뀐 파일만 파싱/검증해서 합친다.
+대학-학과-전형 통계표도 바뀐 파일에 나오는 프로그램만 다시 계산한다.
+
+데이터가 바뀌면 df / version 이 새 객체로 바뀌므로, 이전 객체를 쓰던 세션은 그대로 동작하고
+다음 실행부터 새 데이터를 본다.
+
+shared=True 면 합친 데이터 / 통계표 / 학과 검색 인덱스를 공유 메모리(shared_dataset)에 올려
+같은 서버의 다른 프로세스와 한 벌만 사용한다.
+"""
+import os
+import threading
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from recommendation_core import (
+    CUT_COLUMNS, DATA_DIR, DATA_FILE, DEFAULT_POLICY,
+    aggregate_programs, build_major_index, compact_admissions_frame, load_admissions_file, merge_admissions_frames, program_keys,
+    unweighted_years, update_program_summary,
+)
+from shared_dataset import release_segment, remove_stale_segments, segment_name, share_frame, share_major_index
+
+# 년도 / 컷 값으로 허용하는 범위
+VALID_YEARS = (2000, 2100)
+VALID_CUT_RANGE = (0.0, 9.0)
+
+
+def partition_signature(file_path):
+    """파일 변경 확인용 (수정시각, 크기)"""
+    stat = os.stat(file_path)
+    return stat.st_mtime, stat.st_size
+
+
+def invalid_rows(df, other_years=()):
+    """행 단위 검증 - (잘못된 행 bool 배열, 문제별 메시지 목록)"""
+    years = pd.to_numeric(df['year'], errors='coerce')
+    cuts = df[CUT_COLUMNS].to_numpy(dtype=float)
+    checks = [
+        (years.isna().to_numpy(), "년도가 비어있거나 숫자가 아닌 행이 {count}개 있습니다."),
+        ((years.notna() & ~years.between(*VALID_YEARS)).to_numpy(),
+         "년도 범위를 벗어난 행이 {count}개 있습니다: {years}"),
+        (years.isin(list(other_years)).to_numpy(), "다른 파일에 이미 있는 년도입니다: {years}"),
+        ((~np.isnan(cuts) & ((cuts < VALID_CUT_RANGE[0]) | (cuts > VALID_CUT_RANGE[1]))).any(axis=1),
+         f"컷 등급이 {VALID_CUT_RANGE[0]:g}~{VALID_CUT_RANGE[1]:g} 범위를 벗어난 행이 {{count}}개 있습니다."),
+    ]
+    invalid = np.zeros(len(df), dtype=bool)
+    messages = []
+    for mask, message in checks:
+        if mask.any():
+            invalid |= mask
+            bad_years = ', '.join(map(str, sorted(set(years[mask].dropna().astype(int)))[:5]))
+            messages.append(message.format(count=int(mask.sum()), years=bad_years))
+    return invalid, messages
+
+
+def validate_partition(df, other_years=()):
+    """년도별 파티션 검증 - 문제가 있으면 (파일 전체를 받지 않을) 오류 메시지, 없으면 None"""
+    _, messages = invalid_rows(df, other_years)
+    return messages[0] if messages else None
+
+
+def drop_invalid_rows(df, other_years=()):
+    """기본 CSV 검증 - 잘못된 행만 빼고 (데이터, 안내 메시지 또는 None)
+
+    기본 CSV 는 전체 데이터라서 한 행 때문에 파일 전체를 버리지 않는다.
+    """
+    invalid, messages = invalid_rows(df, other_years)
+    if not invalid.any():
+        return df, None
+    attrs = dict(df.attrs)
+    df = compact_admissions_frame(df[~invalid].reset_index(drop=True))
+    df.attrs.update(attrs)
+    return df, f"잘못된 {int(invalid.sum())}개 행을 제외했습니다 ({' / '.join(messages)})"
+
+
+class AdmissionsStore:
+    """기본 CSV + data 폴더 년도별 CSV 를 합친 데이터와 통계표"""
+
+    def __init__(self, base_file=DATA_FILE, data_dir=DATA_DIR, use_snapshot=True, min_interval=5.0, shared=False):
+        self.base_file = base_file
+        self.data_dir = data_dir
+        self.use_snapshot = use_snapshot
+        self.min_interval = min_interval
+        self.shared = shared
+        self.df = None
+        self.version = None
+        # 파일 경로 → {'signature', 'df', 'years', 'notice'} (notice: 기본 CSV 에서 제외한 행 안내)
+        self.partitions = {}
+        # 파일 경로 → (signature, 오류 메시지) - 같은 파일은 다시 파싱하지 않음
+        self.errors = {}
+        # 정책 집계 해시 → (정책, 통계표)
+        self._summaries = {}
+        # 현재 데이터의 학과 검색 인덱스
+        self._index = None
+        # 현재 버전에서 사용 중인 공유 메모리 블록 이름
+        self._segment_names = set()
+        # _lock: 상태 교체용 (짧게), _refresh_lock: 파일 읽기는 한 스레드만
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._last_scan = None
+
+    def partition_files(self):
+        """기본 CSV 다음에 data 폴더 CSV (이름순)"""
+        files = []
+        if self.base_file and os.path.exists(self.base_file):
+            files.append(self.base_file)
+        if self.data_dir and os.path.isdir(self.data_dir):
+            files.extend(sorted(
+                os.path.join(self.data_dir, name) for name in os.listdir(self.data_dir)
+                if name.lower().endswith('.csv')
+            ))
+        return files
+
+    def refresh(self, force=False):
+        """새로 생기거나 바뀐/지워진 파일만 반영 - 데이터가 바뀌었으면 True"""
+        now = time.monotonic()
+        if not force and self._last_scan is not None and now - self._last_scan < self.min_interval:
+            return False
+
+        # 다른 세션이 이미 읽는 중이면 기다리지 않고 현재 데이터 사용
+        if not self._refresh_lock.acquire(blocking=False):
+            return False
+        try:
+            self._last_scan = now
+            files = self.partition_files()
+            signatures = {}
+            for file_path in files:
+                try:
+                    signatures[file_path] = partition_signature(file_path)
+                except OSError:
+                    pass
+
+            # 지워진 파일 정리
+            for file_path in [path for path in self.errors if path not in signatures]:
+                del self.errors[file_path]
+            partitions = dict(self.partitions)
+            changed_frames = []
+            for file_path in [path for path in partitions if path not in signatures]:
+                changed_frames.append(partitions.pop(file_path)['df'])
+
+            for file_path, signature in signatures.items():
+                current = partitions.get(file_path)
+                if current is not None and current['signature'] == signature:
+                    continue
+                if self.errors.get(file_path, (None,))[0] == signature:
+                    continue
+
+                df, _ = load_admissions_file(file_path, use_snapshot=self.use_snapshot)
+                notice = None
+                if df is None:
+                    error = "CSV 파일을 읽을 수 없습니다 (13개 컬럼인지 확인)."
+                else:
+                    other_years = set().union(*[
+                        partition['years'] for path, partition in partitions.items() if path != file_path
+                    ])
+                    # 년도별 파티션은 전부 받거나 전부 거부, 기본 CSV 는 잘못된 행만 제외
+                    if file_path == self.base_file:
+                        df, notice = drop_invalid_rows(df, other_years)
+                        error = None if len(df) else "사용할 수 있는 행이 없습니다."
+                    else:
+                        error = validate_partition(df, other_years)
+                if error:
+                    # 잘못된 파일은 합치지 않고, 이전에 읽은 내용이 있으면 그대로 유지
+                    self.errors[file_path] = (signature, error)
+                    continue
+
+                self.errors.pop(file_path, None)
+                if current is not None:
+                    changed_frames.append(current['df'])
+                changed_frames.append(df)
+                partitions[file_path] = {
+                    'signature': signature,
+                    'df': df,
+                    'years': set(pd.to_numeric(df['year']).astype(int)),
+                    'notice': notice,
+                }
+
+            if not changed_frames:
+                return False
+
+            merged = merge_admissions_frames([partitions[path]['df'] for path in files if path in partitions])
+            version = merged.attrs['data_version'] if merged is not None else None
+            segment_names = set()
+            if merged is not None and self.shared:
+                merged = self._share_partitions(merged, partitions, files)
+                segment_names.add(segment_name('data', version))
+
+            with self._lock:
+                summaries = dict(self._summaries)
+            if merged is not None and summaries:
+                changed_keys = program_keys(changed_frames)
+                summaries = {
+                    key: (policy, self._build_summary(
+                        merged, policy, lambda summary=summary, policy=policy: update_program_summary(
+                            summary, merged, changed_keys, policy), segment_names))
+                    for key, (policy, summary) in summaries.items()
+                }
+            else:
+                summaries = {}
+
+            with self._lock:
+                self.partitions = partitions
+                self.df = merged
+                self.version = version
+                self._summaries = summaries
+                self._index = None
+                old_names = self._segment_names - segment_names
+                self._segment_names = segment_names
+            # 이전 버전 블록은 이름을 지움 (이미 붙은 세션은 계속 사용)
+            for name in old_names:
+                release_segment(name, unlink=True)
+            # 종료된 프로세스가 남긴 다른 버전 블록도 정리
+            if self.shared:
+                self.remove_stale_segments()
+            return True
+        finally:
+            self._refresh_lock.release()
+
+    def program_summary(self, policy=None, df=None):
+        """현재 데이터의 통계표 (정책별로 한 번 계산, 이후에는 바뀐 부분만 갱신)
+
+        df 를 주면 그 사이 데이터가 바뀌었거나 저장소 데이터가 아닐 때 None
+        """
+        policy = policy or DEFAULT_POLICY
+        key = policy.aggregate_fingerprint
+        with self._lock:
+            current = self.df
+            entry = self._summaries.get(key)
+        if current is None or (df is not None and df is not current):
+            return None
+        df = current
+        if entry is not None:
+            return entry[1]
+
+        segment_names = set()
+        summary = self._build_summary(df, policy, lambda: aggregate_programs(df, policy=policy), segment_names)
+        with self._lock:
+            # 계산하는 동안 데이터가 바뀌었으면 저장하지 않음
+            if self.df is df:
+                self._summaries.setdefault(key, (policy, summary))
+                self._segment_names |= segment_names
+        return summary
+
+    def major_index(self, df=None):
+        """현재 데이터의 학과 검색 인덱스 (df 가 저장소 데이터가 아니면 None)"""
+        with self._lock:
+            current = self.df
+            index = self._index
+        if current is None or (df is not None and df is not current):
+            return None
+        if index is not None:
+            return index
+
+        if self.shared:
+            version = current.attrs['data_version']
+            index = share_major_index(version, current)
+            names = {segment_name('index', version)}
+        else:
+            index = build_major_index(current)
+            names = set()
+        with self._lock:
+            if self.df is current:
+                self._index = self._index or index
+                self._segment_names |= names
+                index = self._index
+        return index
+
+    def _build_summary(self, df, policy, build, segment_names):
+        """통계표 계산 (공유 메모리 사용 시 다른 프로세스가 올린 것이 있으면 그대로 사용)"""
+        # 년도를 고정한 가중치 표면 새로 들어온 년도는 기본 가중치가 되므로 알림
+        missing = unweighted_years(df, policy.year_weighting)
+        if missing:
+            warnings.warn(
+                f"추천 기준 '{policy.name}' 의 년도 가중치 표에 없는 년도: "
+                f"{', '.join(map(str, missing))} (기본 가중치 적용)", stacklevel=2
+            )
+        if not self.shared:
+            return build()
+        version = df.attrs['data_version']
+        segment_names.add(segment_name('summary', version, policy.aggregate_fingerprint))
+        return share_frame(version, build, 'summary', policy.aggregate_fingerprint)
+
+    def _share_partitions(self, merged, partitions, files):
+        """합친 데이터를 공유 메모리에 올리고, 파티션들도 그 일부(view)를 가리키게 함"""
+        merged = share_frame(merged.attrs['data_version'], lambda: merged)
+        start = 0
+        for path in files:
+            partition = partitions.get(path)
+            if partition is None:
+                continue
+            stop = start + len(partition['df'])
+            view = merged.iloc[start:stop]
+            view.attrs['data_version'] = partition['df'].attrs['data_version']
+            partitions[path] = dict(partition, df=view)
+            start = stop
+        return merged
+
+    def remove_stale_segments(self, policies=None):
+        """현재 데이터 버전이 아닌 공유 메모리 블록 삭제 - 지운 이름 목록
+
+        policies 를 주면 그 정책들이 아닌 통계표 블록도 지운다 (정책 파일이 바뀐 경우).
+        """
+        with self._lock:
+            version = self.version
+        if not self.shared or version is None:
+            return []
+        keys = None
+        if policies is not None:
+            keys = {'summary': {policy.aggregate_fingerprint for policy in policies}}
+        removed = remove_stale_segments(version, keys)
+        with self._lock:
+            self._segment_names -= set(removed)
+        for name in removed:
+            release_segment(name)
+        return removed
+
+    def error_messages(self):
+        """읽지 못한 파일별 오류"""
+        return {os.path.basename(path): error for path, (_, error) in self.errors.items()}
+
+    def notice_messages(self):
+        """읽었지만 일부 행을 제외한 파일별 안내"""
+        return {
+            os.path.basename(path): partition['notice']
+            for path, partition in self.partitions.items() if partition.get('notice')
+        }
@@ -0,0 +1,423 @@
+"""성능 측정 (합성 데이터)
+
+실제 입시 CSV 없이 같은 13개 컬럼 구조의 합성 데이터와 평가표를 만들어
+데이터 로드, 키워드 추출, 학과 검색, 추천, 엑셀 생성 단계를 측정한다.
+결과는 JSON 으로 저장해서 버전 간에 비교할 수 있다.
+
+    python benchmark.py generate --rows 100000 --output bench.csv --workbooks 30
+    python benchmark.py run --rows 10000 100000 1000000 --repeat 5 --output before.json
+    python benchmark.py compare before.json after.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import zlib
+from datetime import datetime
+from io import BytesIO
+
+import numpy as np
+import openpyxl
+import pandas as pd
+from openpyxl import Workbook
+
+from recommendation_core import (
+    aggregate_programs, build_major_index, create_excel_output, extract_student_workbook,
+    find_recommendations, flexible_search, get_major_keywords, load_admissions_file, match_major_rows,
+    parse_student_grade, parse_student_info, sweep_recommendations,
+)
+
+# 원본 CSV 헤더 (앱 도움말의 13개 컬럼 순서)
+CSV_HEADER = [
+    '년도', '대학명', '중심전형', '전형명', '모집단위', '모집인원', '경쟁률',
+    '충원순위', '50%컷', '70%컷', '85%컷', '90%컷', '반영교과목'
+]
+
+YEARS = [2025, 2024, 2023, 2022, 2021]
+
+# 지역/학교명 + 학교 종류
+UNIVERSITY_PREFIXES = [
+    '서울', '연세', '고려', '한양', '성균관', '중앙', '경희', '한국외국어', '서강', '이화', '건국', '동국',
+    '홍익', '국민', '숭실', '세종', '광운', '명지', '상명', '가천', '인하', '아주', '단국', '부산', '경북',
+    '전남', '전북', '충남', '충북', '강원', '제주', '경상', '부경', '울산', '창원', '인천', '순천', '목포',
+    '공주', '한밭', '한림', '호서', '선문', '대구', '계명', '영남', '동아', '조선', '원광', '우석', '한남',
+    '배재', '청주', '서원', '한서', '남서울', '평택', '수원', '용인', '협성',
+]
+UNIVERSITY_KINDS = [('대학교', 0.82), ('과학기술대학교', 0.06), ('여자대학교', 0.06), ('교육대학교', 0.06)]
+
+# 학과명 어간 (앞쪽일수록 흔함) / 어미
+MAJOR_STEMS = [
+    '컴퓨터공학', '경영', '간호', '소프트웨어', '전자공학', '기계공학', '사회복지', '유아교육', '경제',
+    '행정', '화학공학', '생명과학', '전기공학', '영어영문', '국어국문', '건축', '산업공학', '정보통신공학',
+    '인공지능', '신소재공학', '환경공학', '수학', '물리', '통계', '심리', '체육', '디자인', '미디어커뮤니케이션',
+    '법', '정치외교', '사학', '철학', '식품영양', '호텔관광', '항공서비스', '토목공학', '도시공학', '바이오의약',
+    '데이터사이언스', '게임', '음악', '미술', '연극영화', '국제통상', '회계', '세무', '물리치료', '작업치료',
+    '치위생', '임상병리', '방사선', '응급구조', '경찰행정', '중어중문', '일어일문', '약', '의예', '수의예',
+]
+MAJOR_SUFFIXES = [('학과', 0.55), ('학부', 0.2), ('전공', 0.15), ('과', 0.1)]
+MAJOR_PREFIXES = [('', 0.85), ('글로벌', 0.04), ('융합', 0.04), ('스마트', 0.03), ('AI', 0.02), ('미래', 0.02)]
+MAJOR_NOTES = [('', 0.93), ('(야간)', 0.03), ('(계약학과)', 0.02), ('(인문)', 0.01), ('(자연)', 0.01)]
+
+ADMISSION_TYPES = [('학생부교과', 0.45), ('학생부종합', 0.4), ('논술', 0.08), ('실기/실적', 0.07)]
+ADMISSION_NAMES = [
+    ('일반전형', 0.3), ('지역균형', 0.15), ('학교추천', 0.12), ('활동우수형', 0.1), ('기회균형', 0.08),
+    ('농어촌', 0.06), ('특성화고', 0.05), ('고른기회', 0.05), ('면접형', 0.05), ('서류형', 0.04),
+]
+SUBJECTS = ['국영수사', '국영수과', '국영수사과', '전과목', '국영수']
+
+# 측정에 쓰는 희망 전공 키워드 / 내신
+KEYWORDS = ['컴퓨터', '간호', '경영 경제', '전자', '디자인']
+GRADES = [1.8, 2.5, 3.4, 4.6]
+
+SURNAMES = list('김이박최정강조윤장임한오서신권황안송류홍')
+GIVEN_SYLLABLES = list('민서지현수준도윤하은예진우주성연영호재아')
+
+
+def _weighted_choice(rng, options, size):
+    """(값, 비율) 목록에서 size 개 선택"""
+    values = np.array([value for value, _ in options], dtype=object)
+    weights = np.array([weight for _, weight in options], dtype=float)
+    return values[rng.choice(len(values), size=size, p=weights / weights.sum())]
+
+
+def _zipf_choice(rng, values, size, exponent=1.1):
+    """앞쪽 값이 더 자주 나오는 선택 (실제 학과 분포처럼 컴퓨터/경영/간호 등이 많음)"""
+    weights = 1.0 / np.arange(1, len(values) + 1) ** exponent
+    return np.asarray(values, dtype=object)[rng.choice(len(values), size=size, p=weights / weights.sum())]
+
+
+def make_programs(n_programs, seed=0):
+    """대학-학과-전형 단위의 합성 프로그램 표"""
+    rng = np.random.default_rng(seed)
+
+    universities = np.array([
+        prefix + kind for prefix in UNIVERSITY_PREFIXES for kind, _ in UNIVERSITY_KINDS
+    ], dtype=object)
+    kind_weights = np.tile([weight for _, weight in UNIVERSITY_KINDS], len(UNIVERSITY_PREFIXES))
+    university = universities[rng.choice(len(universities), size=n_programs, p=kind_weights / kind_weights.sum())]
+
+    stem = _zipf_choice(rng, MAJOR_STEMS, n_programs)
+    suffix = _weighted_choice(rng, MAJOR_SUFFIXES, n_programs)
+    # '컴퓨터공학' + '학과' → '컴퓨터공학과', '의예' 는 항상 '의예과'
+    ends_with_hak = np.array([value.endswith('학') for value in stem])
+    suffix = np.where(ends_with_hak & (suffix == '학과'), '과', suffix)
+    suffix = np.where(ends_with_hak & (suffix == '학부'), '부', suffix)
+    suffix = np.where(np.array([value.endswith('예') for value in stem]), '과', suffix).astype(object)
+    major = (_weighted_choice(rng, MAJOR_PREFIXES, n_programs) + stem + suffix
+             + _weighted_choice(rng, MAJOR_NOTES, n_programs))
+
+    return pd.DataFrame({
+        'university_name': university,
+        'admission_type': _weighted_choice(rng, ADMISSION_TYPES, n_programs),
+        'admission_name': _weighted_choice(rng, ADMISSION_NAMES, n_programs),
+        'major_name': major,
+        'quota': rng.integers(1, 60, size=n_programs),
+        # 학교 수준 (1~7등급, 상위권이 적음) / 연도별 변화 추세
+        'base_cut': 1.0 + 6.0 * rng.beta(2.0, 3.0, size=n_programs),
+        'drift': rng.normal(0.0, 0.08, size=n_programs),
+        'subjects': np.asarray(SUBJECTS, dtype=object)[rng.integers(0, len(SUBJECTS), size=n_programs)],
+    })
+
+
+def generate_admissions_csv(file_path, rows, seed=0, encoding='utf-8-sig'):
+    """13개 컬럼 합성 입시 CSV 생성 (정확히 rows 행, 년도 내림차순)"""
+    rng = np.random.default_rng(seed + 1)
+
+    # 프로그램마다 5개년 중 약 84% 년도에 모집
+    n_programs = max(int(np.ceil(rows / (len(YEARS) * 0.84))), 1)
+    programs = make_programs(n_programs, seed)
+    present = rng.random((n_programs, len(YEARS))) < 0.84
+
+    # 행 수를 정확히 맞추기
+    flat = present.ravel()
+    excess = int(flat.sum()) - rows
+    if excess > 0:
+        flat[rng.choice(np.flatnonzero(flat), excess, replace=False)] = False
+    elif excess < 0:
+        flat[rng.choice(np.flatnonzero(~flat), -excess, replace=False)] = True
+    present = flat.reshape(present.shape)
+
+    directory = os.path.dirname(file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with open(file_path, 'w', encoding=encoding, newline='') as f:
+        f.write(','.join(CSV_HEADER) + '\n')
+        for col, year in enumerate(YEARS):
+            ids = np.flatnonzero(present[:, col])
+            if len(ids) == 0:
+                continue
+            part = programs.iloc[ids]
+            n = len(ids)
+
+            age = YEARS[0] - year
+            center = part['base_cut'].to_numpy() - part['drift'].to_numpy() * age + rng.normal(0, 0.15, n)
+            cuts = {}
+            for name, offset in (('50%컷', 0.0), ('70%컷', 0.15), ('85%컷', 0.35), ('90%컷', 0.5)):
+                values = np.round(np.clip(center + offset + rng.normal(0, 0.05, n), 1.0, 9.0), 2)
+                # 일부는 비공개(빈칸) 또는 0
+                missing = rng.random(n)
+                values = np.where(missing < 0.15, np.nan, np.where(missing < 0.2, 0.0, values))
+                cuts[name] = values
+
+            quota = part['quota'].to_numpy()
+            comp = np.round(rng.lognormal(1.8, 0.6, n), 2)
+            comp = np.where(rng.random(n) < 0.08, np.nan, comp)
+
+            frame = pd.DataFrame({
+                '년도': year,
+                '대학명': part['university_name'].to_numpy(),
+                '중심전형': part['admission_type'].to_numpy(),
+                '전형명': part['admission_name'].to_numpy(),
+                '모집단위': part['major_name'].to_numpy(),
+                '모집인원': quota,
+                '경쟁률': comp,
+                '충원순위': rng.integers(0, 2 * quota + 1),
+                **cuts,
+                '반영교과목': part['subjects'].to_numpy(),
+            })
+            frame.to_csv(f, header=False, index=False)
+    return file_path
+
+
+def make_student_workbook(name, school, school_year, avg_grade, filler_rows=40):
+    """합성 평가표 (Index!F4 학교, I4 학년, K4 이름 / 성적분석!X13 평균 등급) → bytes"""
+    wb = Workbook(write_only=True)
+
+    index = wb.create_sheet('Index')
+    for row in range(1, 11):
+        values = [None] * 12
+        if row == 4:
+            values[5], values[8], values[10] = school, school_year, name
+        elif row == 2:
+            values[0] = '학생 평가표'
+        index.append(values)
+
+    # 실제 평가표처럼 성적표 영역을 채움
+    grades = wb.create_sheet('성적분석')
+    rng = np.random.default_rng(zlib.crc32(name.encode('utf-8')))
+    for row in range(1, filler_rows + 1):
+        values = [round(float(x), 2) for x in rng.uniform(1, 9, 30)]
+        if row == 13:
+            values[23] = avg_grade
+        grades.append(values)
+
+    output = BytesIO()
+    wb.save(output)
+    return output.getvalue()
+
+
+def generate_workbooks(directory, count, seed=0):
+    """합성 평가표 count 개 저장 - 파일 경로 목록"""
+    rng = np.random.default_rng(seed + 2)
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i in range(count):
+        name = rng.choice(SURNAMES) + ''.join(rng.choice(GIVEN_SYLLABLES, 2))
+        data = make_student_workbook(
+            name, f"{rng.choice(UNIVERSITY_PREFIXES)}고등학교", f"{rng.integers(1, 4)}",
+            round(float(1.0 + 5.0 * rng.beta(2.0, 2.5)), 2)
+        )
+        path = os.path.join(directory, f"{i + 1:03d}_{name}.xlsx")
+        with open(path, 'wb') as f:
+            f.write(data)
+        paths.append(path)
+    return paths
+
+
+def measure(results, name, rows, func, repeat, setup=None):
+    """func 를 repeat 번 실행해 결과 목록에 추가 - 마지막 반환값을 돌려줌"""
+    times = []
+    value = None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        value = func()
+        times.append((time.perf_counter() - started) * 1000)
+    results.append({
+        'name': name,
+        'rows': rows,
+        'repeat': repeat,
+        'min_ms': round(min(times), 3),
+        'median_ms': round(statistics.median(times), 3),
+        'mean_ms': round(statistics.fmean(times), 3),
+        'max_ms': round(max(times), 3),
+    })
+    print(f"{rows:>10,}  {name:<28} {results[-1]['median_ms']:>12.1f} ms", file=sys.stderr)
+    return value
+
+
+def run_scale(rows, data_dir, repeat, seed, workbooks):
+    """행 수 하나에 대해 모든 단계 측정"""
+    results = []
+    csv_path = os.path.join(data_dir, f"admissions_{rows}_{seed}.csv")
+    if not os.path.exists(csv_path):
+        print(f"합성 데이터 생성: {csv_path}", file=sys.stderr)
+        generate_admissions_csv(csv_path, rows, seed)
+
+    # 데이터 로드 (앱의 load_admissions_data 와 같은 경로: CSV 파싱 / 스냅샷)
+    df, _ = measure(results, 'load_csv', rows, lambda: load_admissions_file(csv_path, use_snapshot=False), repeat)
+    load_admissions_file(csv_path, use_snapshot=True)
+    measure(results, 'load_snapshot', rows, lambda: load_admissions_file(csv_path, use_snapshot=True), repeat)
+
+    measure(results, 'get_major_keywords', rows, lambda: get_major_keywords(df), repeat)
+
+    # 학과 검색: 전체 행 flexible_search / 검색 인덱스
+    def scan_filter():
+        for keyword in KEYWORDS:
+            df[df['major_name'].apply(lambda x: flexible_search(x, keyword))]
+    measure(results, 'flexible_search_filter', rows, scan_filter, repeat)
+    index = measure(results, 'build_major_index', rows, lambda: build_major_index(df), repeat)
+
+    def index_filter():
+        for keyword in KEYWORDS:
+            match_major_rows(df, index, keyword)
+    measure(results, 'indexed_search', rows, index_filter, repeat, setup=index['match_cache'].clear)
+
+    # 추천: 미리 계산한 통계표 + 인덱스 / 요청마다 검색·집계
+    summary = measure(results, 'aggregate_programs', rows, lambda: aggregate_programs(df), repeat)
+
+    def recommend_all(**kwargs):
+        for keyword in KEYWORDS:
+            for grade in GRADES:
+                output = find_recommendations(df, keyword, grade, **kwargs)
+        return output
+    measure(results, 'find_recommendations', rows,
+            lambda: recommend_all(summary=summary, index=index), repeat)
+    recommendations, filtered, _ = measure(results, 'find_recommendations_cold', rows,
+                                           lambda: recommend_all(), repeat)
+    measure(results, 'sweep_recommendations', rows,
+            lambda: sweep_recommendations(df, KEYWORDS, GRADES, summary=summary, index=index), repeat)
+
+    # 엑셀 생성 (마지막 키워드의 추천 + 검색 결과 시트)
+    student_info = {'name': '홍길동', 'school': '코드고등학교', 'grade': '2학년', 'major': KEYWORDS[-1]}
+    measure(results, 'create_excel_output', rows,
+            lambda: create_excel_output(student_info, recommendations, filtered), repeat)
+
+    # 평가표 읽기
+    if workbooks:
+        files = [
+            make_student_workbook(f"학생{i}", '코드고등학교', '2', 2.5 + i * 0.01)
+            for i in range(workbooks)
+        ]
+
+        def read_workbooks():
+            for data in files:
+                workbook = extract_student_workbook(data)
+                parse_student_info(workbook)
+                parse_student_grade(workbook)
+        measure(results, f'read_workbooks_x{workbooks}', rows, read_workbooks, repeat)
+    return results
+
+
+def environment_info():
+    """측정 환경 (버전 비교용)"""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=10,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'openpyxl': openpyxl.__version__,
+    }
+
+
+def compare_results(before, after, threshold=None):
+    """두 결과 파일 비교 - (출력 줄 목록, threshold 배 이상 느려진 항목 수)"""
+    old = {(r['name'], r['rows']): r for r in before['results']}
+    lines = [f"{'rows':>10}  {'stage':<28} {'before':>10} {'after':>10} {'ratio':>7}"]
+    regressions = 0
+    for result in after['results']:
+        key = (result['name'], result['rows'])
+        if key not in old:
+            lines.append(f"{result['rows']:>10,}  {result['name']:<28} {'-':>10} {result['median_ms']:>10.1f} {'new':>7}")
+            continue
+        base = old[key]['median_ms']
+        ratio = result['median_ms'] / base if base > 0 else float('inf')
+        mark = ''
+        if threshold and ratio >= threshold:
+            regressions += 1
+            mark = '  ← 느려짐'
+        lines.append(f"{result['rows']:>10,}  {result['name']:<28} {base:>10.1f} {result['median_ms']:>10.1f} "
+                     f"{ratio:>6.2f}x{mark}")
+    return lines, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="합성 데이터 기반 성능 측정")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    generate = commands.add_parser('generate', help="합성 입시 CSV / 평가표 생성")
+    generate.add_argument('--rows', type=int, default=100000, help="행 수 (기본값: 100000)")
+    generate.add_argument('--output', default='benchmark_data/admissions.csv', help="CSV 저장 경로")
+    generate.add_argument('--seed', type=int, default=0)
+    generate.add_argument('--encoding', default='utf-8-sig', help="CSV 인코딩 (기본값: utf-8-sig, 예: cp949)")
+    generate.add_argument('--workbooks', type=int, default=0, help="함께 만들 평가표 수")
+    generate.add_argument('--workbook-dir', default='benchmark_data/workbooks', help="평가표 저장 폴더")
+
+    run = commands.add_parser('run', help="단계별 측정")
+    run.add_argument('--rows', type=int, nargs='+', default=[10000, 100000], help="측정할 행 수 (여러 개)")
+    run.add_argument('--repeat', type=int, default=3, help="단계별 반복 횟수 (중앙값 기록)")
+    run.add_argument('--seed', type=int, default=0)
+    run.add_argument('--workbooks', type=int, default=30, help="읽기 측정에 쓸 평가표 수 (0 이면 생략)")
+    run.add_argument('--data-dir', default='benchmark_data', help="합성 CSV 캐시 폴더")
+    run.add_argument('--output', help="결과 JSON 저장 경로 (생략하면 표준출력)")
+
+    compare = commands.add_parser('compare', help="두 결과 JSON 비교")
+    compare.add_argument('before')
+    compare.add_argument('after')
+    compare.add_argument('--threshold', type=float, help="이 배수 이상 느려지면 종료 코드 1 (예: 1.2)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'generate':
+        generate_admissions_csv(args.output, args.rows, args.seed, args.encoding)
+        print(f"CSV 생성: {args.output} ({args.rows:,}행)")
+        if args.workbooks:
+            paths = generate_workbooks(args.workbook_dir, args.workbooks, args.seed)
+            print(f"평가표 생성: {args.workbook_dir} ({len(paths)}개)")
+        return 0
+
+    if args.command == 'compare':
+        with open(args.before, encoding='utf-8') as f:
+            before = json.load(f)
+        with open(args.after, encoding='utf-8') as f:
+            after = json.load(f)
+        lines, regressions = compare_results(before, after, args.threshold)
+        print(f"before: {before['environment'].get('commit')}  after: {after['environment'].get('commit')}")
+        print('\n'.join(lines))
+        return 1 if regressions else 0
+
+    results = []
+    for rows in args.rows:
+        results.extend(run_scale(rows, args.data_dir, args.repeat, args.seed, args.workbooks))
+    report = {
+        'environment': environment_info(),
+        'settings': {'repeat': args.repeat, 'seed': args.seed, 'keywords': KEYWORDS, 'grades': GRADES},
+        'results': results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+        print(f"결과 저장: {args.output}", file=sys.stderr)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
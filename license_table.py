@@ -0,0 +1,73 @@
+"""라이센스 키 조회 테이블
+
+secrets 의 licenses 목록을 한 번만 읽어 sha256(키) → 사용자 dict 로 만든다.
+조회는 해시 한 번 + dict 조회 (라이센스 목록을 차례로 비교하지 않음)이고,
+키 원문은 메모리에 남기지 않는다.
+secrets.toml 이 바뀌면 Streamlit 의 file_change_listener 신호를 받아 다시 만든다.
+"""
+import hashlib
+import threading
+
+
+def license_digest(key):
+    """라이센스 키의 sha256 해시 (bytes)"""
+    return hashlib.sha256(str(key).encode('utf-8')).digest()
+
+
+class LicenseTable:
+    """해시된 라이센스 키 → 사용자 이름"""
+
+    def __init__(self, licenses):
+        self._users = {}
+        for license in licenses:
+            digest = license_digest(license["key"])
+            # 같은 키가 여러 번 있으면 기존처럼 첫 번째 항목 사용
+            if digest not in self._users:
+                self._users[digest] = license["user"]
+
+    def __len__(self):
+        return len(self._users)
+
+    def lookup(self, key):
+        """키가 유효하면 사용자 이름, 아니면 None"""
+        if not key:
+            return None
+        return self._users.get(license_digest(key))
+
+
+_table = None
+_table_source = None
+_listening = set()
+_lock = threading.Lock()
+
+
+def _invalidate(*args, **kwargs):
+    """secrets.toml 변경 시 테이블 버리기 (다음 조회 때 다시 생성)"""
+    global _table
+    with _lock:
+        _table = None
+
+
+def get_license_table(secrets, section="licenses"):
+    """secrets 에서 라이센스 테이블 가져오기 - 없으면 None
+
+    프로세스당 한 번 만들고, secrets 파일이 바뀔 때만 다시 만든다.
+    """
+    global _table, _table_source
+    with _lock:
+        if _table is not None and _table_source == id(secrets):
+            return _table
+
+        # 모듈 함수라 스크립트 재실행과 상관없이 한 번만 연결됨
+        listener = getattr(secrets, "file_change_listener", None)
+        if listener is not None and id(listener) not in _listening:
+            listener.connect(_invalidate, weak=False)
+            _listening.add(id(listener))
+
+        try:
+            licenses = secrets[section]
+        except (KeyError, FileNotFoundError):
+            return None
+        _table = LicenseTable(licenses)
+        _table_source = id(secrets)
+        return _table
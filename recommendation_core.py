@@ -0,0 +1,2056 @@
+"""대학 추천 핵심 로직 (Streamlit 없이 import 가능)
+
+데이터 로드, 학과 검색, 추천 계산, 엑셀 생성을 담당한다.
+Streamlit 앱(UniversityRecommendation_app.py)과 명령행 양쪽에서 사용한다.
+
+    python recommendation_core.py --csv 2025_2021_result.csv --grade 2.5 --keyword 컴퓨터 --output 추천.xlsx
+
+성적/전공 비교 (what-if):
+
+    python recommendation_core.py --keyword 컴퓨터 --sweep-keyword 전자 --sweep-grades 2.3:2.7:0.2
+"""
+import argparse
+import hashlib
+import heapq
+import json
+import os
+import re
+import shutil
+import sys
+import threading
+import time
+import warnings
+import zipfile
+from collections import OrderedDict
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+
+from stage_metrics import METRICS, STAGE_LABELS, stage, timed
+
+# 입시 데이터 CSV 파일명
+DATA_FILE = '2025_2021_result.csv'
+
+# 새 년도 결과를 추가하는 폴더 (년도별 CSV, 파일 단위로 읽어서 합침)
+DATA_DIR = 'data'
+
+# 추천 기준 파일 (없으면 기본 기준)
+POLICY_FILE = 'recommendation_policy.toml'
+
+# 관련 학과 키워드 파일 (없으면 학과명 키워드의 동시 출현만 사용)
+SYNONYM_FILE = 'major_synonyms.toml'
+
+# CSV 13개 컬럼명
+ADMISSIONS_COLUMNS = [
+    'year', 'university_name', 'admission_type', 'admission_name',
+    'major_name', 'quota', 'comp_rate', 'pass_rank',
+    'cut_grade_50', 'cut_grade_70', 'cut_grade_85', 'cut_grade_90',
+    'reflected_subjects'
+]
+
+def file_content_hash(file_path):
+    """파일 내용 해시 (데이터 버전 키)"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def get_data_version(df):
+    """데이터 버전 키 - 파생 캐시(키워드, 통계 등)는 이 값 기준으로 재사용"""
+    version = df.attrs.get('data_version')
+    if version is None:
+        hashed = pd.util.hash_pandas_object(df, index=False).to_numpy()
+        version = hashlib.sha256(hashed.tobytes()).hexdigest()
+        df.attrs['data_version'] = version
+    return version
+
+# 메모리 절약용 컬럼 타입 (문자열 → category, 수치 → float32)
+CATEGORY_COLUMNS = ['university_name', 'admission_type', 'admission_name', 'major_name', 'reflected_subjects']
+FLOAT32_COLUMNS = ['quota', 'comp_rate', 'pass_rank',
+                   'cut_grade_50', 'cut_grade_70', 'cut_grade_85', 'cut_grade_90']
+
+def compact_admissions_frame(df):
+    """문자열은 category, 년도는 int16, 수치는 float32 로 변환하여 메모리 절약"""
+    for col in FLOAT32_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors='coerce').astype(np.float32)
+    
+    year = pd.to_numeric(df['year'], errors='coerce')
+    if year.notna().all() and year.between(np.iinfo(np.int16).min, np.iinfo(np.int16).max).all():
+        df['year'] = year.astype(np.int16)
+    else:
+        df['year'] = year.astype(np.float32)
+    
+    # 카테고리는 정렬된 순서 (groupby 정렬 결과가 문자열 정렬과 같도록)
+    for col in CATEGORY_COLUMNS:
+        values = df[col]
+        if not isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype('category')
+        if not values.cat.categories.is_monotonic_increasing:
+            values = values.cat.reorder_categories(values.cat.categories.sort_values())
+        df[col] = values
+    return df
+
+def to_float64(values):
+    """수치 배열을 float64 로 변환 (float32 값은 유효숫자 7자리로 반올림하여 원래 소수로 복원)"""
+    values = np.asarray(values)
+    if values.dtype != np.float32:
+        return values.astype(np.float64)
+    
+    values = values.astype(np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        magnitude = np.floor(np.log10(np.abs(values)))
+        scale = 10.0 ** np.where(np.isfinite(magnitude), 6 - magnitude, 0)
+        return np.round(values * scale) / scale
+
+def snapshot_path(file_path):
+    """CSV 옆에 저장되는 열 단위 스냅샷 디렉터리 경로"""
+    return os.path.splitext(file_path)[0] + '.snapshot'
+
+def write_data_snapshot(df, file_path, source_hash):
+    """파싱된 데이터를 열 단위 바이너리 스냅샷(.npy + meta.json)으로 저장 - 실패해도 앱은 계속 실행"""
+    target = snapshot_path(file_path)
+    tmp_dir = f"{target}.tmp-{os.getpid()}"
+    try:
+        os.makedirs(tmp_dir, exist_ok=True)
+        columns = []
+        for idx, col in enumerate(df.columns):
+            values = df[col]
+            if values.dtype.kind in 'biuf':
+                np.save(os.path.join(tmp_dir, f"{idx}.npy"), values.to_numpy())
+                columns.append({'name': col, 'kind': 'numeric'})
+            else:
+                # 문자열 컬럼은 코드 + 카테고리 목록으로 저장
+                codes, categories = pd.factorize(values, sort=True)
+                np.save(os.path.join(tmp_dir, f"{idx}.npy"), codes.astype(np.int32))
+                columns.append({
+                    'name': col,
+                    'kind': 'category',
+                    'dtype': str(values.dtype),
+                    'categories': [str(c) for c in categories],
+                })
+        
+        stat = os.stat(file_path)
+        meta = {
+            'source_mtime': stat.st_mtime,
+            'source_size': stat.st_size,
+            'source_hash': source_hash,
+            'rows': len(df),
+            'columns': columns,
+        }
+        # meta.json 이 마지막에 기록되어야 완전한 스냅샷
+        with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        
+        if os.path.exists(target):
+            shutil.rmtree(target)
+        os.replace(tmp_dir, target)
+        return True
+    except Exception as e:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return False
+
+def read_data_snapshot(file_path):
+    """CSV 가 바뀌지 않았으면 스냅샷을 메모리 매핑으로 읽기 (없거나 오래되면 None)"""
+    target = snapshot_path(file_path)
+    meta_file = os.path.join(target, 'meta.json')
+    if not os.path.exists(meta_file):
+        return None
+    
+    try:
+        with open(meta_file, encoding='utf-8') as f:
+            meta = json.load(f)
+        
+        # 수정시각/크기가 다르면 내용 해시로 한 번 더 확인
+        stat = os.stat(file_path)
+        if (stat.st_mtime, stat.st_size) != (meta['source_mtime'], meta['source_size']):
+            if file_content_hash(file_path) != meta['source_hash']:
+                return None
+            meta['source_mtime'], meta['source_size'] = stat.st_mtime, stat.st_size
+            try:
+                with open(meta_file, 'w', encoding='utf-8') as f:
+                    json.dump(meta, f, ensure_ascii=False)
+            except OSError:
+                pass
+        
+        data = {}
+        for idx, col in enumerate(meta['columns']):
+            values = np.asarray(np.load(os.path.join(target, f"{idx}.npy"), mmap_mode='r'))
+            if col['kind'] == 'category':
+                values = pd.Series(pd.Categorical.from_codes(values, col['categories'])).astype(col['dtype'])
+            data[col['name']] = values
+        
+        df = pd.DataFrame(data, copy=False)
+        if len(df) != meta['rows']:
+            return None
+        df.attrs['data_version'] = meta['source_hash']
+        return compact_admissions_frame(df)
+    except Exception as e:
+        return None
+
+def detect_encoding(file_path):
+    """CSV 앞부분으로 인코딩 감지 (chardet 이 없거나 실패하면 None)"""
+    try:
+        import chardet
+        with open(file_path, 'rb') as f:
+            raw_data = f.read(100000)
+            return chardet.detect(raw_data)['encoding']
+    except:
+        return None
+
+def read_admissions_csv(file_path, detected_encoding=None):
+    """여러 인코딩으로 CSV 파싱 - (DataFrame, 인코딩), 모두 실패하면 (None, None)"""
+    encodings = [detected_encoding, 'utf-8-sig', 'utf-8', 'cp949', 'euc-kr', 'latin1']
+    encodings = [e for e in encodings if e]
+    
+    for encoding in encodings:
+        try:
+            df = pd.read_csv(file_path, encoding=encoding)
+            
+            # 데이터 검증
+            if len(df.columns) == 13 and len(df) > 0:
+                # 컬럼명 설정
+                df.columns = ADMISSIONS_COLUMNS
+                
+                # 데이터 타입 변환 (category / int16 / float32)
+                df = compact_admissions_frame(df)
+                
+                df.attrs['data_version'] = file_content_hash(file_path)
+                return df, encoding
+                
+        except Exception as e:
+            continue
+    
+    return None, None
+
+def load_admissions_file(file_path=DATA_FILE, use_snapshot=True):
+    """입시 데이터 로드 (스냅샷 우선) - (DataFrame, 출처), 실패하면 (None, None)"""
+    if not os.path.exists(file_path):
+        return None, None
+    
+    if use_snapshot:
+        with stage('snapshot_load') as timer:
+            df = read_data_snapshot(file_path)
+            timer.rows = len(df) if df is not None else 0
+        if df is not None:
+            return df, 'snapshot'
+    
+    with stage('csv_load') as timer:
+        df, encoding = read_admissions_csv(file_path, detect_encoding(file_path))
+        timer.rows = len(df) if df is not None else 0
+    if df is not None and use_snapshot:
+        write_data_snapshot(df, file_path, df.attrs['data_version'])
+    return df, encoding
+
+def merge_admissions_frames(frames):
+    """년도별로 읽은 데이터를 하나로 합치기 (카테고리는 코드 단위로 합쳐 다시 정렬)
+
+    조각이 하나면 그대로 반환하고, 여러 개면 각 조각의 data_version 으로 새 버전을 만든다.
+    """
+    frames = [frame for frame in frames if frame is not None]
+    if not frames:
+        return None
+    if len(frames) == 1:
+        return frames[0]
+    
+    data = {}
+    for col in ADMISSIONS_COLUMNS:
+        if col in CATEGORY_COLUMNS:
+            data[col] = union_categoricals([frame[col] for frame in frames], sort_categories=True)
+        else:
+            data[col] = np.concatenate([frame[col].to_numpy() for frame in frames])
+    df = compact_admissions_frame(pd.DataFrame(data, copy=False))
+    versions = '|'.join(get_data_version(frame) for frame in frames)
+    df.attrs['data_version'] = hashlib.sha256(versions.encode('utf-8')).hexdigest()
+    return df
+
+def read_upload_bytes(excel_file):
+    """업로드 파일(또는 경로)의 내용을 bytes 로 읽기"""
+    if isinstance(excel_file, (bytes, bytearray)):
+        return bytes(excel_file)
+    if hasattr(excel_file, 'getvalue'):
+        return excel_file.getvalue()
+    if hasattr(excel_file, 'read'):
+        excel_file.seek(0)
+        return excel_file.read()
+    with open(excel_file, 'rb') as f:
+        return f.read()
+
+@timed('workbook_parse')
+def extract_student_workbook(file_bytes):
+    """평가표에서 필요한 셀(Index!F4:L5, 성적분석!X13)만 읽기 - 읽기 전용 모드로 한 번만 연다"""
+    wb = load_workbook(BytesIO(file_bytes), read_only=True, data_only=True)
+    try:
+        result = {'sheetnames': wb.sheetnames, 'index': None, 'avg_grade': None}
+        
+        if 'Index' in wb.sheetnames:
+            # F4:L5 → {'F4': 값, ...}
+            cells = {}
+            rows = wb['Index'].iter_rows(min_row=4, max_row=5, min_col=6, max_col=12, values_only=True)
+            for row_idx, row in enumerate(rows, start=4):
+                for col_idx, value in enumerate(row, start=6):
+                    cells[f"{chr(ord('A') + col_idx - 1)}{row_idx}"] = value
+            result['index'] = cells
+        
+        if '성적분석' in wb.sheetnames:
+            rows = wb['성적분석'].iter_rows(min_row=13, max_row=13, min_col=24, max_col=24, values_only=True)
+            for row in rows:
+                result['avg_grade'] = row[0] if row else None
+        
+        return result
+    finally:
+        wb.close()
+
+def parse_student_info(workbook):
+    """추출된 Index 셀에서 학생 정보(이름, 학교, 학년) 구성 - Index 시트가 없으면 None"""
+    cells = workbook['index']
+    if cells is None:
+        return None
+    
+    # 학교명: F4, F5
+    school_name = cells.get('F4') or cells.get('F5')
+    
+    # 학년: I4, I5
+    grade = cells.get('I4') or cells.get('I5')
+    
+    # 이름: K4, K5, L4, L5
+    student_name = (cells.get('K4') or cells.get('K5') or 
+                  cells.get('L4') or cells.get('L5'))
+    
+    # 학년 처리
+    if grade:
+        grade_str = str(grade).strip()
+        numbers = re.findall(r'\d+', grade_str)
+        if numbers:
+            grade = f"{numbers[0]}학년"
+        elif '학년' in grade_str:
+            grade = grade_str
+        else:
+            grade = f"{grade_str}학년"
+    else:
+        grade = "2학년"
+    
+    return {
+        'name': str(student_name).strip() if student_name else '',
+        'school': str(school_name).strip() if school_name else '',
+        'grade': grade
+    }
+
+def parse_student_grade(workbook):
+    """추출된 성적분석!X13 값 - 숫자가 아니면 None"""
+    avg_grade = workbook['avg_grade']
+    if avg_grade and isinstance(avg_grade, (int, float)):
+        return float(avg_grade)
+    return None
+
+@timed('keywords', rows=lambda df: len(df) if df is not None else 0)
+def get_major_keywords(df):
+    """학과명에서 핵심 단어 추출"""
+    if df is None or 'major_name' not in df.columns:
+        return []
+    
+    all_majors = df['major_name'].dropna().unique()
+    
+    # 키워드 빈도 계산
+    keyword_freq = {}
+    
+    # 제외할 단어들
+    exclude_words = {
+        '학과', '과', '전공', '부', '학부', '계열', '및', '와', '의', 
+        '(', ')', '・', ',', '-', '/', ' ', '전공학'
+    }
+    
+    for major in all_majors:
+        major = str(major)
+        
+        # 괄호 안 내용 제거
+        major = re.sub(r'\([^)]*\)', '', major)
+        
+        # 여러 구분자로 단어 분리
+        words = re.split(r'[(\s)・,/-]+', major)
+        
+        for word in words:
+            word = word.strip()
+            
+            # 2글자 이상, 제외 단어 아님
+            if len(word) >= 2 and word not in exclude_words:
+                keyword_freq[word] = keyword_freq.get(word, 0) + 1
+    
+    # 빈도수 순으로 정렬
+    popular_keywords = [
+        k for k, v in sorted(keyword_freq.items(), key=lambda x: x[1], reverse=True) 
+        if len(k) >= 2
+    ]
+    
+    return popular_keywords[:300]
+
+def flexible_search(text, keyword):
+    """유연한 검색"""
+    if pd.isna(text) or not keyword:
+        return False
+    
+    text = str(text).lower()
+    keyword = str(keyword).lower()
+    
+    # 공백으로 구분된 여러 키워드
+    keywords = keyword.split()
+    
+    if not keywords:
+        return False
+    
+    # 각 키워드에 대해 검사
+    for kw in keywords:
+        kw = kw.strip()
+        if not kw:
+            continue
+            
+        # 공백 제거하여 검색
+        text_no_space = text.replace(' ', '').replace('・', '')
+        kw_no_space = kw.replace(' ', '').replace('・', '')
+        
+        # 키워드가 텍스트에 포함되어 있으면 True
+        if kw in text or kw_no_space in text_no_space:
+            return True
+    
+    return False
+
+def normalize_major_text(text):
+    """검색용 정규화 (소문자, 공백과 '・' 제거)"""
+    return str(text).lower().replace(' ', '').replace('・', '')
+
+def _major_grams(text):
+    """정규화된 문자열의 2-gram 집합"""
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+# 한글 자모 (오타 검색용 분해)
+_CHOSEONG = 'ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ'
+_JUNGSEONG = 'ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ'
+_JONGSEONG = ['', 'ㄱ', 'ㄲ', 'ㄳ', 'ㄴ', 'ㄵ', 'ㄶ', 'ㄷ', 'ㄹ', 'ㄺ', 'ㄻ', 'ㄼ', 'ㄽ', 'ㄾ', 'ㄿ', 'ㅀ',
+              'ㅁ', 'ㅂ', 'ㅄ', 'ㅅ', 'ㅆ', 'ㅇ', 'ㅈ', 'ㅊ', 'ㅋ', 'ㅌ', 'ㅍ', 'ㅎ']
+
+def decompose_jamo(text):
+    """한글 음절을 초성/중성/종성 자모로 분해 ('계' → 'ㄱㅖ', 한글이 아니면 그대로)
+
+    '컴퓨타'/'컴퓨터', '기게'/'기계' 처럼 모음 하나만 틀린 오타가 거리 1이 된다.
+    """
+    chars = []
+    for ch in text:
+        code = ord(ch) - 0xAC00
+        if 0 <= code < 11172:
+            chars.append(_CHOSEONG[code // 588])
+            chars.append(_JUNGSEONG[code // 28 % 21])
+            chars.append(_JONGSEONG[code % 28])
+        else:
+            chars.append(ch)
+    return ''.join(chars)
+
+def _jamo_grams(text):
+    """자모 문자열의 3-gram 집합"""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def _postings_from_lists(postings):
+    return {gram: np.array(ids, dtype=np.int64) for gram, ids in postings.items()}
+
+def build_major_index(df):
+    """학과명 검색 인덱스 생성 (고유 학과명 기준 2-gram 역색인 + 오타 검색용 자모 3-gram 역색인)"""
+    codes, majors = pd.factorize(df['major_name'])
+    normalized = [normalize_major_text(m) for m in majors]
+    
+    postings = {}
+    for major_id, text in enumerate(normalized):
+        # 2-gram + 1글자 키워드 검색용 단일 문자
+        for gram in _major_grams(text) | set(text):
+            postings.setdefault(gram, []).append(major_id)
+    postings = _postings_from_lists(postings)
+    
+    jamo = [decompose_jamo(text) for text in normalized]
+    jamo_postings = {}
+    for major_id, text in enumerate(jamo):
+        for gram in _jamo_grams(text):
+            jamo_postings.setdefault(gram, []).append(major_id)
+    jamo_postings = _postings_from_lists(jamo_postings)
+    
+    # 학과 ID → 행 번호 목록
+    valid_rows = np.flatnonzero(codes >= 0)
+    row_order = valid_rows[np.argsort(codes[valid_rows], kind='stable')]
+    row_counts = np.bincount(codes[valid_rows], minlength=len(majors))
+    row_starts = np.concatenate(([0], np.cumsum(row_counts)))
+    
+    return {
+        'majors': np.asarray(majors, dtype=object),
+        'normalized': normalized,
+        'postings': postings,
+        'jamo': jamo,
+        'jamo_postings': jamo_postings,
+        'row_order': row_order,
+        'row_starts': row_starts,
+        # 키워드별 검색 결과 캐시 (세션 간 공유, LRU)
+        'match_cache': OrderedDict(),
+        'match_lock': threading.Lock(),
+    }
+
+def search_major_ids(index, keyword):
+    """키워드와 일치하는 학과 ID 배열 (flexible_search 와 동일한 OR 검색)"""
+    if not keyword or pd.isna(keyword):
+        return np.array([], dtype=np.int64)
+    
+    n_majors = len(index['normalized'])
+    matched = set()
+    for kw in str(keyword).lower().split():
+        kw_no_space = normalize_major_text(kw)
+        if not kw_no_space:
+            # '・' 만으로 된 키워드는 모든 학과와 일치
+            return np.arange(n_majors)
+        
+        if len(kw_no_space) < 2:
+            grams = [index['postings'].get(kw_no_space)]
+        else:
+            grams = [index['postings'].get(gram) for gram in _major_grams(kw_no_space)]
+        if any(ids is None for ids in grams):
+            continue
+        
+        # 가장 짧은 posting 부터 교집합 후 실제 포함 여부 확인
+        grams.sort(key=len)
+        candidates = grams[0]
+        for ids in grams[1:]:
+            candidates = np.intersect1d(candidates, ids, assume_unique=True)
+        matched.update(i for i in candidates.tolist() if kw_no_space in index['normalized'][i])
+    
+    return np.array(sorted(matched), dtype=np.int64)
+
+def approximate_substring_distance(pattern, text):
+    """text 의 부분 문자열 중 pattern 과 가장 가까운 편집 거리 (Myers 비트 병렬, text 길이에 비례)"""
+    m = len(pattern)
+    if m == 0:
+        return 0
+    peq = {}
+    for i, ch in enumerate(pattern):
+        peq[ch] = peq.get(ch, 0) | (1 << i)
+    mask = (1 << m) - 1
+    last = 1 << (m - 1)
+    
+    pv, mv, score = mask, 0, m
+    best = m
+    for ch in text:
+        eq = peq.get(ch, 0)
+        xv = eq | mv
+        xh = ((((eq & pv) + pv) & mask) ^ pv) | eq
+        ph = (mv | ~(xh | pv)) & mask
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        # 부분 문자열 검색이라 시작 위치는 어디든 비용 0 (맨 아래 비트에 1 을 넣지 않음)
+        ph = (ph << 1) & mask
+        mh = (mh << 1) & mask
+        pv = (mh | ~(xv | ph)) & mask
+        mv = ph & xv
+        if score < best:
+            best = score
+    return best
+
+# 오타 검색: 검증할 최대 후보 학과 수 / 반환할 최대 학과 수 / 최대 허용 거리
+FUZZY_MAX_CANDIDATES = 300
+FUZZY_LIMIT = 20
+FUZZY_MAX_DISTANCE = 3
+
+def fuzzy_distance_limit(jamo_length):
+    """키워드 자모 길이별 허용 거리 (자모 4개당 1, 1~FUZZY_MAX_DISTANCE)"""
+    return min(FUZZY_MAX_DISTANCE, max(1, jamo_length // 4))
+
+@timed('fuzzy_search')
+def fuzzy_major_matches(index, keyword, max_distance=None, limit=FUZZY_LIMIT):
+    """오타 허용 학과 검색 - [(학과 ID, 거리)] 가까운 순 (키워드가 그대로 들어있는 학과는 거리 0)
+
+    키워드를 자모로 분해해서 3-gram 이 충분히 겹치는 학과만 후보로 두고(최대 FUZZY_MAX_CANDIDATES개),
+    후보 학과명 안의 가장 가까운 부분과의 자모 편집 거리를 계산한다.
+    여러 단어면 단어별 거리 중 가장 작은 값.
+    """
+    if not keyword or pd.isna(keyword):
+        return []
+    
+    n_majors = len(index['normalized'])
+    best = {}
+    for kw in str(keyword).lower().split():
+        pattern = decompose_jamo(normalize_major_text(kw))
+        grams = _jamo_grams(pattern)
+        if len(pattern) < 4 or not grams:
+            # 한 글자 키워드는 너무 많은 학과와 비슷해서 제외
+            continue
+        limit_distance = max_distance if max_distance is not None else fuzzy_distance_limit(len(pattern))
+        
+        postings = [index['jamo_postings'][gram] for gram in grams if gram in index['jamo_postings']]
+        if not postings:
+            continue
+        # 편집 1번은 3-gram 을 최대 3개 바꾸므로 그보다 적게 겹치면 거리 초과
+        hits = np.bincount(np.concatenate(postings), minlength=n_majors)
+        candidates = np.flatnonzero(hits >= max(1, len(grams) - 3 * limit_distance))
+        if len(candidates) > FUZZY_MAX_CANDIDATES:
+            top = np.argpartition(-hits[candidates], FUZZY_MAX_CANDIDATES)[:FUZZY_MAX_CANDIDATES]
+            candidates = candidates[top]
+        
+        for major_id in candidates.tolist():
+            distance = approximate_substring_distance(pattern, index['jamo'][major_id])
+            if distance <= limit_distance and distance < best.get(major_id, limit_distance + 1):
+                best[major_id] = distance
+    
+    # 거리 → 짧은 학과명(키워드와 더 비슷한 이름) → 학과명 순
+    ranked = sorted(best.items(), key=lambda item: (item[1], len(index['normalized'][item[0]]), index['normalized'][item[0]]))
+    return ranked[:limit]
+
+def major_ids_rows(index, major_ids):
+    """학과 ID 들의 데이터 행 번호 (원래 순서)"""
+    if len(major_ids) == 0:
+        return np.array([], dtype=np.int64)
+    starts = index['row_starts']
+    rows = np.concatenate([index['row_order'][starts[i]:starts[i + 1]] for i in major_ids])
+    rows.sort()
+    return rows
+
+def search_major_rows(index, keyword):
+    """키워드와 일치하는 데이터 행 번호 (원래 순서)"""
+    return major_ids_rows(index, search_major_ids(index, keyword))
+
+# 키워드 검색 결과 캐시 최대 개수
+MATCH_CACHE_SIZE = 256
+
+def normalize_keyword_key(keyword):
+    """검색 결과 캐시 키 (정규화된 키워드 집합)"""
+    if not keyword or pd.isna(keyword):
+        return ()
+    return tuple(sorted({normalize_major_text(kw) for kw in str(keyword).lower().split()}))
+
+def match_major_rows(df, index, keyword):
+    """키워드 일치 행 번호와 대학/학과 수 (LRU 캐시 사용)"""
+    key = normalize_keyword_key(keyword)
+    cache = index['match_cache']
+    
+    with index['match_lock']:
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+    
+    rows = search_major_rows(index, keyword)
+    rows.flags.writeable = False
+    matching = df.iloc[rows]
+    num_programs = matching.groupby(['university_name', 'major_name'], observed=True).ngroups if len(rows) else 0
+    
+    with index['match_lock']:
+        cache[key] = (rows, num_programs)
+        cache.move_to_end(key)
+        while len(cache) > MATCH_CACHE_SIZE:
+            cache.popitem(last=False)
+    
+    return rows, num_programs
+
+def fuzzy_major_rows(df, index, keyword):
+    """오타 허용 검색 - (행 번호, 대학/학과 수, 사용한 학과 [(학과명, 거리)])
+
+    가장 가까운 거리의 학과들만 후보로 쓰고, 결과는 일반 검색과 같은 LRU 캐시에 저장한다.
+    """
+    key = ('~',) + normalize_keyword_key(keyword)
+    cache = index['match_cache']
+    with index['match_lock']:
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+    
+    matches = fuzzy_major_matches(index, keyword)
+    nearest = [(major_id, distance) for major_id, distance in matches if distance == matches[0][1]]
+    rows = major_ids_rows(index, [major_id for major_id, _ in nearest])
+    rows.flags.writeable = False
+    num_programs = df.iloc[rows].groupby(['university_name', 'major_name'], observed=True).ngroups if len(rows) else 0
+    result = (rows, num_programs, [(str(index['majors'][major_id]), distance) for major_id, distance in nearest])
+    
+    with index['match_lock']:
+        cache[key] = result
+        cache.move_to_end(key)
+        while len(cache) > MATCH_CACHE_SIZE:
+            cache.popitem(last=False)
+    return result
+
+# 관련 학과 확장: 동시 출현 유사도(Jaccard) 기준 / 이보다 많은 비율의 학과명에 나오는 키워드는 너무 일반적이라 제외
+SYNONYM_MIN_SIMILARITY = 0.5
+SYNONYM_MAX_SHARE = 0.2
+
+def load_major_synonyms(file_path=SYNONYM_FILE):
+    """JSON/TOML 관련 학과 키워드 파일 읽기 → [[키워드, ...], ...]
+
+    [groups] 아래에 "묶음 이름" = ["컴퓨터", "소프트웨어", ...] 형식 (파일이 없으면 빈 목록)
+    """
+    if not file_path or not os.path.exists(file_path):
+        return []
+    groups = read_config_file(file_path).get('groups', {})
+    if not isinstance(groups, dict):
+        raise ValueError(f"[groups] 는 이름 = [키워드 목록] 형식이어야 합니다: {file_path}")
+    result = []
+    for name, terms in groups.items():
+        if not isinstance(terms, list) or not all(isinstance(term, str) for term in terms):
+            raise ValueError(f"'{name}' 의 키워드는 문자열 목록이어야 합니다.")
+        result.append(terms)
+    return result
+
+def _csr_from_pairs(rows, cols, n_rows):
+    """(행, 열) 쌍 → (indptr, indices) 행별 열 번호 목록 (행 안에서는 열 번호 순)"""
+    order = np.lexsort((cols, rows))
+    indptr = np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=n_rows))))
+    return indptr.astype(np.int64), np.asarray(cols)[order].astype(np.int64)
+
+def build_synonym_graph(index, keywords, groups=(), min_similarity=SYNONYM_MIN_SIMILARITY,
+                        max_share=SYNONYM_MAX_SHARE):
+    """관련 학과 확장 그래프 - 키워드 → 관련 학과 ID 희소 행렬 (CSR)
+
+    키워드(get_major_keywords 결과 + 관련 학과 파일의 키워드)마다 일치하는 학과를 구하고,
+    같은 학과명에 함께 나오는 정도(Jaccard)가 min_similarity 이상이거나 같은 묶음이면 관련 키워드로 본다.
+    관련 키워드들의 학과 합집합을 미리 계산해 두므로 검색은 행 하나를 읽는 것으로 끝난다.
+    키워드 × 학과 행렬은 만들지 않고 (키워드, 학과) 쌍 표의 groupby 로 동시 출현을 센다.
+    학과 ID 는 index 기준이다 (같은 데이터로 만든 인덱스면 공유 메모리 인덱스도 같음).
+    """
+    terms = {}
+    for term in list(keywords) + [term for group in groups for term in group]:
+        key = normalize_major_text(term)
+        if key:
+            terms.setdefault(key, str(term))
+    names = list(terms)
+    term_ids = {name: i for i, name in enumerate(names)}
+    n_terms = len(names)
+    
+    # (키워드, 학과) 쌍
+    matches = [search_major_ids(index, name) for name in names]
+    pairs = pd.DataFrame({
+        'term': np.repeat(np.arange(n_terms, dtype=np.int64), [len(ids) for ids in matches]),
+        'major': np.concatenate(matches + [np.array([], dtype=np.int64)]).astype(np.int64),
+    })
+    counts = np.bincount(pairs['term'].to_numpy(), minlength=n_terms)
+    
+    # 동시 출현: 두 키워드가 함께 나오는 학과명 수 / 둘 중 하나라도 나오는 학과명 수
+    # (너무 일반적인 키워드는 관련 키워드가 될 수 없으므로 쌍을 만들기 전에 제외)
+    specific = (counts > 0) & (counts <= max_share * len(index['normalized']))
+    candidates = pairs[specific[pairs['term'].to_numpy()]]
+    overlap = (candidates.merge(candidates, on='major', suffixes=('_a', '_b'))
+               .groupby(['term_a', 'term_b']).size().reset_index(name='overlap'))
+    term_a = overlap['term_a'].to_numpy()
+    term_b = overlap['term_b'].to_numpy()
+    shared = overlap['overlap'].to_numpy()
+    similarity = shared / (counts[term_a] + counts[term_b] - shared)
+    related = [pd.DataFrame({'a': term_a[similarity >= min_similarity], 'b': term_b[similarity >= min_similarity]})]
+    
+    # 관련 학과 파일의 묶음은 서로 모두 관련, 자기 자신도 관련
+    for group in groups:
+        ids = np.array(sorted({term_ids[key] for key in map(normalize_major_text, group) if key}), dtype=np.int64)
+        related.append(pd.DataFrame({'a': np.repeat(ids, len(ids)), 'b': np.tile(ids, len(ids))}))
+    related.append(pd.DataFrame({'a': np.arange(n_terms, dtype=np.int64), 'b': np.arange(n_terms, dtype=np.int64)}))
+    related = pd.concat(related, ignore_index=True).drop_duplicates()
+    
+    # 안내용 관련 키워드는 실제로 일치하는 학과가 있는 것만
+    shown = related[counts[related['b'].to_numpy()] > 0]
+    related_indptr, related_indices = _csr_from_pairs(shown['a'].to_numpy(), shown['b'].to_numpy(), n_terms)
+    expanded = (related.merge(pairs, left_on='b', right_on='term')[['a', 'major']]
+                .drop_duplicates())
+    indptr, indices = _csr_from_pairs(expanded['a'].to_numpy(), expanded['major'].to_numpy(), n_terms)
+    return {
+        'terms': names,
+        'labels': [terms[name] for name in names],
+        'term_ids': term_ids,
+        'related_indptr': related_indptr,
+        'related_indices': related_indices,
+        'indptr': indptr,
+        'indices': indices,
+        # 키워드별 확장 검색 결과 캐시 (LRU)
+        'match_cache': OrderedDict(),
+        'match_lock': threading.Lock(),
+    }
+
+def expand_major_ids(graph, index, keyword):
+    """관련 학과까지 확장한 학과 ID 배열과 확장에 쓴 관련 키워드 목록
+
+    단어가 그래프의 키워드와 같으면 미리 계산한 행을 쓰고, 아니면 일반 검색 (여러 단어는 OR).
+    """
+    if not keyword or pd.isna(keyword):
+        return np.array([], dtype=np.int64), []
+    
+    major_ids = []
+    expanded = []
+    for kw in str(keyword).lower().split():
+        term_id = graph['term_ids'].get(normalize_major_text(kw))
+        if term_id is None:
+            major_ids.append(search_major_ids(index, kw))
+            continue
+        major_ids.append(graph['indices'][graph['indptr'][term_id]:graph['indptr'][term_id + 1]])
+        related = graph['related_indices'][graph['related_indptr'][term_id]:graph['related_indptr'][term_id + 1]]
+        expanded.extend(graph['labels'][i] for i in related.tolist() if i != term_id)
+    if not major_ids:
+        return np.array([], dtype=np.int64), []
+    return np.unique(np.concatenate(major_ids)), list(dict.fromkeys(expanded))
+
+def synonym_major_rows(df, index, graph, keyword):
+    """관련 학과 확장 검색 - (행 번호, 대학/학과 수, 확장에 쓴 관련 키워드)"""
+    key = normalize_keyword_key(keyword)
+    cache = graph['match_cache']
+    with graph['match_lock']:
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+    
+    major_ids, expanded = expand_major_ids(graph, index, keyword)
+    rows = major_ids_rows(index, major_ids)
+    rows.flags.writeable = False
+    num_programs = df.iloc[rows].groupby(['university_name', 'major_name'], observed=True).ngroups if len(rows) else 0
+    result = (rows, num_programs, expanded)
+    
+    with graph['match_lock']:
+        cache[key] = result
+        cache.move_to_end(key)
+        while len(cache) > MATCH_CACHE_SIZE:
+            cache.popitem(last=False)
+    return result
+
+def direct_major_names(df, index, keyword):
+    """관련 학과 확장 없이 키워드와 직접 일치하는 학과명 집합"""
+    return set(df['major_name'].iloc[match_major_rows(df, index, keyword)[0]].unique().tolist())
+
+def mark_synonym_matches(recommendations, direct_majors):
+    """추천마다 관련 학과 확장으로만 찾은 학과인지 표시 (via_synonym)"""
+    for rec in recommendations:
+        rec['via_synonym'] = rec['major'] not in direct_majors
+    return recommendations
+
+def categorize_university(student_grade, cut_grade):
+    """대학을 구분별로 분류"""
+    # 학생 등급 - 합격선 등급
+    diff = student_grade - cut_grade
+    
+    if diff >= 1.5:
+        return '강상향'
+    elif diff >= 0.8:
+        return '상향'
+    elif diff >= 0.3:
+        return '약상향'
+    elif diff >= -0.3:
+        return '적정'
+    elif diff >= -0.8:
+        return '강적정'
+    elif diff >= -1.5:
+        return '안정'
+    else:
+        return '강안정'
+
+def get_category_color(category):
+    """구분별 색상"""
+    colors = {
+        '강상향': '#ef4444',
+        '상향': '#f97316',
+        '약상향': '#eab308',
+        '적정': '#22c55e',
+        '강적정': '#10b981',
+        '안정': '#3b82f6',
+        '강안정': '#6366f1',
+        '정보없음': '#9ca3af'
+    }
+    return colors.get(category, '#6b7280')
+
+# 대학-학과-전형 그룹 기준 컬럼 (통계표에서는 university, major 로 이름이 바뀜)
+GROUP_COLUMNS = ['university_name', 'major_name', 'admission_type', 'admission_name']
+SUMMARY_KEY_COLUMNS = ['university', 'major', 'admission_type', 'admission_name']
+
+# 컷 선택 우선순위 (70% → 50% → 85% → 90%)
+CUT_COLUMNS = ['cut_grade_70', 'cut_grade_50', 'cut_grade_85', 'cut_grade_90']
+
+# 년도별 가중치 설정 (year 컬럼은 숫자이므로 키도 정수)
+# 기본 년도 가중치: 최신 년도로부터 몇 년 전인지 → 가중치
+# (새 년도 데이터가 추가되면 그 년도가 1.0 이 됨)
+YEAR_WEIGHTS = {
+    0: 1.0,
+    1: 0.8,
+    2: 0.6,
+    3: 0.4,
+    4: 0.3
+}
+
+# 가중치 표에 없는 년도 / 년도 정보가 없는 행
+DEFAULT_YEAR_WEIGHT = 0.5
+
+# 년도 가중치 방식
+#   table       : {년도: 가중치} 표 (생략하면 최신 년도 기준 YEAR_WEIGHTS)
+#   linear      : 최신 년도 1.0 에서 1년마다 step 씩 감소 (최소 min_weight)
+#   exponential : 최신 년도 1.0, half_life 년마다 절반
+YEAR_WEIGHTING_SCHEMES = ('table', 'linear', 'exponential')
+
+def compute_year_weights(years, scheme='table', table=None, step=0.2, min_weight=0.1, half_life=2.0,
+                         latest_year=None, default=DEFAULT_YEAR_WEIGHT):
+    """year 배열과 같은 길이의 가중치 배열 (행 단위 반복 없이 한 번에 계산)
+
+    latest_year 를 생략하면 주어진 년도 중 최댓값을 기준으로 한다.
+    table 을 주면 그 년도에 고정되고, 생략하면 최신 년도로부터의 차이로 YEAR_WEIGHTS 를 적용한다.
+    """
+    years = pd.to_numeric(pd.Series(np.asarray(years)), errors='coerce').to_numpy(dtype=float)
+    known = ~np.isnan(years)
+    weights = np.full(len(years), float(default))
+    
+    if scheme == 'table':
+        if table is None:
+            if not known.any():
+                return weights
+            if latest_year is None:
+                latest_year = years[known].max()
+            table = {latest_year - offset: weight for offset, weight in YEAR_WEIGHTS.items()}
+        # 설정 파일에서 읽은 '2025' 같은 문자열 키도 허용
+        keys = np.array([float(year) for year in table], dtype=float)
+        values = np.array(list(table.values()), dtype=float)
+        if len(keys) == 0:
+            return weights
+        sort = np.argsort(keys)
+        keys, values = keys[sort], values[sort]
+        pos = np.clip(np.searchsorted(keys, years), 0, len(keys) - 1)
+        matched = known & (keys[pos] == years)
+        weights[matched] = values[pos[matched]]
+        return weights
+    
+    if scheme not in YEAR_WEIGHTING_SCHEMES:
+        raise ValueError(f"알 수 없는 년도 가중치 방식: {scheme}")
+    if not known.any():
+        return weights
+    if latest_year is None:
+        latest_year = years[known].max()
+    age = np.maximum(latest_year - years[known], 0)
+    if scheme == 'linear':
+        weights[known] = np.maximum(1.0 - step * age, min_weight)
+    else:
+        weights[known] = 0.5 ** (age / half_life)
+    return weights
+
+# 구분 (categorize_university 와 동일한 경계값, 위에서부터 순서대로 검사)
+CATEGORY_THRESHOLDS = [
+    ('강상향', 1.5),
+    ('상향', 0.8),
+    ('약상향', 0.3),
+    ('적정', -0.3),
+    ('강적정', -0.8),
+    ('안정', -1.5),
+]
+
+# 어느 경계값에도 해당하지 않는 구분 / 컷 정보가 없는 구분
+LOWEST_CATEGORY = '강안정'
+NO_CUT_CATEGORY = '정보없음'
+
+# 구분별 목표 개수 (위에서부터 순서대로 선택, 합계 30개)
+CATEGORY_TARGETS = {
+    '강상향': 3,
+    '상향': 5,
+    '약상향': 5,
+    '적정': 7,
+    '강적정': 5,
+    '안정': 3,
+    '강안정': 2
+}
+
+class RecommendationPolicy:
+    """추천 기준 (구분 경계값, 구분별 목표 개수, 년도 가중치, 컷 선택 순서)
+
+    생성할 때 경계값을 오름차순 bin 경계(edges)와 구분 이름 배열(labels)로
+    한 번 변환해 두므로, 구분 계산은 searchsorted 한 번이다.
+    """
+
+    def __init__(self, name='기본', thresholds=None, lowest_category=LOWEST_CATEGORY, targets=None,
+                 year_weighting=None, cut_columns=None):
+        thresholds = dict(CATEGORY_THRESHOLDS) if thresholds is None else dict(thresholds)
+        targets = dict(CATEGORY_TARGETS) if targets is None else dict(targets)
+        year_weighting = {'scheme': 'table'} if year_weighting is None else dict(year_weighting)
+        cut_columns = list(CUT_COLUMNS) if cut_columns is None else list(cut_columns)
+        
+        values = [float(value) for value in thresholds.values()]
+        if len(set(values)) != len(values):
+            raise ValueError(f"[{name}] 구분 경계값이 중복되었습니다: {thresholds}")
+        if lowest_category in thresholds or lowest_category == NO_CUT_CATEGORY:
+            raise ValueError(f"[{name}] 최하위 구분 이름이 올바르지 않습니다: {lowest_category}")
+        unknown = [column for column in cut_columns if column not in CUT_COLUMNS]
+        if not cut_columns or unknown:
+            raise ValueError(f"[{name}] 알 수 없는 컷 컬럼: {unknown or cut_columns}")
+        if year_weighting.get('scheme', 'table') not in YEAR_WEIGHTING_SCHEMES:
+            raise ValueError(f"[{name}] 알 수 없는 년도 가중치 방식: {year_weighting.get('scheme')}")
+        categories = set(thresholds) | {lowest_category}
+        for category, count in targets.items():
+            if category not in categories:
+                raise ValueError(f"[{name}] 목표 개수의 구분이 경계값에 없습니다: {category}")
+            if int(count) < 0:
+                raise ValueError(f"[{name}] 목표 개수는 0 이상이어야 합니다: {category}={count}")
+        
+        self.name = name
+        self.thresholds = dict(sorted(thresholds.items(), key=lambda item: -float(item[1])))
+        self.lowest_category = lowest_category
+        self.targets = {category: int(count) for category, count in targets.items()}
+        self.year_weighting = year_weighting
+        self.cut_columns = cut_columns
+        
+        # 오름차순 경계 / 구분 이름: labels[searchsorted(edges, diff, 'right')]
+        self.edges = np.array(sorted(values), dtype=float)
+        self.labels = np.array([lowest_category] + list(reversed(list(self.thresholds))))
+        # 높은 구분부터 (화면 표시 순서)
+        self.categories = list(self.thresholds) + [lowest_category]
+
+    @classmethod
+    def from_dict(cls, config, name=None):
+        """설정 dict → 정책 (thresholds 는 {구분: 최소 차이}, targets 는 {구분: 개수})"""
+        config = dict(config)
+        unknown = set(config) - {'name', 'thresholds', 'lowest_category', 'targets', 'year_weighting', 'cut_columns'}
+        if unknown:
+            raise ValueError(f"알 수 없는 정책 설정: {', '.join(sorted(unknown))}")
+        return cls(
+            name=config.get('name', name or '기본'),
+            thresholds=config.get('thresholds'),
+            lowest_category=config.get('lowest_category', LOWEST_CATEGORY),
+            targets=config.get('targets'),
+            year_weighting=config.get('year_weighting'),
+            cut_columns=config.get('cut_columns'),
+        )
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'thresholds': dict(self.thresholds),
+            'lowest_category': self.lowest_category,
+            'targets': dict(self.targets),
+            'year_weighting': dict(self.year_weighting),
+            'cut_columns': list(self.cut_columns),
+        }
+
+    @property
+    def fingerprint(self):
+        """정책 내용 해시 (캐시 키)"""
+        return hashlib.sha256(json.dumps(self.to_dict(), sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    @property
+    def aggregate_fingerprint(self):
+        """집계(통계표)에 영향을 주는 설정만의 해시 - 년도 가중치, 컷 순서"""
+        key = {'year_weighting': self.year_weighting, 'cut_columns': self.cut_columns}
+        return hashlib.sha256(json.dumps(key, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def categorize(self, diff):
+        """학생 등급 - 합격선 차이 배열 → 구분 이름 배열 (차이가 NaN 이면 정보없음)"""
+        diff = np.asarray(diff, dtype=float)
+        codes = np.searchsorted(self.edges, diff, side='right')
+        return np.where(np.isnan(diff), NO_CUT_CATEGORY, self.labels[np.where(np.isnan(diff), 0, codes)])
+
+    def __repr__(self):
+        return f"RecommendationPolicy({self.name!r})"
+
+DEFAULT_POLICY = RecommendationPolicy()
+
+def read_config_file(file_path):
+    """JSON/TOML 설정 파일 읽기 (확장자로 구분)"""
+    with open(file_path, 'rb') as f:
+        raw = f.read()
+    if file_path.lower().endswith('.toml'):
+        try:
+            import tomllib
+        except ImportError:
+            import tomli as tomllib
+        return tomllib.loads(raw.decode('utf-8'))
+    return json.loads(raw.decode('utf-8'))
+
+def load_policies(file_path):
+    """JSON/TOML 정책 파일 읽기 → {이름: 정책}
+
+    [policies.교과], [policies.종합] 처럼 여러 정책을 두거나,
+    최상위에 정책 하나만 둘 수 있다.
+    """
+    config = read_config_file(file_path)
+    
+    if 'policies' in config:
+        entries = config['policies'].items()
+    else:
+        entries = [(config.get('name') or os.path.splitext(os.path.basename(file_path))[0], config)]
+    policies = {}
+    for name, entry in entries:
+        policy = RecommendationPolicy.from_dict(entry, name=name)
+        policies[policy.name] = policy
+    if not policies:
+        raise ValueError(f"정책이 없습니다: {file_path}")
+    return policies
+
+def categorize_grades(student_grade, cut_grades, policy=None):
+    """categorize_university 의 벡터 버전 (정책의 bin 경계로 searchsorted)"""
+    diff = student_grade - np.asarray(cut_grades, dtype=float)
+    return (policy or DEFAULT_POLICY).categorize(diff)
+
+def categorize_policies(policies, student_grade, cut_grades):
+    """여러 정책의 구분을 한 번에 계산 → (정책 수, 프로그램 수) 구분 행렬
+
+    정책마다 경계 수가 달라도 +inf 로 채워 하나의 비교로 처리한다.
+    합격선이 없으면(NaN 또는 0 이하) grade_categories 와 같이 정보없음.
+    """
+    policies = list(policies)
+    cut = np.asarray(cut_grades, dtype=float)
+    has_cut = cut > 0
+    diff = student_grade - cut
+    width = max(len(policy.edges) for policy in policies)
+    edges = np.full((len(policies), width), np.inf)
+    labels = np.full((len(policies), width + 1), '', dtype=object)
+    for i, policy in enumerate(policies):
+        edges[i, :len(policy.edges)] = policy.edges
+        labels[i, :len(policy.labels)] = policy.labels
+    codes = (diff[None, :, None] >= edges[:, None, :]).sum(axis=2)
+    codes[:, ~has_cut] = 0
+    categories = np.take_along_axis(labels, codes, axis=1).astype(str)
+    return np.where(has_cut[None, :], categories, NO_CUT_CATEGORY)
+
+def policy_category_counts(policies, student_grade, cut_grades):
+    """같은 합격선에 대한 정책별 구분 개수표 (행: 정책 이름, 열: 구분 - 높은 구분부터, 정보없음은 마지막)"""
+    policies = list(policies)
+    matrix = categorize_policies(policies, student_grade, cut_grades)
+    order = list(dict.fromkeys(category for policy in policies for category in policy.categories))
+    order.append(NO_CUT_CATEGORY)
+    counts = pd.DataFrame({category: (matrix == category).sum(axis=1) for category in order},
+                          index=[policy.name for policy in policies])
+    counts.index.name = '추천 기준'
+    return counts
+
+@timed('aggregate', rows=lambda filtered, *args, **kwargs: len(filtered))
+def aggregate_programs(filtered, year_weighting=None, stability_ddof=0, trend=False, policy=None, latest_year=None):
+    """대학-학과-전형별 5개년 통계를 그룹 단위 벡터 연산으로 계산
+
+    반환 DataFrame 은 그룹 키 정렬 순서이며, 학생 성적과 무관한 값만 담는다.
+    컷 선택 순서와 년도 가중치는 policy 를 따르고,
+    year_weighting(compute_year_weights 인자 dict)이 주어지면 그것을 우선한다.
+    stability 는 컷의 모표준편차(stability_ddof=0) 또는 표본표준편차(1),
+    trend=True 이면 년도별 컷 추세 기울기(trend) 컬럼도 추가한다.
+    latest_year 는 최신 년도 기준 가중치의 기준 년도 (filtered 가 전체 데이터 일부일 때 전체의 최신 년도).
+    """
+    # groupby 와 동일하게 키가 비어있는 행은 제외
+    data = filtered.dropna(subset=GROUP_COLUMNS)
+    n = len(data)
+    grouped = data.groupby(GROUP_COLUMNS, sort=True, observed=True)
+    gid = grouped.ngroup().to_numpy()
+    n_groups = grouped.ngroups
+
+    # 행별 년도 가중치
+    policy = policy or DEFAULT_POLICY
+    if year_weighting is None:
+        year_weighting = policy.year_weighting
+    if latest_year is not None and uses_latest_year(year_weighting):
+        year_weighting = dict(year_weighting, latest_year=latest_year)
+    weights = compute_year_weights(data['year'], **year_weighting)
+
+    # 여러 컷 중 0보다 큰 첫 번째 값 선택 (정책의 컷 순서)
+    cuts = to_float64(data[policy.cut_columns].apply(pd.to_numeric, errors='coerce').to_numpy())
+    valid = cuts > 0
+    has_cut = valid.any(axis=1)
+    cut = np.where(has_cut, cuts[np.arange(n), valid.argmax(axis=1)], np.nan)
+
+    # 가중평균 컷라인
+    weighted = np.where(has_cut, cut * weights, 0.0)
+    cut_sum = np.bincount(gid, weights=weighted, minlength=n_groups)
+    weight_sum = np.bincount(gid, weights=np.where(has_cut, weights, 0.0), minlength=n_groups)
+    cut_count = np.bincount(gid, weights=has_cut, minlength=n_groups)
+    cut_sum_raw = np.bincount(gid, weights=np.where(has_cut, cut, 0.0), minlength=n_groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        avg_cut = np.where(weight_sum > 0, cut_sum / weight_sum, np.nan)
+
+    # 평균 경쟁률
+    comp = to_float64(pd.to_numeric(data['comp_rate'], errors='coerce'))
+    has_comp = ~np.isnan(comp)
+    comp_sum = np.bincount(gid, weights=np.where(has_comp, comp, 0.0), minlength=n_groups)
+    comp_count = np.bincount(gid, weights=has_comp, minlength=n_groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        avg_comp = np.where(comp_count > 0, comp_sum / comp_count, np.nan)
+
+    # 그룹 내 행 순서 (원본 순서 유지)
+    order = np.argsort(gid, kind='stable')
+    group_size = np.bincount(gid, minlength=n_groups)
+    group_start = np.cumsum(group_size) - group_size
+
+    # 최신 년도의 첫 번째 행 → 70%컷
+    years = pd.to_numeric(data['year'], errors='coerce').to_numpy(dtype=float)
+    latest_year = pd.Series(years).groupby(gid).transform('max').to_numpy()
+    is_latest = years == latest_year
+    latest_pos = np.full(n_groups, n, dtype=np.int64)
+    np.minimum.at(latest_pos, gid[is_latest], np.flatnonzero(is_latest))
+    # 년도 정보가 없는 그룹은 첫 번째 행 사용
+    no_latest = latest_pos == n
+    latest_pos[no_latest] = order[group_start[no_latest]]
+    cut70 = to_float64(pd.to_numeric(data['cut_grade_70'], errors='coerce'))
+    latest_cut_70 = cut70[latest_pos]
+    latest_cut_70 = np.where(latest_cut_70 > 0, latest_cut_70, np.nan)
+
+    # 안정성: 그룹별 선택된 컷의 표준편차 (년도 가중치 없이 원래 컷 값 기준)
+    cut_mean = np.where(cut_count > 0, cut_sum_raw / np.maximum(cut_count, 1), np.nan)
+    deviation = np.where(has_cut, cut - cut_mean[gid], 0.0)
+    squares = np.bincount(gid, weights=deviation * deviation, minlength=n_groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        stability = np.sqrt(squares / (cut_count - stability_ddof))
+    stability = np.where(cut_count > max(1, stability_ddof), stability, 999.0)
+
+    keys = data.iloc[order[group_start]][GROUP_COLUMNS].reset_index(drop=True)
+    summary = keys.rename(columns={
+        'university_name': 'university',
+        'major_name': 'major',
+    })
+    summary['cut_grade'] = avg_cut
+    summary['comp_rate'] = avg_comp
+    summary['is_jonghap'] = summary['admission_type'].astype(str).str.contains('종합', regex=False).to_numpy()
+    summary['priority'] = np.where(summary['is_jonghap'], 0, 1)
+    summary['stability'] = stability
+    summary['years_data'] = group_size
+    summary['latest_cut_70'] = latest_cut_70
+    if trend:
+        summary['trend'] = cut_trend(gid, n_groups, years, cut)
+    # 년도 가중치 기준 (update_program_summary 에서 비교)
+    summary.attrs['latest_year'] = float(np.nanmax(years)) if n and not np.isnan(years).all() else None
+    return summary
+
+def program_keys(frames):
+    """여러 데이터 조각에 나오는 대학-학과-전형 키 (MultiIndex)"""
+    keys = pd.concat(
+        [frame[GROUP_COLUMNS].dropna().astype(object) for frame in frames], ignore_index=True
+    ).drop_duplicates()
+    return pd.MultiIndex.from_frame(keys)
+
+def data_latest_year(df):
+    """데이터의 최신 년도 (없으면 None)"""
+    years = pd.to_numeric(df['year'], errors='coerce')
+    return float(years.max()) if years.notna().any() else None
+
+def uses_latest_year(year_weighting):
+    """년도 가중치가 최신 년도 기준인지 (년도를 고정한 table 이 아닌 경우)"""
+    return year_weighting.get('scheme', 'table') != 'table' or year_weighting.get('table') is None
+
+def unweighted_years(df, year_weighting):
+    """년도를 고정한 가중치 표에 없는 데이터 년도 목록 (기본 가중치가 적용됨)"""
+    if uses_latest_year(year_weighting):
+        return []
+    table = {float(year) for year in year_weighting['table']}
+    years = pd.to_numeric(pd.Series(df['year'].unique()), errors='coerce').dropna()
+    return sorted(int(year) for year in years if float(year) not in table)
+
+def update_program_summary(summary, df, changed_keys, policy=None, **options):
+    """바뀐 대학-학과-전형(changed_keys)만 다시 집계해서 기존 통계표에 반영
+
+    결과는 aggregate_programs(df) 전체 재계산과 같다. 단, 년도 가중치가
+    최신 년도 기준(linear/exponential, 표 생략)인데 최신 년도가 바뀌면 전체를 다시 계산한다.
+    """
+    policy = policy or DEFAULT_POLICY
+    year_weighting = dict(options.pop('year_weighting', None) or policy.year_weighting)
+    latest_year = data_latest_year(df)
+    if uses_latest_year(year_weighting):
+        if latest_year != summary.attrs.get('latest_year'):
+            return aggregate_programs(df, year_weighting, policy=policy, **options)
+        year_weighting.setdefault('latest_year', latest_year)
+    if len(changed_keys) == 0:
+        return summary
+    
+    row_keys = pd.MultiIndex.from_arrays([df[col] for col in GROUP_COLUMNS])
+    fresh = aggregate_programs(df[row_keys.isin(changed_keys)], year_weighting, policy=policy, **options)
+    summary_keys = pd.MultiIndex.from_arrays([summary[col] for col in SUMMARY_KEY_COLUMNS])
+    merged = pd.concat([summary[~summary_keys.isin(changed_keys)], fresh], ignore_index=True)
+    
+    # 전체 집계와 같은 정렬 (정렬된 카테고리 코드 순서)
+    for col, source in zip(SUMMARY_KEY_COLUMNS, GROUP_COLUMNS):
+        merged[col] = pd.Categorical(merged[col].astype(object), categories=df[source].cat.categories)
+    merged = merged.sort_values(SUMMARY_KEY_COLUMNS, kind='stable', ignore_index=True)
+    merged.attrs['latest_year'] = latest_year
+    return merged
+
+def cut_trend(gid, n_groups, years, cut):
+    """그룹별 년도-컷 최소제곱 기울기 (1년당 컷 변화, 양수면 컷 등급이 올라 합격이 쉬워지는 추세)
+
+    컷이 있는 서로 다른 년도가 2개 미만이면 NaN.
+    """
+    used = ~np.isnan(years) & ~np.isnan(cut)
+    g = gid[used]
+    x = years[used]
+    y = cut[used]
+    count = np.bincount(g, minlength=n_groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        x_mean = np.bincount(g, weights=x, minlength=n_groups) / count
+        y_mean = np.bincount(g, weights=y, minlength=n_groups) / count
+        dx = x - x_mean[g]
+        dy = y - y_mean[g]
+        sxx = np.bincount(g, weights=dx * dx, minlength=n_groups)
+        sxy = np.bincount(g, weights=dx * dy, minlength=n_groups)
+        return np.where(sxx > 0, sxy / sxx, np.nan)
+
+def grade_categories(student_grades, cut_grades, policy=None):
+    """성적별 구분과 컷 차이
+
+    성적이 스칼라면 프로그램 수 길이의 배열, 1차원 배열이면
+    (성적 수, 프로그램 수) 행렬을 브로드캐스트 한 번으로 계산한다.
+    """
+    grades = np.asarray(student_grades, dtype=float)
+    if grades.ndim:
+        grades = grades[:, None]
+    cut = np.asarray(cut_grades, dtype=float)
+    has_cut = cut > 0
+    category = np.where(has_cut, categorize_grades(grades, cut, policy), NO_CUT_CATEGORY)
+    diff = np.where(has_cut, np.abs(grades - cut), 999)
+    return category, diff
+
+def program_records(summary):
+    """프로그램 통계표 → 성적과 무관한 추천 후보 dict 목록 (category, diff 는 None)"""
+    has_trend = 'trend' in summary.columns
+
+    records = []
+    for row in summary.itertuples(index=False):
+        records.append({
+            'university': row.university,
+            'major': row.major,
+            'admission_type': row.admission_type,
+            'admission_name': row.admission_name,
+            'category': None,
+            'diff': None,
+            'cut_grade': row.cut_grade if row.cut_grade > 0 else None,
+            'comp_rate': row.comp_rate,
+            'is_jonghap': bool(row.is_jonghap),
+            'priority': int(row.priority),
+            'stability': row.stability,
+            'years_data': int(row.years_data),
+            'latest_cut_70': row.latest_cut_70 if row.latest_cut_70 > 0 else None
+        })
+        if has_trend:
+            records[-1]['trend'] = None if np.isnan(row.trend) else row.trend
+    return records
+
+def build_results(summary, student_grade, policy=None):
+    """프로그램 통계에 학생 성적을 적용하여 추천 후보 dict 목록 생성"""
+    category, diff = grade_categories(float(student_grade), summary['cut_grade'].to_numpy(dtype=float), policy)
+
+    results = program_records(summary)
+    for result, cat, d in zip(results, category.tolist(), diff.tolist()):
+        result['category'] = cat
+        result['diff'] = d
+    return results
+
+def _take_smallest(heap, results, used, limit, recommendations):
+    """힙에서 작은 순서로 꺼내며 아직 없는 대학-학과만 limit 개까지 추가"""
+    added = 0
+    while heap and added < limit:
+        position = heapq.heappop(heap)[-1]
+        result = results[position]
+        key = (result['university'], result['major'])
+        if key not in used:
+            recommendations.append(result)
+            used.add(key)
+            added += 1
+
+def select_recommendations(results, num_results=30, policy=None):
+    """구분별 목표 개수만큼 고른 뒤 num_results 까지 채우기 (같은 대학-학과는 한 번만)
+
+    정렬 기준은 (우선순위, 성적 차이, 안정성), 같으면 원래 순서.
+    후보를 구분별로 한 번 나눈 뒤 힙에서 필요한 만큼만 꺼내므로 전체 정렬을 하지 않는다.
+    """
+    recommendations = []
+    used = set()
+    
+    # 정렬 키 (마지막 원소 = 원래 위치, 동점일 때 안정 정렬과 같은 순서)
+    sort_keys = [
+        (result['priority'], result['diff'], result['stability'], position)
+        for position, result in enumerate(results)
+    ]
+    buckets = {}
+    for result, sort_key in zip(results, sort_keys):
+        buckets.setdefault(result['category'], []).append(sort_key)
+    
+    # 각 구분별로 목표 개수만큼 선택
+    for cat, target_count in (policy or DEFAULT_POLICY).targets.items():
+        heap = buckets.get(cat)
+        if heap:
+            heapq.heapify(heap)
+            _take_smallest(heap, results, used, target_count, recommendations)
+    
+    # 30개가 안 되면 추가
+    if len(recommendations) < num_results:
+        heap = [
+            sort_key for result, sort_key in zip(results, sort_keys)
+            if (result['university'], result['major']) not in used
+        ]
+        heapq.heapify(heap)
+        _take_smallest(heap, results, used, num_results - len(recommendations), recommendations)
+    
+    return recommendations[:num_results]
+
+def find_recommendations(df, major_keyword, student_grade, num_results=30, summary=None, index=None,
+                         distribution=None, year_weighting=None, policy=None, fuzzy=False, synonyms=None):
+    """대학 추천
+
+    summary 가 주어지면 미리 계산된 통계표에서 해당 학과만 골라 사용하고
+    (없으면 policy / year_weighting 으로 직접 집계, summary 는 같은 policy 로 만든 것이어야 함),
+    index 가 주어지면 전체 행 검색 대신 학과명 검색 인덱스를 사용한다.
+    synonyms(build_synonym_graph)가 주어지면 관련 학과까지 한 번에 검색하고,
+    확장했으면 추천마다 via_synonym (관련 학과로만 찾은 학과이면 True)을 넣는다.
+    fuzzy=True 이면 일치하는 학과가 없을 때 오타 허용 검색의 가장 가까운 학과들을 사용한다.
+    distribution(dict)이 주어지면 전체 후보의 구분별/전형별 개수를 채운다
+    (관련 학과로 확장했으면 expanded_terms 에 관련 키워드,
+    오타 검색을 사용했으면 fuzzy_matches 에 [(학과명, 거리)]).
+    """
+    
+    # 유연한 검색 적용 (통계표가 있으면 해당 학과 행 선택까지)
+    fuzzy_matches = None
+    expanded_terms = []
+    if synonyms is not None and index is None:
+        index = build_major_index(df)
+    with stage('search') as timer:
+        if synonyms is not None:
+            rows, _, expanded_terms = synonym_major_rows(df, index, synonyms, major_keyword)
+            filtered = df.iloc[rows]
+        elif index is not None:
+            filtered = df.iloc[match_major_rows(df, index, major_keyword)[0]]
+        else:
+            filtered = df[df['major_name'].apply(lambda x: flexible_search(x, major_keyword))]
+        if fuzzy and len(filtered) == 0:
+            rows, _, fuzzy_matches = fuzzy_major_rows(df, index if index is not None else build_major_index(df),
+                                                      major_keyword)
+            filtered = df.iloc[rows]
+        timer.rows = len(filtered)
+        if len(filtered) and summary is not None:
+            programs = summary[summary['major'].isin(filtered['major_name'].unique())]
+    
+    if len(filtered) == 0:
+        return None, None, f"'{major_keyword}' 관련 학과를 찾을 수 없습니다."
+    
+    # 대학-학과별 통계 (벡터 연산)
+    if summary is None:
+        programs = aggregate_programs(filtered, year_weighting, policy=policy, latest_year=data_latest_year(df))
+    
+    with stage('select', rows=len(programs)):
+        results = build_results(programs, student_grade, policy)
+        
+        category_distribution = {}
+        for result in results:
+            category_distribution[result['category']] = category_distribution.get(result['category'], 0) + 1
+        
+        # 구분별 분포 (화면 표시용)
+        if distribution is not None:
+            distribution['categories'] = category_distribution
+            distribution['jonghap'] = sum(1 for r in results if r['is_jonghap'])
+            distribution['total'] = len(results)
+            if expanded_terms:
+                distribution['expanded_terms'] = expanded_terms
+            if fuzzy_matches is not None:
+                distribution['fuzzy_matches'] = fuzzy_matches
+        
+        recommendations = select_recommendations(results, num_results, policy)
+        if expanded_terms and fuzzy_matches is None:
+            mark_synonym_matches(recommendations, direct_major_names(df, index, major_keyword))
+    return recommendations, filtered, None
+
+def grade_range(start, stop, step=0.1):
+    """start 부터 stop 까지(포함) step 간격의 성적 목록"""
+    count = max(int(round((stop - start) / step)) + 1, 1)
+    return np.round(start + step * np.arange(count), 4)
+
+@timed('sweep')
+def sweep_recommendations(df, major_keywords, student_grades, num_results=30, summary=None, index=None,
+                          year_weighting=None, policy=None, fuzzy=False, synonyms=None):
+    """여러 전공 키워드 × 여러 성적 비교 (what-if)
+
+    검색과 집계는 키워드 전체에 대해 한 번만 하고, 모든 성적의 구분은
+    (성적 수, 프로그램 수) 브로드캐스트 한 번으로 계산한다.
+    (결과 dict, 오류 메시지)를 반환하며 결과 dict 는
+      keywords, grades         : 입력 키워드 / 성적 배열
+      programs                 : 후보 프로그램 통계표 (모든 키워드 합집합)
+      categories               : (성적 수, 프로그램 수) 구분 행렬
+      keyword_masks            : 키워드별 프로그램 포함 여부 (bool 배열)
+      recommendations          : {(키워드, 성적): 추천 목록}
+      filtered                 : 검색된 원본 행
+      missing                  : 일치하는 학과가 없는 키워드
+      expanded_terms           : 관련 학과로 확장한 키워드 → 관련 키워드 목록 (synonyms 사용 시,
+                                 이 키워드의 추천에는 via_synonym 표시)
+      fuzzy_matches            : 오타 검색을 사용한 키워드 → [(학과명, 거리)] (fuzzy=True)
+      policy                   : 사용한 추천 기준
+    """
+    keywords = list(dict.fromkeys(major_keywords))
+    grades = np.asarray(student_grades, dtype=float).ravel()
+    
+    # 키워드별 검색 (원본 행 번호)
+    keyword_rows = {}
+    fuzzy_matches = {}
+    expanded_terms = {}
+    if synonyms is not None and index is None:
+        index = build_major_index(df)
+    for keyword in keywords:
+        if synonyms is not None:
+            keyword_rows[keyword], _, expanded = synonym_major_rows(df, index, synonyms, keyword)
+            if expanded:
+                expanded_terms[keyword] = expanded
+        elif index is not None:
+            keyword_rows[keyword] = match_major_rows(df, index, keyword)[0]
+        else:
+            keyword_rows[keyword] = np.flatnonzero(
+                df['major_name'].apply(lambda x: flexible_search(x, keyword)).to_numpy(dtype=bool)
+            )
+        if fuzzy and len(keyword_rows[keyword]) == 0:
+            if index is None:
+                index = build_major_index(df)
+            keyword_rows[keyword], _, fuzzy_matches[keyword] = fuzzy_major_rows(df, index, keyword)
+    missing = [keyword for keyword in keywords if len(keyword_rows[keyword]) == 0]
+    if len(missing) == len(keywords):
+        return None, f"'{', '.join(keywords)}' 관련 학과를 찾을 수 없습니다."
+    
+    # 합집합으로 한 번만 집계
+    filtered = df.iloc[np.unique(np.concatenate([keyword_rows[k] for k in keywords]))]
+    if summary is not None:
+        programs = summary[summary['major'].isin(filtered['major_name'].unique())]
+    else:
+        programs = aggregate_programs(filtered, year_weighting, policy=policy, latest_year=data_latest_year(df))
+    programs = programs.reset_index(drop=True)
+    
+    categories, diffs = grade_categories(grades, programs['cut_grade'].to_numpy(dtype=float), policy)
+    records = program_records(programs)
+    keyword_masks = {
+        keyword: programs['major'].isin(df['major_name'].iloc[keyword_rows[keyword]].unique()).to_numpy()
+        for keyword in keywords
+    }
+    
+    recommendations = {}
+    for keyword in keywords:
+        direct_majors = (direct_major_names(df, index, keyword)
+                         if keyword in expanded_terms and keyword not in fuzzy_matches else None)
+        positions = np.flatnonzero(keyword_masks[keyword])
+        keyword_records = [records[p] for p in positions.tolist()]
+        for g, grade in enumerate(grades.tolist()):
+            results = [
+                dict(record, category=cat, diff=d)
+                for record, cat, d in zip(keyword_records, categories[g, positions].tolist(),
+                                          diffs[g, positions].tolist())
+            ]
+            recommendations[(keyword, grade)] = select_recommendations(results, num_results, policy)
+            if direct_majors is not None:
+                mark_synonym_matches(recommendations[(keyword, grade)], direct_majors)
+    
+    return {
+        'keywords': keywords,
+        'grades': grades,
+        'programs': programs,
+        'categories': categories,
+        'keyword_masks': keyword_masks,
+        'recommendations': recommendations,
+        'filtered': filtered,
+        'missing': missing,
+        'expanded_terms': expanded_terms,
+        'fuzzy_matches': fuzzy_matches,
+        'policy': policy or DEFAULT_POLICY,
+    }, None
+
+# 엑셀 공통 스타일 (모든 셀, 모든 파일에서 같은 객체 재사용)
+HEADER_FILL = PatternFill(start_color="FF8C00", end_color="FF8C00", fill_type="solid")
+HEADER_FONT = Font(bold=True, color="FFFFFF", size=11)
+BODY_FONT = Font(size=11)
+CENTER_ALIGN = Alignment(horizontal='center', vertical='center')
+THIN_BORDER = Border(left=Side(style='thin'), right=Side(style='thin'), 
+                     top=Side(style='thin'), bottom=Side(style='thin'))
+COMP_RATE_FILL = PatternFill(start_color="F0F0F0", end_color="F0F0F0", fill_type="solid")
+
+# 구분 셀 색상
+CATEGORY_FILLS = {
+    category: PatternFill(start_color=color, end_color=color, fill_type="solid")
+    for category, color in {
+        '강상향': 'FF9999', '상향': 'FFB366', '약상향': 'FFCC66',
+        '적정': '99FF99', '강적정': '66FFB3', '안정': '99CCFF', 
+        '강안정': '9999FF', '정보없음': 'E6E6E6'
+    }.items()
+}
+DEFAULT_CATEGORY_FILL = PatternFill(start_color='FFFFFF', end_color='FFFFFF', fill_type="solid")
+
+def _styled_cell(ws, value, font, fill=None):
+    """테두리/가운데 정렬이 적용된 쓰기 전용 셀"""
+    cell = WriteOnlyCell(ws, value=value)
+    cell.font = font
+    cell.border = THIN_BORDER
+    cell.alignment = CENTER_ALIGN
+    if fill is not None:
+        cell.fill = fill
+    return cell
+
+def _header_cell(ws, value):
+    """주황색 헤더 셀"""
+    return _styled_cell(ws, value, HEADER_FONT, HEADER_FILL)
+
+def _set_column_widths(ws, widths):
+    """열 너비 설정 (쓰기 전용 시트는 행을 쓰기 전에 설정해야 함)"""
+    for column, width in widths.items():
+        ws.column_dimensions[column].width = width
+
+def write_recommendation_sheet(ws1, student_info, recommendations):
+    """학교추천 시트 작성 (학생 정보 + 추천 목록) - 쓰기 전용(write_only) 시트에 순서대로 기록"""
+    # 열 너비 조정
+    _set_column_widths(ws1, {'A': 15, 'B': 30, 'C': 15, 'D': 20, 'E': 12, 'F': 15, 'G': 12, 'H': 15})
+    
+    # 1행 - 학교 정보 헤더와 데이터
+    ws1.append([
+        _header_cell(ws1, '학교명'), student_info['school'],
+        _header_cell(ws1, '학년'), student_info['grade'],
+        _header_cell(ws1, '이름'), student_info['name'],
+        _header_cell(ws1, '희망진로'), student_info['major']
+    ])
+    
+    # 병합할 셀들
+    ws1.merged_cells.add('H1:J1')
+    
+    # 2행 비움, 3행 - 테이블 헤더
+    ws1.append([])
+    headers_row3 = ['학교', '학과명', '전형', '전형요소', '구분', '최근70%컷', '데이터년수', '평균경쟁률']
+    ws1.append([_header_cell(ws1, header) for header in headers_row3])
+    
+    # 4행부터 데이터 입력
+    for rec in recommendations:
+        latest_cut_70 = f"{rec.get('latest_cut_70', '-'):.2f}" if rec.get('latest_cut_70') and rec.get('latest_cut_70') != 999 else "-"
+        comp_rate = f"{rec.get('comp_rate', '-'):.1f}" if rec.get('comp_rate') else "-"
+        ws1.append([
+            _styled_cell(ws1, rec['university'], BODY_FONT),
+            _styled_cell(ws1, f"{rec['major']} (관련 학과)" if rec.get('via_synonym') else rec['major'], BODY_FONT),
+            _styled_cell(ws1, rec['admission_type'], BODY_FONT),
+            _styled_cell(ws1, rec['admission_name'], BODY_FONT),
+            _styled_cell(ws1, rec['category'], BODY_FONT,
+                         CATEGORY_FILLS.get(rec['category'], DEFAULT_CATEGORY_FILL)),
+            _styled_cell(ws1, latest_cut_70, BODY_FONT),
+            _styled_cell(ws1, f"{rec.get('years_data', 1)}년", BODY_FONT),
+            _styled_cell(ws1, comp_rate, BODY_FONT, COMP_RATE_FILL)
+        ])
+
+def _text_column(values):
+    """엑셀용 문자열 열 (빈 값은 '')"""
+    values = pd.Series(values)
+    return np.where(values.notna(), values.astype(str), '').tolist()
+
+def _number_column(values):
+    """엑셀용 수치 열 (빈 값은 '-')"""
+    numbers = to_float64(values)
+    column = numbers.astype(object)
+    column[np.isnan(numbers)] = '-'
+    return column.tolist()
+
+def write_search_results_sheet(ws2, all_results_df):
+    """전체검색결과 시트 작성 - 열 단위로 변환한 뒤 행을 한 번에 스트리밍"""
+    _set_column_widths(ws2, {'A': 10, 'B': 20, 'C': 35, 'D': 15, 'E': 10, 'F': 10, 'G': 10})
+    
+    # 헤더
+    headers = ['년도', '대학명', '학과명', '전형', '경쟁률', '50%컷', '70%컷']
+    ws2.append([_header_cell(ws2, header) for header in headers])
+    
+    # 데이터 입력 (float32 값은 원래 소수로 복원)
+    columns = [
+        _text_column(all_results_df['year']),
+        _text_column(all_results_df['university_name']),
+        _text_column(all_results_df['major_name']),
+        _text_column(all_results_df['admission_type']),
+        _number_column(all_results_df['comp_rate']),
+        _number_column(all_results_df['cut_grade_50']),
+        _number_column(all_results_df['cut_grade_70'])
+    ]
+    for row in zip(*columns):
+        ws2.append(row)
+
+@timed('excel_build', rows=lambda student_info, recommendations, *args, **kwargs: len(recommendations))
+def create_excel_output(student_info, recommendations, all_results_df=None):
+    """엑셀 파일 생성 (쓰기 전용 모드로 스트리밍)"""
+    wb = Workbook(write_only=True)
+    
+    # 첫 번째 시트: 학교추천
+    ws1 = wb.create_sheet("학교추천")
+    write_recommendation_sheet(ws1, student_info, recommendations)
+    
+    # 두 번째 시트: 전체 검색 결과
+    if all_results_df is not None:
+        try:
+            ws2 = wb.create_sheet("전체검색결과")
+            write_search_results_sheet(ws2, all_results_df)
+        except Exception as e:
+            warnings.warn(f"전체 검색 결과 시트 생성 중 오류: {str(e)}")
+    
+    # BytesIO로 저장
+    output = BytesIO()
+    wb.save(output)
+    output.seek(0)
+    
+    return output
+
+def _zip_entry_name(info):
+    """zip 항목 파일명 (UTF-8 플래그가 없으면 윈도우 한글 cp949 로 복원)"""
+    name = info.filename
+    if not info.flag_bits & 0x800:
+        try:
+            name = name.encode('cp437').decode('cp949')
+        except (UnicodeEncodeError, UnicodeDecodeError):
+            pass
+    return name
+
+def collect_batch_workbooks(uploaded_files):
+    """업로드된 xlsx 파일과 zip 압축파일에서 (파일명, 내용) 목록 추출"""
+    workbooks = []
+    for uploaded in uploaded_files:
+        file_name = getattr(uploaded, 'name', str(uploaded))
+        file_bytes = read_upload_bytes(uploaded)
+        
+        if file_name.lower().endswith('.zip'):
+            with zipfile.ZipFile(BytesIO(file_bytes)) as zf:
+                for info in zf.infolist():
+                    entry_path = _zip_entry_name(info)
+                    entry_name = os.path.basename(entry_path)
+                    # 폴더, macOS 메타데이터, 엑셀 임시파일 제외
+                    if (info.is_dir() or '__MACOSX' in entry_path
+                            or entry_name.startswith(('~$', '._'))
+                            or not entry_name.lower().endswith('.xlsx')):
+                        continue
+                    workbooks.append((entry_name, zf.read(info)))
+        else:
+            workbooks.append((file_name, file_bytes))
+    return workbooks
+
+def extract_student_record(file_name, file_bytes, extract=extract_student_workbook):
+    """일괄 추천용 학생 정보 (추출 실패 시 기본값)
+
+    extract 로 캐시된 추출 함수를 넘길 수 있다.
+    """
+    record = {
+        'file': file_name,
+        'name': os.path.splitext(file_name)[0],
+        'school': '',
+        'grade': '2학년',
+        'student_grade': 2.5,
+        'major': ''
+    }
+    try:
+        workbook = extract(file_bytes)
+        info = parse_student_info(workbook)
+        if info:
+            record['name'] = info['name'] or record['name']
+            record['school'] = info['school']
+            record['grade'] = info['grade']
+        avg_grade = parse_student_grade(workbook)
+        if avg_grade is not None:
+            record['student_grade'] = avg_grade
+    except Exception as e:
+        record['error'] = str(e)
+    return record
+
+def run_batch_recommendations(df, students, summary=None, index=None, num_results=30, policy=None, fuzzy=False,
+                              synonyms=None):
+    """여러 학생에 대해 대학 추천 실행 - 학생별 결과 목록 반환
+
+    통계표(summary)와 검색 인덱스(index)를 모든 학생이 공유하므로
+    학생 1명당 비용은 키워드 검색과 구분 계산뿐이다.
+    synonyms 가 주어지면 관련 학과까지 검색하고 expanded_terms 에 관련 키워드,
+    fuzzy=True 이면 오타 검색을 사용한 학생의 fuzzy_matches 에 [(학과명, 거리)].
+    """
+    results = []
+    for student in students:
+        recommendations, filtered, error = None, None, None
+        distribution = {}
+        if not student.get('major'):
+            error = "희망 전공이 입력되지 않았습니다."
+        else:
+            recommendations, filtered, error = find_recommendations(
+                df, student['major'], float(student['student_grade']), num_results,
+                summary=summary, index=index, policy=policy, distribution=distribution, fuzzy=fuzzy,
+                synonyms=synonyms
+            )
+        results.append({
+            'student_info': {
+                'name': student['name'],
+                'school': student['school'],
+                'grade': student['grade'],
+                'major': student.get('major', '')
+            },
+            'recommendations': recommendations,
+            'filtered': filtered,
+            'expanded_terms': distribution.get('expanded_terms'),
+            'fuzzy_matches': distribution.get('fuzzy_matches'),
+            'error': error
+        })
+    return results
+
+def _unique_name(name, used, max_length=None):
+    """중복되지 않는 이름 (같은 이름이면 뒤에 번호 추가)"""
+    base = name[:max_length] if max_length else name
+    candidate = base
+    number = 2
+    while candidate in used:
+        suffix = f"_{number}"
+        candidate = (base[:max_length - len(suffix)] if max_length else base) + suffix
+        number += 1
+    used.add(candidate)
+    return candidate
+
+def student_workbook_bytes(task):
+    """학생 1명의 엑셀 bytes - (학생 정보, 추천 목록, 검색 결과) 또는 검색 결과 대신 (데이터 버전, 행 번호)
+
+    프로세스 풀 작업으로도 쓰인다. 행 번호를 받으면 공유 메모리의 데이터에 붙어서 검색 결과를 만든다.
+    """
+    student_info, recommendations, filtered = task
+    if isinstance(filtered, tuple):
+        from shared_dataset import attach_frame
+        version, rows = filtered
+        df = attach_frame(version)
+        if df is None:
+            raise RuntimeError(f"공유 메모리에 데이터가 없습니다: {version}")
+        filtered = df.loc[rows]
+    return create_excel_output(student_info, recommendations, filtered).getvalue()
+
+def create_batch_zip_output(batch_results, executor=None, shared_version=None):
+    """학생별 엑셀 파일을 zip 으로 묶어서 생성
+
+    executor(ProcessPoolExecutor)가 주어지면 학생별 엑셀을 여러 프로세스에서 나눠 만든다
+    (추천 계산은 학생당 수 ms 라서 순서대로, 엑셀 생성이 대부분의 시간).
+    shared_version 은 batch_results 의 데이터가 공유 메모리(shared_dataset)에 있을 때 그 버전 -
+    검색 결과 대신 행 번호만 넘긴다. 병렬 실행이 실패하면 순서대로 다시 만든다.
+    """
+    results = [result for result in batch_results if not result['error']]
+    tasks = [
+        (result['student_info'], result['recommendations'],
+         (shared_version, result['filtered'].index.to_numpy()) if shared_version else result['filtered'])
+        for result in results
+    ]
+    workbooks = None
+    if executor is not None and len(tasks) > 1:
+        try:
+            workbooks = list(executor.map(student_workbook_bytes, tasks))
+        except Exception as e:
+            warnings.warn(f"병렬 엑셀 생성 실패, 순서대로 생성: {str(e)}")
+    if workbooks is None:
+        workbooks = [
+            student_workbook_bytes((result['student_info'], result['recommendations'], result['filtered']))
+            for result in results
+        ]
+    
+    output = BytesIO()
+    used = set()
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for result, workbook in zip(results, workbooks):
+            file_name = _unique_name(f"대학추천_{result['student_info']['name']} by COdeStudio", used)
+            zf.writestr(f"{file_name}.xlsx", workbook)
+    output.seek(0)
+    return output
+
+@timed('excel_build', rows=lambda batch_results: len(batch_results))
+def create_batch_excel_output(batch_results):
+    """학생별 학교추천 시트를 하나의 엑셀 파일로 생성"""
+    wb = Workbook(write_only=True)
+    used = set()
+    for result in batch_results:
+        if result['error']:
+            continue
+        # 시트명: 31자 제한, 사용할 수 없는 문자 제거
+        sheet_name = re.sub(r'[\\/*?:\[\]]', '', result['student_info']['name']) or "학생"
+        ws = wb.create_sheet(_unique_name(sheet_name, used, max_length=31))
+        write_recommendation_sheet(ws, result['student_info'], result['recommendations'])
+    
+    if not wb.worksheets:
+        wb.create_sheet("학교추천")
+    
+    output = BytesIO()
+    wb.save(output)
+    output.seek(0)
+    return output
+
+def format_recommendations(recommendations):
+    """추천 결과 표 (명령행 출력용)"""
+    lines = []
+    for idx, rec in enumerate(recommendations, start=1):
+        cut = f"{rec['cut_grade']:.2f}" if rec['cut_grade'] else "-"
+        comp = f"{rec['comp_rate']:.1f}" if pd.notna(rec['comp_rate']) else "-"
+        line = (f"{idx:>2}. [{rec['category']}] {rec['university']} {rec['major']} "
+                f"({rec['admission_type']}/{rec['admission_name']}) 평균합격선 {cut} 경쟁률 {comp}")
+        if rec.get('trend') is not None:
+            line += f" 추세 {rec['trend']:+.2f}/년"
+        if rec.get('via_synonym'):
+            line += " [관련 학과]"
+        lines.append(line)
+    return '\n'.join(lines)
+
+def format_fuzzy_matches(keyword, matches, limit=5):
+    """오타 검색 안내 문구"""
+    names = ', '.join(name for name, _ in matches[:limit])
+    more = f" 외 {len(matches) - limit}개" if len(matches) > limit else ""
+    return f"'{keyword}' 관련 학과가 없어 비슷한 학과로 검색했습니다: {names}{more}"
+
+def format_expanded_terms(keyword, terms, limit=8):
+    """관련 학과 확장 안내 문구"""
+    names = ', '.join(terms[:limit])
+    more = f" 외 {len(terms) - limit}개" if len(terms) > limit else ""
+    return f"'{keyword}' 계열 관련 학과도 함께 검색했습니다: {names}{more}"
+
+def format_sweep(result):
+    """비교 결과 (명령행 출력용): 키워드/성적별 구분 분포와 추천 목록"""
+    lines = []
+    order = result['policy'].categories + [NO_CUT_CATEGORY]
+    for keyword in result['keywords']:
+        if keyword in result['missing']:
+            lines.append(f"== {keyword}: 관련 학과 없음")
+            continue
+        if keyword in result.get('expanded_terms', {}):
+            lines.append(format_expanded_terms(keyword, result['expanded_terms'][keyword]))
+        if keyword in result.get('fuzzy_matches', {}):
+            lines.append(format_fuzzy_matches(keyword, result['fuzzy_matches'][keyword]))
+        mask = result['keyword_masks'][keyword]
+        for g, grade in enumerate(result['grades'].tolist()):
+            categories, counts = np.unique(result['categories'][g, mask], return_counts=True)
+            count_of = dict(zip(categories.tolist(), counts.tolist()))
+            distribution = ' / '.join(f"{cat} {count_of[cat]}" for cat in order if cat in count_of)
+            lines.append(f"== {keyword} / 내신 {grade:g}: {distribution}")
+            lines.append(format_recommendations(result['recommendations'][(keyword, grade)]))
+    return '\n'.join(lines)
+
+def parse_grade_list(text):
+    """'2.3:2.7:0.2' (범위) 또는 '2.3,2.5,2.7' (목록) → 성적 배열"""
+    if ':' in text:
+        parts = [float(part) for part in text.split(':')]
+        if len(parts) not in (2, 3) or (len(parts) == 3 and parts[2] <= 0):
+            raise ValueError(text)
+        return grade_range(*parts)
+    return np.array([float(part) for part in text.split(',') if part.strip()])
+
+def print_timings(timings):
+    """--timing 출력 (명령 단계별 시간 + 내부 단계 측정)"""
+    for name, elapsed in timings:
+        print(f"{name:>10}: {elapsed * 1000:.1f} ms", file=sys.stderr)
+    for stat in METRICS.summary():
+        rows = f" / {stat['mean_rows']:,.0f}행" if stat['mean_rows'] is not None else ""
+        print(f"  {STAGE_LABELS.get(stat['stage'], stat['stage'])}: {stat['count']}회, "
+              f"합계 {stat['seconds_sum'] * 1000:.1f} ms{rows}", file=sys.stderr)
+
+def main(argv=None):
+    """명령행 실행: CSV, 내신 등급, 키워드로 추천 후 엑셀 저장"""
+    parser = argparse.ArgumentParser(description="5개년 입시 데이터 기반 대학 추천")
+    parser.add_argument('--csv', default=DATA_FILE, help=f"입시 데이터 CSV (기본값: {DATA_FILE})")
+    parser.add_argument('--grade', type=float, help="내신 평균 등급")
+    parser.add_argument('--keyword', required=True, help="희망 전공 키워드 (공백으로 여러 개)")
+    parser.add_argument('--output', help="엑셀 저장 경로 (생략하면 화면 출력만)")
+    parser.add_argument('--num-results', type=int, default=30, help="추천 개수 (기본값: 30)")
+    parser.add_argument('--name', default='', help="학생 이름")
+    parser.add_argument('--school', default='', help="학교명")
+    parser.add_argument('--school-year', default='2학년', help="학년 (기본값: 2학년)")
+    parser.add_argument('--no-snapshot', action='store_true', help="스냅샷을 쓰지 않고 CSV 를 다시 파싱")
+    parser.add_argument('--timing', action='store_true', help="단계별 소요 시간 출력")
+    parser.add_argument('--metrics', help="단계별 측정 결과를 Prometheus 텍스트 파일로 저장")
+    parser.add_argument('--policy', help="추천 기준 파일 (JSON/TOML)")
+    parser.add_argument('--policy-name', help="정책 파일에 여러 기준이 있을 때 사용할 이름")
+    parser.add_argument('--year-weighting', choices=YEAR_WEIGHTING_SCHEMES,
+                        help="년도 가중치 방식 (기본값: 추천 기준의 설정)")
+    parser.add_argument('--half-life', type=float, default=2.0, help="exponential 방식의 반감기 (년)")
+    parser.add_argument('--sample-std', action='store_true', help="안정성을 표본표준편차로 계산 (기본값: 모표준편차)")
+    parser.add_argument('--trend', action='store_true', help="년도별 컷 추세 기울기 출력")
+    parser.add_argument('--fuzzy', action='store_true', help="일치하는 학과가 없으면 오타를 허용해서 비슷한 학과로 검색")
+    parser.add_argument('--expand', nargs='?', const=SYNONYM_FILE, metavar='FILE',
+                        help=f"관련 학과까지 함께 검색 (관련 학과 키워드 파일, 기본값: {SYNONYM_FILE})")
+    parser.add_argument('--sweep-grades', help="비교할 성적 (예: 2.3:2.7:0.2 또는 2.3,2.5,2.7)")
+    parser.add_argument('--sweep-keyword', action='append', default=[],
+                        help="비교할 전공 키워드 추가 (여러 번 지정 가능)")
+    args = parser.parse_args(argv)
+    
+    sweep = bool(args.sweep_grades or args.sweep_keyword)
+    if args.sweep_grades:
+        try:
+            grades = parse_grade_list(args.sweep_grades)
+        except ValueError:
+            parser.error(f"--sweep-grades 형식이 올바르지 않습니다: {args.sweep_grades}")
+    elif args.grade is not None:
+        grades = [args.grade]
+    else:
+        parser.error("--grade 또는 --sweep-grades 가 필요합니다.")
+    if sweep and args.output:
+        parser.error("--output 은 비교 모드(--sweep-*)에서 지원하지 않습니다.")
+    
+    policy = DEFAULT_POLICY
+    if args.policy:
+        try:
+            policies = load_policies(args.policy)
+        except (OSError, ValueError) as e:
+            parser.error(f"추천 기준 파일을 읽을 수 없습니다: {e}")
+        if args.policy_name:
+            if args.policy_name not in policies:
+                parser.error(f"정책 '{args.policy_name}' 이 없습니다 (가능: {', '.join(policies)})")
+            policy = policies[args.policy_name]
+        else:
+            policy = next(iter(policies.values()))
+    
+    if args.metrics:
+        # 종료 시 저장 (실행 중에도 write_interval 마다 갱신)
+        METRICS.configure(path=args.metrics)
+    
+    timings = []
+    started = time.perf_counter()
+    
+    df, source = load_admissions_file(args.csv, use_snapshot=not args.no_snapshot)
+    if df is None:
+        print(f"CSV 파일을 읽을 수 없습니다: {args.csv}", file=sys.stderr)
+        return 1
+    timings.append(('load', time.perf_counter() - started))
+    
+    step = time.perf_counter()
+    year_weighting = None
+    if args.year_weighting:
+        year_weighting = {'scheme': args.year_weighting}
+        if args.year_weighting == 'exponential':
+            year_weighting['half_life'] = args.half_life
+    summary = aggregate_programs(df, year_weighting, stability_ddof=1 if args.sample_std else 0,
+                                 trend=args.trend, policy=policy)
+    index = build_major_index(df)
+    synonyms = None
+    if args.expand:
+        try:
+            groups = load_major_synonyms(args.expand)
+        except (OSError, ValueError) as e:
+            print(f"관련 학과 키워드 파일을 읽을 수 없습니다: {e}", file=sys.stderr)
+            return 1
+        synonyms = build_synonym_graph(index, get_major_keywords(df), groups)
+    timings.append(('prepare', time.perf_counter() - step))
+    
+    if sweep:
+        step = time.perf_counter()
+        result, error = sweep_recommendations(
+            df, [args.keyword] + args.sweep_keyword, grades, args.num_results, summary=summary, index=index,
+            policy=policy, fuzzy=args.fuzzy, synonyms=synonyms
+        )
+        timings.append(('sweep', time.perf_counter() - step))
+        if error:
+            print(error, file=sys.stderr)
+            return 1
+        print(f"데이터 {len(df):,}개 ({source}) / 후보 프로그램 {len(result['programs'])}개")
+        print(format_sweep(result))
+        if args.timing:
+            print_timings(timings)
+        return 0
+    
+    step = time.perf_counter()
+    distribution = {}
+    recommendations, filtered, error = find_recommendations(
+        df, args.keyword, grades[0], args.num_results, summary=summary, index=index, policy=policy,
+        distribution=distribution, fuzzy=args.fuzzy, synonyms=synonyms
+    )
+    timings.append(('recommend', time.perf_counter() - step))
+    if error:
+        print(error, file=sys.stderr)
+        return 1
+    if 'expanded_terms' in distribution:
+        print(format_expanded_terms(args.keyword, distribution['expanded_terms']))
+    if 'fuzzy_matches' in distribution:
+        print(format_fuzzy_matches(args.keyword, distribution['fuzzy_matches']))
+    
+    print(f"데이터 {len(df):,}개 ({source}) / 추천 {len(recommendations)}개")
+    print(format_recommendations(recommendations))
+    
+    if args.output:
+        step = time.perf_counter()
+        student_info = {
+            'name': args.name,
+            'school': args.school,
+            'grade': args.school_year,
+            'major': args.keyword
+        }
+        output = create_excel_output(student_info, recommendations, filtered)
+        with open(args.output, 'wb') as f:
+            f.write(output.getvalue())
+        timings.append(('excel', time.perf_counter() - step))
+        print(f"엑셀 저장: {args.output}")
+    
+    if args.timing:
+        print_timings(timings)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
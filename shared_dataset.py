@@ -0,0 +1,440 @@
+"""입시 데이터 공유 메모리 (여러 Streamlit 서버 프로세스가 한 벌만 사용)
+
+파싱된 데이터, 통계표, 학과 검색 인덱스를 multiprocessing.shared_memory 블록에 한 번만 올리고
+다른 프로세스/세션은 같은 이름(데이터 버전 기준)의 블록에 붙어서 복사 없이 NumPy 배열로 읽는다.
+카테고리 이름처럼 작은 값만 프로세스마다 만든다.
+
+블록 구조: [magic 8B][헤더 길이 8B][헤더 JSON][배열들 (64B 정렬)]
+magic 은 마지막에 기록하므로 magic 이 있으면 완전히 기록된 블록이다.
+블록은 resource_tracker 에 맡기지 않으므로 이름은 직접 지운다.
+  - 데이터 버전이 바뀔 때 release_segment(..., unlink=True)
+  - 프로세스 종료 시 이 프로세스가 만든 현재 블록 (atexit)
+  - 시작할 때 remove_stale_segments() 로 다른 버전 / 쓰지 않는 정책의 블록
+    (강제 종료된 프로세스가 남긴 블록 정리)
+이름을 지워도 이미 붙어 있던 프로세스는 그대로 사용 가능하다.
+"""
+import atexit
+import hashlib
+import json
+import os
+import re
+import struct
+import threading
+import time
+from collections import OrderedDict
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from recommendation_core import build_major_index
+
+# 블록 이름 접두어 (macOS 는 이름 31자 제한)
+SEGMENT_PREFIX = 'kru'
+MAGIC = b'KRUSHM01'
+ALIGNMENT = 64
+# 다른 프로세스가 기록 중인 블록을 기다리는 최대 시간 (초)
+ATTACH_TIMEOUT = 10.0
+# POSIX 공유 메모리 이름이 보이는 디렉터리 (Linux)
+SHM_DIR = '/dev/shm'
+
+# 이 프로세스가 연 블록 (배열이 버퍼를 참조하는 동안 열어둠)
+_segments = {}
+# 사용을 끝냈지만 아직 배열을 쓰는 세션이 있어 닫지 못한 블록
+_retired = []
+# 이 프로세스가 만든 블록 이름 (종료 시 아직 사용 중이면 삭제)
+_created = set()
+_lock = threading.Lock()
+
+
+def segment_name(kind, version, key=''):
+    """데이터 버전(+정책 등 key)별 블록 이름"""
+    digest = hashlib.sha256(f"{kind}|{version}|{key}".encode('utf-8')).hexdigest()[:20]
+    return f"{SEGMENT_PREFIX}_{kind[0]}_{digest}"
+
+
+def _align(size):
+    return (size + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _open_segment(name, size=0):
+    """블록 열기 (size > 0 이면 새로 생성)
+
+    프로세스가 끝날 때 resource_tracker 가 블록을 지우지 않도록 추적하지 않는다.
+    """
+    create = size > 0
+    try:
+        return shared_memory.SharedMemory(name=name, create=create, size=size, track=False)
+    except TypeError:
+        # Python 3.12 이하: track 인자가 없어서 등록 후 해제
+        shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+        if os.name == 'posix':
+            from multiprocessing import resource_tracker
+            try:
+                resource_tracker.unregister(shm._name, 'shared_memory')
+            except Exception:
+                pass
+        return shm
+
+
+def _unlink(name):
+    """블록 이름 삭제 (Windows 는 마지막 핸들이 닫힐 때 자동 삭제)"""
+    if os.name != 'posix':
+        return
+    try:
+        # SharedMemory.unlink() 는 resource_tracker 등록 해제까지 하므로 직접 호출
+        shared_memory._posixshmem.shm_unlink('/' + name)
+    except OSError:
+        pass
+
+
+def _buffer_array(buf, dtype, shape, offset):
+    """버퍼 위의 배열 - np.frombuffer 는 버퍼를 잡고 있어서 배열이 남아 있으면 블록을 닫을 수 없음
+    (np.ndarray(buffer=...) 는 닫힌 메모리를 가리킬 수 있음)"""
+    dtype = np.dtype(dtype)
+    count = int(np.prod(shape, dtype=np.int64))
+    return np.frombuffer(buf, dtype, count, offset).reshape(shape)
+
+
+def _write_segment(name, arrays, header):
+    """배열들과 헤더를 새 블록에 기록 (같은 이름이 있으면 FileExistsError)"""
+    layout = {}
+    offset = 0
+    for key, values in arrays.items():
+        values = arrays[key] = np.ascontiguousarray(values)
+        layout[key] = {'offset': offset, 'dtype': values.dtype.str, 'shape': list(values.shape)}
+        offset += _align(values.nbytes)
+    header_bytes = json.dumps(dict(header, arrays=layout), ensure_ascii=False).encode('utf-8')
+    data_start = _align(16 + len(header_bytes))
+
+    shm = _open_segment(name, data_start + offset + ALIGNMENT)
+    try:
+        buf = shm.buf
+        buf[8:16] = struct.pack('<Q', len(header_bytes))
+        buf[16:16 + len(header_bytes)] = header_bytes
+        for key, values in arrays.items():
+            target = _buffer_array(buf, values.dtype, values.shape, data_start + layout[key]['offset'])
+            target[...] = values
+            del target
+        # magic 을 마지막에 기록 - 다른 프로세스는 이후에만 읽음
+        buf[0:8] = MAGIC
+        del buf
+    except BaseException:
+        _unlink(name)
+        _retired.append(shm)
+        raise
+    return shm
+
+
+def _read_header(buf):
+    """(헤더 dict, 배열 시작 위치) - 아직 기록 중이면 None"""
+    if bytes(buf[0:8]) != MAGIC:
+        return None
+    header_length, = struct.unpack('<Q', bytes(buf[8:16]))
+    header = json.loads(bytes(buf[16:16 + header_length]).decode('utf-8'))
+    return header, _align(16 + header_length)
+
+
+def _read_segment(shm):
+    """(헤더, {키: 읽기 전용 배열}) - 아직 기록 중이면 None"""
+    buf = shm.buf
+    loaded = _read_header(buf)
+    if loaded is None:
+        return None
+    header, data_start = loaded
+
+    arrays = {}
+    for key, spec in header.pop('arrays').items():
+        values = _buffer_array(buf, spec['dtype'], tuple(spec['shape']), data_start + spec['offset'])
+        values.flags.writeable = False
+        arrays[key] = values
+    return header, arrays
+
+
+def _attach(name, version):
+    """기존 블록에 붙기 - 없거나 다른 데이터면 None"""
+    deadline = time.monotonic() + ATTACH_TIMEOUT
+    while True:
+        try:
+            shm = _open_segment(name)
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            # 생성 직후 크기가 정해지기 전
+            shm = None
+
+        loaded = _read_segment(shm) if shm is not None else None
+        if loaded is not None:
+            break
+        if shm is not None:
+            shm.close()
+        if time.monotonic() > deadline:
+            # 기록하던 프로세스가 중간에 종료된 블록 - 지워서 다음에 다시 만들게 함
+            _unlink(name)
+            return None
+        time.sleep(0.01)
+
+    if loaded[0].get('version') != version:
+        # 이름(해시 앞부분)만 같은 다른 데이터
+        loaded = None
+        shm.close()
+        return None
+    return (shm,) + loaded
+
+
+@atexit.register
+def _forget_segments():
+    """종료 시 이 프로세스가 만든 현재 블록의 이름을 지우고 참조 정리
+
+    (SharedMemory.__del__ 가 아직 배열이 쓰는 블록을 닫으려다 경고하지 않도록 close 는 하지 않음)
+    """
+    for name in _created & set(_segments):
+        _unlink(name)
+    _created.clear()
+    for shm in list(_segments.values()) + _retired:
+        shm._buf = None
+        shm._mmap = None
+    _segments.clear()
+    _retired.clear()
+
+
+def _close_retired():
+    for shm in list(_retired):
+        try:
+            shm.close()
+        except BufferError:
+            # 아직 이 블록의 배열을 쓰는 세션이 있음
+            continue
+        _retired.remove(shm)
+
+
+def _share(kind, version, build, key=''):
+    """블록이 있으면 붙고, 없으면 build() 의 (배열, 헤더) 를 올림 - (헤더, 배열), 공유 실패 시 None"""
+    name = segment_name(kind, version, key)
+    with _lock:
+        _close_retired()
+        shm = _segments.get(name)
+        if shm is not None:
+            loaded = _read_segment(shm)
+            return loaded if loaded is not None and loaded[0].get('version') == version else None
+
+        attached = _attach(name, version)
+        if attached is None:
+            arrays, header = build()
+            try:
+                shm = _write_segment(name, arrays, dict(header, version=version, kind=kind, key=key))
+            except FileExistsError:
+                # 다른 프로세스가 먼저 올림
+                attached = _attach(name, version)
+            except OSError:
+                # 공유 메모리 부족 / 미지원 - 각자 메모리 사용
+                return None
+            else:
+                _created.add(name)
+                attached = (shm,) + _read_segment(shm)
+        if attached is None:
+            return None
+
+        shm, header, arrays = attached
+        _segments[name] = shm
+        return header, arrays
+
+
+def release_segment(name, unlink=False):
+    """이 프로세스에서 블록 사용 종료 (unlink=True 면 이름도 삭제)"""
+    with _lock:
+        if unlink:
+            _unlink(name)
+        _created.discard(name)
+        shm = _segments.pop(name, None)
+        if shm is not None:
+            _retired.append(shm)
+        _close_retired()
+
+
+def remove_stale_segments(version, keys=None):
+    """다른 데이터 버전의 블록 이름 삭제 - 지운 이름 목록
+
+    keys={종류: 사용하는 key 집합} 이면 같은 버전이라도 그 종류의 다른 key 블록(예: 쓰지 않는 정책의 통계표)도 지운다.
+    기록 중인 블록은 ATTACH_TIMEOUT 이 지나도록 끝나지 않았을 때만 지운다.
+    이름 목록을 볼 수 없는 환경(/dev/shm 없음)에서는 아무것도 하지 않는다.
+    """
+    if os.name != 'posix' or not os.path.isdir(SHM_DIR):
+        return []
+    pattern = re.compile(rf'^{re.escape(SEGMENT_PREFIX)}_[a-z]_[0-9a-f]{{20}}$')
+    removed = []
+    for name in sorted(os.listdir(SHM_DIR)):
+        if not pattern.match(name):
+            continue
+        try:
+            shm = _open_segment(name)
+        except (OSError, ValueError):
+            continue
+        try:
+            loaded = _read_header(shm.buf)
+        except ValueError:
+            loaded = None
+        finally:
+            shm.close()
+
+        if loaded is None:
+            try:
+                stale = time.time() - os.stat(os.path.join(SHM_DIR, name)).st_mtime > ATTACH_TIMEOUT
+            except OSError:
+                continue
+        else:
+            header = loaded[0]
+            kind = header.get('kind')
+            stale = header.get('version') != version or (
+                keys is not None and kind in keys and header.get('key', '') not in keys[kind]
+            )
+        if stale:
+            with _lock:
+                _unlink(name)
+                _created.discard(name)
+            removed.append(name)
+    return removed
+
+
+def frame_arrays(df):
+    """DataFrame → (배열 dict, 헤더) - 카테고리는 코드 배열 + 이름 목록"""
+    arrays = {}
+    columns = []
+    for idx, col in enumerate(df.columns):
+        values = df[col]
+        key = f"c{idx}"
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            arrays[key] = values.array.codes
+            columns.append({
+                'name': col,
+                'kind': 'category',
+                'categories': values.cat.categories.tolist(),
+                'ordered': bool(values.cat.ordered),
+            })
+        elif values.dtype.kind in 'biuf':
+            arrays[key] = values.to_numpy()
+            columns.append({'name': col, 'kind': 'numeric'})
+        else:
+            # 문자열 컬럼은 스냅샷과 같이 코드 + 카테고리 목록으로 저장
+            codes, categories = pd.factorize(values, sort=True)
+            arrays[key] = codes.astype(np.int32)
+            columns.append({
+                'name': col,
+                'kind': 'category',
+                'dtype': str(values.dtype),
+                'categories': [str(c) for c in categories],
+            })
+
+    attrs = {}
+    for key, value in df.attrs.items():
+        try:
+            json.dumps(value)
+        except TypeError:
+            continue
+        attrs[key] = value
+    return arrays, {'rows': len(df), 'columns': columns, 'attrs': attrs}
+
+
+def frame_from_arrays(header, arrays):
+    """공유 배열을 복사 없이 감싼 DataFrame"""
+    data = {}
+    for idx, col in enumerate(header['columns']):
+        values = arrays[f"c{idx}"]
+        if col['kind'] == 'category':
+            dtype = pd.CategoricalDtype(col['categories'], ordered=col.get('ordered', False))
+            values = pd.Categorical.from_codes(values, dtype=dtype)
+            if col.get('dtype', 'category') != 'category':
+                values = pd.Series(values).astype(col['dtype'])
+        data[col['name']] = values
+
+    df = pd.DataFrame(data, copy=False)
+    df.attrs.update(header['attrs'])
+    return df
+
+
+def share_frame(version, build, kind='data', key=''):
+    """데이터 버전(+key)별 공유 DataFrame - 없으면 build() 결과를 올림
+
+    공유 메모리를 쓸 수 없으면 build() 결과를 그대로 반환한다.
+    """
+    built = []
+
+    def build_arrays():
+        built.append(build())
+        return frame_arrays(built[0])
+
+    shared = _share(kind, version, build_arrays, key)
+    if shared is None:
+        return built[0] if built else build()
+    return frame_from_arrays(*shared)
+
+
+def attach_frame(version, kind='data', key=''):
+    """이미 올라간 공유 DataFrame 에 붙기 (만들지 않음) - 없으면 None"""
+    name = segment_name(kind, version, key)
+    with _lock:
+        shm = _segments.get(name)
+        if shm is not None:
+            loaded = _read_segment(shm)
+        else:
+            attached = _attach(name, version)
+            if attached is None:
+                return None
+            shm, *loaded = attached
+            _segments[name] = shm
+    return frame_from_arrays(*loaded) if loaded is not None else None
+
+
+def _postings_arrays(postings, prefix, arrays, header):
+    """posting 목록 dict → 시작 위치 + 이어붙인 ID 배열 (gram 목록은 헤더)"""
+    grams = list(postings)
+    lengths = [len(postings[gram]) for gram in grams]
+    arrays[f'{prefix}_starts'] = np.concatenate(([0], np.cumsum(lengths, dtype=np.int64)))
+    arrays[f'{prefix}_ids'] = (np.concatenate([postings[gram] for gram in grams])
+                               if grams else np.array([], dtype=np.int64))
+    header[f'{prefix}_grams'] = grams
+
+
+def _postings_from_arrays(prefix, arrays, header):
+    starts = arrays[f'{prefix}_starts']
+    ids = arrays[f'{prefix}_ids']
+    return {gram: ids[starts[i]:starts[i + 1]] for i, gram in enumerate(header[f'{prefix}_grams'])}
+
+
+def index_arrays(index):
+    """학과 검색 인덱스 → (배열 dict, 헤더)"""
+    arrays = {
+        'row_order': index['row_order'],
+        'row_starts': index['row_starts'],
+    }
+    header = {
+        'majors': [str(m) for m in index['majors']],
+        'normalized': list(index['normalized']),
+        'jamo': list(index['jamo']),
+    }
+    _postings_arrays(index['postings'], 'posting', arrays, header)
+    _postings_arrays(index['jamo_postings'], 'jamo_posting', arrays, header)
+    return arrays, header
+
+
+def index_from_arrays(header, arrays):
+    """공유 배열을 감싼 학과 검색 인덱스 (검색 결과 캐시는 프로세스별)"""
+    return {
+        'majors': np.asarray(header['majors'], dtype=object),
+        'normalized': header['normalized'],
+        'postings': _postings_from_arrays('posting', arrays, header),
+        'jamo': header['jamo'],
+        'jamo_postings': _postings_from_arrays('jamo_posting', arrays, header),
+        'row_order': arrays['row_order'],
+        'row_starts': arrays['row_starts'],
+        'match_cache': OrderedDict(),
+        'match_lock': threading.Lock(),
+    }
+
+
+def share_major_index(version, df):
+    """데이터 버전별 공유 학과 검색 인덱스 - 공유 메모리를 쓸 수 없으면 직접 생성"""
+    shared = _share('index', version, lambda: index_arrays(build_major_index(df)))
+    if shared is None:
+        return build_major_index(df)
+    return index_from_arrays(*shared)
@@ -0,0 +1,270 @@
+"""단계별 처리 시간 측정 (CSV 로드, 키워드 추출, 평가표 읽기, 검색, 집계, 선택, 엑셀 생성)
+
+with stage('aggregate') as timer: ... 또는 @timed('keywords') 로 감싼 구간의
+시간 / 처리 행 수 / 최대 추가 메모리를 단계별 링 버퍼(최근 capacity 건)에 기록한다.
+분위수(p50/p95)는 링 버퍼 기준, 건수/합계는 프로세스 시작 이후 누계이다.
+
+path 를 설정하면 write_interval 초마다 Prometheus 텍스트 형식 파일로 저장한다
+(node_exporter textfile collector 등에서 수집, 경로에 {pid} 를 넣으면 프로세스별 파일).
+최대 메모리는 tracemalloc 이 켜져 있을 때만 기록한다 (trace_memory=True).
+tracemalloc 의 최대값은 프로세스에 하나뿐이라, 최대값을 초기화하기 전에 측정 중인 모든 단계
+(다른 스레드 포함)에 지금까지의 최대값을 반영한다. 그래서 동시에 실행되는 단계끼리 서로의 최대값을
+지우지 않지만, 값은 단계 구간 동안의 프로세스 전체 최대 추가 메모리라서 같은 시간에 실행된
+다른 세션의 할당도 포함될 수 있다 (참고용 상한값).
+"""
+import atexit
+import functools
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+import numpy as np
+
+# 단계 이름 → 화면 표시용 이름
+STAGE_LABELS = {
+    'snapshot_load': '스냅샷 로드',
+    'csv_load': 'CSV 로드',
+    'keywords': '키워드 추출',
+    'workbook_parse': '평가표 읽기',
+    'search': '학과 검색',
+    'fuzzy_search': '오타 검색',
+    'aggregate': '그룹 집계',
+    'select': '추천 선택',
+    'sweep': '성적/전공 비교',
+    'excel_build': '엑셀 생성',
+}
+METRIC_PREFIX = 'kru_stage'
+QUANTILES = (0.5, 0.95)
+
+
+class StageTimer:
+    """한 번의 단계 측정 - with 블록 안에서 rows 를 채울 수 있음"""
+
+    __slots__ = ('name', 'rows', 'seconds', 'peak_bytes', '_base', '_peak_seen')
+
+    def __init__(self, name, rows=None):
+        self.name = name
+        self.rows = rows
+        self.seconds = None
+        self.peak_bytes = None
+        self._base = 0
+        self._peak_seen = 0
+
+
+class StageMetrics:
+    """단계별 링 버퍼 + 누계"""
+
+    def __init__(self, capacity=500, path=None, write_interval=10.0, labels=None):
+        self.capacity = capacity
+        self.path = path
+        self.write_interval = write_interval
+        self.labels = dict(labels or {})
+        # 단계 → deque[(초, 행 수, 최대 메모리)]
+        self._samples = {}
+        # 단계 → [건수, 초 합계, 행 수 합계]
+        self._totals = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._last_write = None
+
+    def configure(self, path=None, write_interval=None, capacity=None, trace_memory=None, labels=None):
+        """설정 변경 - path 의 {pid} 는 프로세스 ID 로 바꾸고 pid 라벨을 붙임"""
+        with self._lock:
+            if path is not None:
+                if '{pid}' in path:
+                    path = path.replace('{pid}', str(os.getpid()))
+                    self.labels['pid'] = str(os.getpid())
+                self.path = path
+            if write_interval is not None:
+                self.write_interval = write_interval
+            if capacity is not None and capacity != self.capacity:
+                self.capacity = capacity
+                self._samples = {name: deque(samples, maxlen=capacity) for name, samples in self._samples.items()}
+            if labels:
+                self.labels.update(labels)
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        elif trace_memory is False and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def stage(self, name, rows=None):
+        """단계 측정 컨텍스트 (예외가 나도 기록)"""
+        return _StageContext(self, StageTimer(name, rows))
+
+    def record(self, timer):
+        """측정 결과 추가 (write_interval 이 지났으면 파일도 저장)"""
+        with self._lock:
+            samples = self._samples.get(timer.name)
+            if samples is None:
+                samples = self._samples[timer.name] = deque(maxlen=self.capacity)
+                self._totals[timer.name] = [0, 0.0, 0]
+            samples.append((timer.seconds, timer.rows, timer.peak_bytes))
+            totals = self._totals[timer.name]
+            totals[0] += 1
+            totals[1] += timer.seconds
+            totals[2] += timer.rows or 0
+
+        if self.path:
+            now = time.monotonic()
+            if self._last_write is None or now - self._last_write >= self.write_interval:
+                self._last_write = now
+                self.write_prometheus()
+
+    def reset(self):
+        with self._lock:
+            self._samples = {}
+            self._totals = {}
+
+    def summary(self):
+        """단계별 통계 목록 - stage, count, window, p50, p95, max, mean_rows, peak_bytes"""
+        with self._lock:
+            items = [(name, list(samples), list(self._totals[name])) for name, samples in self._samples.items()]
+
+        stats = []
+        for name, samples, (count, seconds_sum, rows_sum) in items:
+            seconds = np.array([sample[0] for sample in samples])
+            rows = [sample[1] for sample in samples if sample[1] is not None]
+            peaks = [sample[2] for sample in samples if sample[2] is not None]
+            p50, p95 = np.quantile(seconds, QUANTILES)
+            stats.append({
+                'stage': name,
+                'count': count,
+                'window': len(samples),
+                'seconds_sum': seconds_sum,
+                'rows_sum': rows_sum,
+                'p50': float(p50),
+                'p95': float(p95),
+                'max': float(seconds.max()),
+                'mean_rows': float(np.mean(rows)) if rows else None,
+                'peak_bytes': max(peaks) if peaks else None,
+            })
+        return stats
+
+    def prometheus_text(self):
+        """Prometheus 텍스트 형식 (단계별 summary + 행 수 counter + 최대 메모리 gauge)"""
+        stats = self.summary()
+        duration = f"{METRIC_PREFIX}_duration_seconds"
+        lines = [
+            f"# HELP {duration} Stage wall time (quantiles over the last {self.capacity} runs).",
+            f"# TYPE {duration} summary",
+        ]
+        for stat in stats:
+            for quantile, key in zip(QUANTILES, ('p50', 'p95')):
+                lines.append(f"{duration}{self._labels(stat['stage'], quantile=quantile)} {stat[key]:.6g}")
+            lines.append(f"{duration}_sum{self._labels(stat['stage'])} {stat['seconds_sum']:.6g}")
+            lines.append(f"{duration}_count{self._labels(stat['stage'])} {stat['count']}")
+
+        rows = f"{METRIC_PREFIX}_rows_total"
+        lines += [f"# HELP {rows} Rows processed per stage.", f"# TYPE {rows} counter"]
+        lines += [f"{rows}{self._labels(stat['stage'])} {stat['rows_sum']}" for stat in stats]
+
+        peak = f"{METRIC_PREFIX}_peak_bytes"
+        lines += [f"# HELP {peak} Largest peak allocation in the window (tracemalloc).", f"# TYPE {peak} gauge"]
+        lines += [
+            f"{peak}{self._labels(stat['stage'])} {stat['peak_bytes']}"
+            for stat in stats if stat['peak_bytes'] is not None
+        ]
+        return '\n'.join(lines) + '\n'
+
+    def _labels(self, stage, **extra):
+        labels = dict(self.labels, stage=stage, **extra)
+        return '{' + ','.join(f'{key}="{_escape_label(value)}"' for key, value in labels.items()) + '}'
+
+    def write_prometheus(self, path=None):
+        """메트릭 파일 저장 (임시 파일 후 교체) - 실패해도 앱은 계속 실행"""
+        path = path or self.path
+        if not path:
+            return False
+        with self._write_lock:
+            try:
+                directory = os.path.dirname(path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                tmp_path = f"{path}.tmp-{os.getpid()}"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(self.prometheus_text())
+                os.replace(tmp_path, path)
+                return True
+            except OSError:
+                return False
+
+
+# 최대 메모리 측정 중인 단계 (모든 스레드) - tracemalloc 최대값 초기화는 이 잠금 안에서만
+_tracing_timers = set()
+_tracing_lock = threading.Lock()
+
+
+def _fold_peak(peak):
+    """측정 중인 모든 단계에 지금까지의 최대 메모리 반영 (_tracing_lock 안에서 호출)"""
+    for timer in _tracing_timers:
+        timer._peak_seen = max(timer._peak_seen, peak)
+
+
+class _StageContext:
+    """StageMetrics.stage() 컨텍스트
+
+    시작할 때 최대값을 초기화하기 전에 측정 중인 다른 단계(중첩된 바깥 단계, 다른 스레드의 단계)에
+    지금까지의 최대값을 반영하므로 어느 단계도 자기 구간의 최대값을 잃지 않는다.
+    """
+
+    __slots__ = ('metrics', 'timer', '_start', '_tracing')
+
+    def __init__(self, metrics, timer):
+        self.metrics = metrics
+        self.timer = timer
+
+    def __enter__(self):
+        self._tracing = tracemalloc.is_tracing()
+        if self._tracing:
+            with _tracing_lock:
+                current, peak = tracemalloc.get_traced_memory()
+                _fold_peak(peak)
+                tracemalloc.reset_peak()
+                self.timer._base = self.timer._peak_seen = current
+                _tracing_timers.add(self.timer)
+        self._start = time.perf_counter()
+        return self.timer
+
+    def __exit__(self, exc_type, exc, tb):
+        timer = self.timer
+        timer.seconds = time.perf_counter() - self._start
+        if self._tracing:
+            with _tracing_lock:
+                if tracemalloc.is_tracing():
+                    _fold_peak(tracemalloc.get_traced_memory()[1])
+                    timer.peak_bytes = timer._peak_seen - timer._base
+                _tracing_timers.discard(timer)
+        self.metrics.record(timer)
+        return False
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# 프로세스 전체에서 쓰는 기본 측정기
+METRICS = StageMetrics()
+
+
+def stage(name, rows=None):
+    """기본 측정기로 단계 측정"""
+    return METRICS.stage(name, rows)
+
+
+def timed(name, rows=None):
+    """함수 전체를 한 단계로 측정하는 데코레이터 - rows 는 같은 인자를 받아 처리 행 수를 반환"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with METRICS.stage(name, rows(*args, **kwargs) if rows is not None else None):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@atexit.register
+def _write_on_exit():
+    if METRICS.path:
+        METRICS.write_prometheus()
@@ -0,0 +1,31 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark import CSV_HEADER  # noqa: E402
+
+
+def write_admissions_csv(file_path, rows):
+    """(년도, 대학명, 중심전형, 전형명, 모집단위, 70%컷) 목록 → 13개 컬럼 입시 CSV"""
+    records = [
+        {
+            '년도': year, '대학명': university, '중심전형': admission_type, '전형명': admission_name,
+            '모집단위': major, '모집인원': 10, '경쟁률': 5.0, '충원순위': 3,
+            '50%컷': cut - 0.1, '70%컷': cut, '85%컷': cut + 0.2, '90%컷': cut + 0.3, '반영교과목': '국영수사',
+        }
+        for year, university, admission_type, admission_name, major, cut in rows
+    ]
+    directory = os.path.dirname(file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    pd.DataFrame(records, columns=CSV_HEADER).to_csv(file_path, index=False, encoding='utf-8-sig')
+    return file_path
+
+
+@pytest.fixture
+def admissions_csv():
+    return write_admissions_csv
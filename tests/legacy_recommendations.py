@@ -0,0 +1,190 @@
+"""리팩터링 이전(행 단위 반복) 추천 로직 - 결과 비교용 기준
+
+기준 커밋의 load_admissions_data / find_recommendations 를 화면 출력(st.*)만 빼고 그대로 옮겼다.
+corrected=True 이면 이후 요청에서 의도적으로 바꾼 부분을 반영한다.
+  user-015: 년도가 숫자여도 가중치 표가 적용되도록 (기존: '2025.0' 같은 문자열 키로 0.5)
+  user-016: 안정성은 선택된 컷의 모표준편차 (기존: 컷이 없는 행이 있으면 가중치와 어긋남)
+"""
+import numpy as np
+import pandas as pd
+
+LEGACY_COLUMNS = [
+    'year', 'university_name', 'admission_type', 'admission_name',
+    'major_name', 'quota', 'comp_rate', 'pass_rank',
+    'cut_grade_50', 'cut_grade_70', 'cut_grade_85', 'cut_grade_90',
+    'reflected_subjects'
+]
+
+
+def legacy_load(file_path, encoding='utf-8-sig'):
+    df = pd.read_csv(file_path, encoding=encoding)
+    df.columns = LEGACY_COLUMNS
+    numeric_cols = ['quota', 'comp_rate', 'pass_rank',
+                    'cut_grade_50', 'cut_grade_70', 'cut_grade_85', 'cut_grade_90']
+    for col in numeric_cols:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df
+
+
+def flexible_search(text, keyword):
+    if pd.isna(text) or not keyword:
+        return False
+    text = str(text).lower()
+    keyword = str(keyword).lower()
+    keywords = keyword.split()
+    if not keywords:
+        return False
+    for kw in keywords:
+        kw = kw.strip()
+        if not kw:
+            continue
+        text_no_space = text.replace(' ', '').replace('・', '')
+        kw_no_space = kw.replace(' ', '').replace('・', '')
+        if kw in text or kw_no_space in text_no_space:
+            return True
+    return False
+
+
+def categorize_university(student_grade, cut_grade):
+    diff = student_grade - cut_grade
+    if diff >= 1.5:
+        return '강상향'
+    elif diff >= 0.8:
+        return '상향'
+    elif diff >= 0.3:
+        return '약상향'
+    elif diff >= -0.3:
+        return '적정'
+    elif diff >= -0.8:
+        return '강적정'
+    elif diff >= -1.5:
+        return '안정'
+    else:
+        return '강안정'
+
+
+def _year_key(year, corrected):
+    if corrected and pd.notna(year):
+        return str(int(float(year)))
+    return str(year)
+
+
+def legacy_find_recommendations(df, major_keyword, student_grade, num_results=30, corrected=False):
+    filtered = df[df['major_name'].apply(lambda x: flexible_search(x, major_keyword))]
+    if len(filtered) == 0:
+        return None, None, f"'{major_keyword}' 관련 학과를 찾을 수 없습니다."
+
+    year_weights = {'2025': 1.0, '2024': 0.8, '2023': 0.6, '2022': 0.4, '2021': 0.3}
+
+    results = []
+    grouped = filtered.groupby(['university_name', 'major_name', 'admission_type', 'admission_name'])
+
+    for (univ, major, adm_type, adm_name), group in grouped:
+        weighted_cuts = []
+        chosen_cuts = []
+        weights_sum = 0
+        comp_rates = []
+
+        latest_row = group[group['year'] == group['year'].max()].iloc[0]
+        latest_cut_70 = None
+        if pd.notna(latest_row['cut_grade_70']) and latest_row['cut_grade_70'] > 0:
+            latest_cut_70 = float(latest_row['cut_grade_70'])
+
+        for _, row in group.iterrows():
+            year = _year_key(row.get('year', '2025'), corrected)
+            weight = year_weights.get(year, 0.5)
+
+            cut_grade = None
+            for col in ['cut_grade_70', 'cut_grade_50', 'cut_grade_85', 'cut_grade_90']:
+                if pd.notna(row[col]) and row[col] > 0:
+                    try:
+                        cut_grade = float(row[col])
+                        break
+                    except:  # noqa: E722
+                        continue
+
+            if cut_grade:
+                weighted_cuts.append(cut_grade * weight)
+                chosen_cuts.append(cut_grade)
+                weights_sum += weight
+
+            if pd.notna(row['comp_rate']):
+                comp_rates.append(float(row['comp_rate']))
+
+        if weights_sum > 0:
+            avg_cut_grade = sum(weighted_cuts) / weights_sum
+        else:
+            avg_cut_grade = None
+
+        is_jonghap = '종합' in str(adm_type)
+
+        if avg_cut_grade and avg_cut_grade > 0:
+            category = categorize_university(float(student_grade), avg_cut_grade)
+            diff = abs(float(student_grade) - avg_cut_grade)
+        else:
+            category = '정보없음'
+            diff = 999
+
+        if len(weighted_cuts) > 1:
+            if corrected:
+                grades = chosen_cuts
+            else:
+                grades = [c / w for c, w in zip(weighted_cuts, [
+                    year_weights.get(_year_key(row.get('year', '2025'), corrected), 0.5)
+                    for _, row in group.iterrows()
+                ]) if w > 0]
+            if len(grades) > 1:
+                stability = np.std(grades)
+            else:
+                stability = 0
+        else:
+            stability = 999
+
+        avg_comp_rate = np.mean(comp_rates) if comp_rates else latest_row.get('comp_rate', None)
+
+        results.append({
+            'university': univ,
+            'major': major,
+            'admission_type': adm_type,
+            'admission_name': adm_name,
+            'category': category,
+            'diff': diff,
+            'cut_grade': avg_cut_grade,
+            'comp_rate': avg_comp_rate,
+            'is_jonghap': is_jonghap,
+            'priority': 0 if is_jonghap else 1,
+            'stability': stability,
+            'years_data': len(group),
+            'latest_cut_70': latest_cut_70
+        })
+
+    recommendations = []
+    used = set()
+    category_targets = {'강상향': 3, '상향': 5, '약상향': 5, '적정': 7, '강적정': 5, '안정': 3, '강안정': 2}
+
+    for cat, target_count in category_targets.items():
+        cat_results = [r for r in results if r['category'] == cat]
+        if cat_results:
+            sorted_results = sorted(cat_results, key=lambda x: (x['priority'], x['diff'], x['stability']))
+            added = 0
+            for result in sorted_results:
+                if added >= target_count:
+                    break
+                key = (result['university'], result['major'])
+                if key not in used:
+                    recommendations.append(result)
+                    used.add(key)
+                    added += 1
+
+    if len(recommendations) < num_results:
+        remaining = [r for r in results if (r['university'], r['major']) not in used]
+        sorted_remaining = sorted(remaining, key=lambda x: (x['priority'], x['diff'], x['stability']))
+        for result in sorted_remaining:
+            if len(recommendations) >= num_results:
+                break
+            key = (result['university'], result['major'])
+            if key not in used:
+                recommendations.append(result)
+                used.add(key)
+
+    return recommendations[:num_results], filtered, None
@@ -0,0 +1,110 @@
+import json
+import sqlite3
+import threading
+import time
+
+from activity_log import ActivityLogger, JsonlSink, SqliteSink
+
+
+class RecordingSink(JsonlSink):
+    """배치 크기를 기록하는 JSONL sink"""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.batches = []
+
+    def write_batch(self, events):
+        super().write_batch(events)
+        self.batches.append(len(events))
+
+
+class BlockingSink(JsonlSink):
+    """release 될 때까지 기록을 멈추는 JSONL sink (느린 Google Sheets 대신)"""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def write_batch(self, events):
+        self.entered.set()
+        self.release.wait(10)
+        super().write_batch(events)
+
+
+def read_lines(path):
+    if not path.exists():
+        return []
+    return [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_events_are_batched(tmp_path):
+    path = tmp_path / 'log.jsonl'
+    sink = RecordingSink(str(path))
+    logger = ActivityLogger([sink], batch_size=3, flush_interval=60)
+    for i in range(7):
+        assert logger.log('kim', f'recommend_{i}', ip='1.2.3.4')
+
+    # 개수 기준으로 3개씩 기록, 남은 1개는 flush_interval 전까지 대기
+    assert wait_for(lambda: len(read_lines(path)) == 6)
+    assert sink.batches == [3, 3]
+
+    logger.close()
+    events = read_lines(path)
+    assert sink.batches == [3, 3, 1]
+    assert [event['activity'] for event in events] == [f'recommend_{i}' for i in range(7)]
+    assert events[0]['user'] == 'kim' and events[0]['ip'] == '1.2.3.4'
+
+
+def test_flush_interval_writes_partial_batch(tmp_path):
+    path = tmp_path / 'log.jsonl'
+    logger = ActivityLogger([JsonlSink(str(path))], batch_size=100, flush_interval=0.05)
+    logger.log('kim', 'login')
+    assert wait_for(lambda: len(read_lines(path)) == 1)
+    logger.close()
+
+
+def test_close_flushes_pending_to_sqlite(tmp_path):
+    path = tmp_path / 'log.db'
+    logger = ActivityLogger([SqliteSink(str(path))], batch_size=100, flush_interval=60)
+    for i in range(5):
+        logger.log('lee', 'download_excel', detail=str(i))
+    logger.close()
+
+    with sqlite3.connect(path) as conn:
+        rows = conn.execute("SELECT user, activity, detail FROM activity_log ORDER BY rowid").fetchall()
+    assert rows == [('lee', 'download_excel', str(i)) for i in range(5)]
+    # 두 번 닫아도 문제 없음
+    logger.close()
+
+
+def test_full_queue_drops_without_blocking(tmp_path):
+    path = tmp_path / 'log.jsonl'
+    sink = BlockingSink(str(path))
+    logger = ActivityLogger([sink], max_queue=2, batch_size=1, flush_interval=60)
+
+    # 첫 이벤트를 기록하는 동안 스레드가 멈춰 있으므로 큐에는 2개만 들어감
+    assert logger.log('kim', 'first')
+    assert sink.entered.wait(5)
+    assert logger.log('kim', 'queued_1')
+    assert logger.log('kim', 'queued_2')
+
+    start = time.perf_counter()
+    results = [logger.log('kim', f'overflow_{i}') for i in range(3)]
+    assert time.perf_counter() - start < 0.5
+    assert results == [False, False, False]
+    assert logger.dropped == 3
+
+    sink.release.set()
+    logger.close()
+    assert [event['activity'] for event in read_lines(path)] == ['first', 'queued_1', 'queued_2']
+    assert logger.failed == 0
@@ -0,0 +1,93 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from admissions_store import AdmissionsStore
+from recommendation_core import RecommendationPolicy, aggregate_programs, compute_year_weights
+
+PROGRAMS = [
+    ('가나대학교', '학생부교과', '지역균형', '컴퓨터공학과'),
+    ('가나대학교', '학생부종합', '일반전형', '경영학과'),
+    ('다라대학교', '학생부교과', '일반전형', '간호학과'),
+]
+
+
+def year_rows(year, cut):
+    return [(year, *program, cut + i * 0.5) for i, program in enumerate(PROGRAMS)]
+
+
+@pytest.fixture
+def store(tmp_path, admissions_csv):
+    base = admissions_csv(str(tmp_path / 'base.csv'), year_rows(2025, 3.0) + year_rows(2024, 4.0))
+    return AdmissionsStore(base, str(tmp_path / 'data'), use_snapshot=False, min_interval=0)
+
+
+def test_default_weights_follow_latest_year():
+    weights = compute_year_weights([2026, 2025, 2024, 2023])
+    np.testing.assert_allclose(weights, [1.0, 0.8, 0.6, 0.4])
+    # 년도를 고정한 표는 그대로
+    pinned = compute_year_weights([2026, 2025], table={2025: 1.0})
+    np.testing.assert_allclose(pinned, [0.5, 1.0])
+
+
+def test_ingested_year_gets_top_weight(store, tmp_path, admissions_csv):
+    assert store.refresh()
+    summary = store.program_summary()
+    assert summary.attrs['latest_year'] == 2025
+
+    admissions_csv(os.path.join(store.data_dir, '2026.csv'), year_rows(2026, 2.0))
+    assert store.refresh(force=True)
+    assert store.error_messages() == {}
+
+    years = store.df['year'].to_numpy()
+    weights = compute_year_weights(years)
+    assert weights[years == 2026].min() == 1.0
+    assert weights[years == 2025].max() == 0.8
+
+    # 바뀐 부분만 다시 계산한 통계표도 새 년도를 최신으로 반영
+    updated = store.program_summary()
+    pd.testing.assert_frame_equal(updated, aggregate_programs(store.df))
+    computer = updated[updated['major'] == '컴퓨터공학과'].iloc[0]
+    assert computer['cut_grade'] == pytest.approx((2.0 * 1.0 + 3.0 * 0.8 + 4.0 * 0.6) / 2.4)
+
+
+def test_pinned_table_warns_on_new_year(store, admissions_csv):
+    policy = RecommendationPolicy(year_weighting={'scheme': 'table', 'table': {2025: 1.0, 2024: 0.8}})
+    store.refresh()
+    store.program_summary(policy)
+
+    admissions_csv(os.path.join(store.data_dir, '2026.csv'), year_rows(2026, 2.0))
+    with pytest.warns(UserWarning, match='2026'):
+        store.refresh(force=True)
+
+
+def test_base_file_drops_only_invalid_rows(tmp_path, admissions_csv):
+    # 90%컷 9.5 (범위 밖) 한 행, 년도 없는 한 행
+    rows = year_rows(2025, 3.0) + year_rows(2024, 4.0) + [
+        (2025, '마바대학교', '학생부교과', '일반전형', '물리학과', 9.2),
+        (None, '마바대학교', '학생부교과', '일반전형', '화학과', 3.0),
+    ]
+    base = admissions_csv(str(tmp_path / 'base.csv'), rows)
+    store = AdmissionsStore(base, str(tmp_path / 'data'), use_snapshot=False, min_interval=0)
+
+    assert store.refresh()
+    assert store.error_messages() == {}
+    assert len(store.df) == 6
+    assert '마바대학교' not in set(store.df['university_name'])
+    assert store.df['year'].dtype == np.int16
+    notice = store.notice_messages()['base.csv']
+    assert '2개 행' in notice and '컷 등급' in notice and '년도' in notice
+    pd.testing.assert_frame_equal(store.program_summary(), aggregate_programs(store.df))
+
+
+def test_invalid_partition_is_rejected_whole(store, admissions_csv):
+    store.refresh()
+    rows = year_rows(2026, 2.0)
+    rows[0] = rows[0][:-1] + (9.2,)
+    admissions_csv(os.path.join(store.data_dir, '2026.csv'), rows)
+
+    assert not store.refresh(force=True)
+    assert '컷 등급' in store.error_messages()['2026.csv']
+    assert 2026 not in set(store.df['year'])
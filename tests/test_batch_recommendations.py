@@ -0,0 +1,88 @@
+import io
+import multiprocessing
+import warnings
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+from openpyxl import load_workbook
+
+import shared_dataset
+from benchmark import generate_admissions_csv
+from recommendation_core import (
+    aggregate_programs, build_major_index, create_batch_zip_output, load_admissions_file, run_batch_recommendations,
+)
+from shared_dataset import release_segment, segment_name, share_frame
+
+TEST_PREFIX = 'krt'
+
+
+def use_test_prefix(prefix):
+    shared_dataset.SEGMENT_PREFIX = prefix
+
+
+@pytest.fixture(scope='module')
+def batch(tmp_path_factory):
+    path = tmp_path_factory.mktemp('batch') / 'data.csv'
+    generate_admissions_csv(str(path), 2000, seed=5)
+    df, _ = load_admissions_file(str(path), use_snapshot=False)
+    students = [
+        {'name': f'학생{i}', 'school': '코드고', 'grade': '2학년', 'student_grade': 2.0 + i * 0.4, 'major': major}
+        for i, major in enumerate(['컴퓨터', '간호', '경영 경제', '', '전자'])
+    ]
+    results = run_batch_recommendations(df, students, aggregate_programs(df), build_major_index(df))
+    return df, results
+
+
+@pytest.fixture(scope='module')
+def executor():
+    with ProcessPoolExecutor(2, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=use_test_prefix, initargs=(TEST_PREFIX,)) as pool:
+        yield pool
+
+
+def workbook_values(output):
+    """zip 의 파일명 → 시트별 셀 값 (생성 시각 등 메타데이터 제외)"""
+    contents = {}
+    with zipfile.ZipFile(output) as zf:
+        for name in zf.namelist():
+            wb = load_workbook(io.BytesIO(zf.read(name)), read_only=True)
+            contents[name] = {ws.title: [tuple(row) for row in ws.iter_rows(values_only=True)] for ws in wb}
+    return contents
+
+
+def test_errors_are_reported_per_student(batch):
+    _, results = batch
+    assert [bool(r['error']) for r in results] == [False, False, False, True, False]
+
+
+def test_pool_matches_sequential(batch, executor):
+    _, results = batch
+    expected = workbook_values(create_batch_zip_output(results))
+    assert len(expected) == 4
+    assert workbook_values(create_batch_zip_output(results, executor)) == expected
+
+
+def test_pool_reads_shared_dataset(batch, executor, monkeypatch):
+    df, results = batch
+    monkeypatch.setattr(shared_dataset, 'SEGMENT_PREFIX', TEST_PREFIX)
+    version = df.attrs['data_version']
+    try:
+        shared = share_frame(version, lambda: df)
+        expected = workbook_values(create_batch_zip_output(results))
+        with warnings.catch_warnings():
+            # 순서대로 다시 만들지 않고 작업 프로세스가 공유 데이터로 생성
+            warnings.simplefilter('error')
+            output = create_batch_zip_output(results, executor, shared_version=version)
+        assert workbook_values(output) == expected
+        del shared
+    finally:
+        release_segment(segment_name('data', version), unlink=True)
+
+
+def test_pool_failure_falls_back(batch, executor):
+    _, results = batch
+    with pytest.warns(UserWarning, match='순서대로'):
+        output = create_batch_zip_output(results, executor, shared_version='없는-버전')
+    assert workbook_values(output) == workbook_values(create_batch_zip_output(results))
+
@@ -0,0 +1,106 @@
+import random
+
+import pytest
+
+import recommendation_core
+from recommendation_core import (
+    approximate_substring_distance, build_major_index, find_recommendations, fuzzy_major_matches, fuzzy_major_rows, read_admissions_csv,
+)
+
+MAJORS = [
+    '컴퓨터공학과', '컴퓨터교육과', '기계공학과', '기계시스템공학과', '전기공학과',
+    '경영학과', 'AI융합학과', '건축학과', '간호학과',
+]
+
+
+@pytest.fixture
+def data(tmp_path, admissions_csv):
+    rows = [
+        (year, university, '학생부교과', '일반전형', major, 2.0 + i * 0.3)
+        for year in (2024, 2025)
+        for university in ('가대학교', '나대학교')
+        for i, major in enumerate(MAJORS)
+    ]
+    df, _ = read_admissions_csv(admissions_csv(str(tmp_path / 'data.csv'), rows))
+    return df, build_major_index(df)
+
+
+def substring_distance(pattern, text):
+    """기준 구현: 부분 문자열 편집 거리 DP (text 의 시작 / 끝 위치는 비용 0)"""
+    previous = list(range(len(pattern) + 1))
+    best = previous[-1]
+    for ch in text:
+        current = [0]
+        for i, p in enumerate(pattern, start=1):
+            current.append(min(previous[i] + 1, current[i - 1] + 1, previous[i - 1] + (p != ch)))
+        best = min(best, current[-1])
+        previous = current
+    return best
+
+
+def test_bit_parallel_distance_matches_dp():
+    rng = random.Random(0)
+    for _ in range(500):
+        pattern = ''.join(rng.choice('ㄱㄴㅏㅓㅇ') for _ in range(rng.randint(1, 12)))
+        text = ''.join(rng.choice('ㄱㄴㅏㅓㅇㅎ') for _ in range(rng.randint(0, 30)))
+        assert approximate_substring_distance(pattern, text) == substring_distance(pattern, text), (pattern, text)
+
+
+def ranked_names(index, keyword):
+    return [(str(index['majors'][major_id]), distance) for major_id, distance in fuzzy_major_matches(index, keyword)]
+
+
+@pytest.mark.parametrize('keyword, expected', [
+    ('컴퓨타', '컴퓨터공학과'),
+    ('기게공학', '기계공학과'),
+    ('겅영', '경영학과'),
+])
+def test_typo_ranks_intended_major_first(data, keyword, expected):
+    _, index = data
+    ranked = ranked_names(index, keyword)
+    assert ranked[0] == (expected, 1)
+    # 가까운 순, 거리가 같으면 짧은 학과명 / 이름 순
+    distances = [distance for _, distance in ranked]
+    assert distances == sorted(distances)
+
+
+def test_fuzzy_rows_use_only_nearest_majors(data):
+    df, index = data
+    rows, num_programs, matches = fuzzy_major_rows(df, index, '기게공학')
+    assert matches == [('기계공학과', 1)]
+    assert set(df['major_name'].iloc[rows]) == {'기계공학과'}
+    assert num_programs == 2
+
+
+@pytest.mark.parametrize('keyword', ['AI', 'ai', '과', '컴'])
+def test_short_keywords_are_not_fuzzy_expanded(data, keyword):
+    _, index = data
+    assert fuzzy_major_matches(index, keyword) == []
+
+
+def test_exact_hit_skips_fuzzy_fallback(data, monkeypatch):
+    df, index = data
+
+    def fail(*args, **kwargs):
+        raise AssertionError("오타 검색을 사용하면 안 됨")
+
+    monkeypatch.setattr(recommendation_core, 'fuzzy_major_rows', fail)
+    distribution = {}
+    recommendations, _, error = find_recommendations(df, '컴퓨터', 2.5, index=index, distribution=distribution,
+                                                     fuzzy=True)
+    assert error is None
+    assert 'fuzzy_matches' not in distribution
+    assert {rec['major'] for rec in recommendations} == {'컴퓨터공학과', '컴퓨터교육과'}
+
+
+def test_typo_falls_back_to_nearest_major(data):
+    df, index = data
+    distribution = {}
+    recommendations, _, error = find_recommendations(df, '컴퓨타', 2.5, index=index, distribution=distribution,
+                                                     fuzzy=True)
+    assert error is None
+    assert distribution['fuzzy_matches'][0] == ('컴퓨터공학과', 1)
+    assert {rec['major'] for rec in recommendations} <= {'컴퓨터공학과', '컴퓨터교육과'}
+
+    _, _, error = find_recommendations(df, '컴퓨타', 2.5, index=index)
+    assert error is not None
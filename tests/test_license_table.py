@@ -0,0 +1,16 @@
+from license_table import LicenseTable
+
+
+def test_lookup_by_key():
+    table = LicenseTable([
+        {"key": "AAAA-1111", "user": "kim"},
+        {"key": "BBBB-2222", "user": "lee"},
+        {"key": "AAAA-1111", "user": "park"},
+    ])
+
+    assert len(table) == 2
+    assert table.lookup("AAAA-1111") == "kim"
+    assert table.lookup("BBBB-2222") == "lee"
+    assert table.lookup("CCCC-3333") is None
+    assert table.lookup("") is None
+    assert table.lookup(None) is None
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from benchmark import generate_admissions_csv
+from recommendation_core import (
+    build_major_index, flexible_search, get_major_keywords, match_major_rows, read_admissions_csv,
+)
+
+# 공백, 라틴 문자 대소문자, '・', 괄호, 빈 학과명이 섞인 학과명
+MAJORS = [
+    '컴퓨터공학과', '컴퓨터 공학부', 'AI컴퓨터공학과', 'Ai 융합학과', '데이터 사이언스학과', 'Bio헬스케어학과',
+    '전기・전자공학부', '전자전기공학과', '기계공학과(인문)', '경영학과', '국제 경영학부', '과학교육과', '간호학과', None,
+]
+
+KEYWORDS = [
+    '컴퓨터', '컴퓨터 공학', '컴퓨터공학', '  컴퓨터   경영 ', 'AI', 'ai', 'Ai융합', 'aI 융합', 'BIO', 'bio헬스',
+    '데이터사이언스', '데이터 사이언스', '전기・전자', '전기전자', '전자', '(인문)', '공학(인문',
+    '과', '학', 'a', 'Z', '・', '・・', '없는학과', 'zzz', '컴퓨터없는', '',
+]
+
+
+@pytest.fixture(params=['mixed', 'synthetic'])
+def data(request, tmp_path, admissions_csv):
+    if request.param == 'mixed':
+        rows = [
+            (year, university, '학생부교과', '일반전형', major, 3.0)
+            for year in (2024, 2025) for university in ('가대학교', '나대학교') for major in MAJORS
+        ]
+        path = admissions_csv(str(tmp_path / 'data.csv'), rows)
+    else:
+        path = generate_admissions_csv(str(tmp_path / 'data.csv'), 3000, seed=4)
+    df, _ = read_admissions_csv(path)
+    return df, build_major_index(df)
+
+
+def flexible_rows(df, keyword):
+    """기준 구현: 전체 행에 flexible_search 적용"""
+    return np.flatnonzero(df['major_name'].apply(lambda x: flexible_search(x, keyword)).to_numpy(dtype=bool))
+
+
+def test_index_matches_flexible_search(data):
+    df, index = data
+    keywords = KEYWORDS + get_major_keywords(df) + [str(major) for major in df['major_name'].dropna().unique()]
+    assert len(keywords) > 50
+
+    mismatches = []
+    for keyword in keywords:
+        rows, num_programs = match_major_rows(df, index, keyword)
+        expected = flexible_rows(df, keyword)
+        if not np.array_equal(rows, expected):
+            mismatches.append(keyword)
+        expected_programs = df.iloc[expected].groupby(['university_name', 'major_name'], observed=True).ngroups
+        assert num_programs == expected_programs, keyword
+    assert mismatches == []
+
+
+def test_cached_result_is_reused(data):
+    df, index = data
+    rows, _ = match_major_rows(df, index, '컴퓨터 경영')
+    # 단어 순서 / 대소문자 / 공백이 달라도 같은 캐시 항목
+    assert match_major_rows(df, index, '경영  컴퓨터')[0] is rows
+    assert not rows.flags.writeable
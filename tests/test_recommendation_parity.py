@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmark import generate_admissions_csv
+from legacy_recommendations import LEGACY_COLUMNS, legacy_find_recommendations, legacy_load
+from recommendation_core import aggregate_programs, build_major_index, find_recommendations, load_admissions_file
+
+# 고정 학생 프로필 (희망 전공, 내신)
+PROFILES = [('공학', 2.5), ('경영 경제', 3.4), ('간호', 1.8), ('컴퓨터', 4.6)]
+RESULT_COLUMNS = [
+    'university', 'major', 'admission_type', 'admission_name', 'category', 'diff', 'cut_grade',
+    'comp_rate', 'is_jonghap', 'priority', 'stability', 'years_data', 'latest_cut_70',
+]
+
+
+def as_frame(recommendations):
+    frame = pd.DataFrame(recommendations)[RESULT_COLUMNS]
+    for col in ['university', 'major', 'admission_type', 'admission_name', 'category']:
+        frame[col] = frame[col].astype(str)
+    return frame.astype({'diff': float, 'cut_grade': float, 'comp_rate': float, 'stability': float,
+                         'latest_cut_70': float, 'years_data': int})
+
+
+@pytest.fixture(scope='module')
+def full_cut_csv(tmp_path_factory):
+    """모든 행에 70%컷이 있는 데이터 (기존 로직의 오류가 드러나지 않는 범위)"""
+    path = tmp_path_factory.mktemp('parity') / 'full.csv'
+    generate_admissions_csv(str(path), 3000, seed=11)
+    raw = pd.read_csv(path, encoding='utf-8-sig')
+    raw = raw[pd.to_numeric(raw['70%컷'], errors='coerce') > 0]
+    raw.to_csv(path, index=False, encoding='utf-8-sig')
+    return str(path)
+
+
+@pytest.fixture(scope='module')
+def sparse_cut_csv(tmp_path_factory):
+    """컷이 비어있거나 0 인 행이 섞인 데이터"""
+    path = tmp_path_factory.mktemp('parity') / 'sparse.csv'
+    generate_admissions_csv(str(path), 3000, seed=12)
+    return str(path)
+
+
+def assert_same_recommendations(csv_path, corrected):
+    legacy_df = legacy_load(csv_path)
+    df, _ = load_admissions_file(csv_path, use_snapshot=False)
+    assert list(df.columns) == LEGACY_COLUMNS
+    summary = aggregate_programs(df)
+    index = build_major_index(df)
+
+    for keyword, grade in PROFILES:
+        expected, _, error = legacy_find_recommendations(legacy_df, keyword, grade, corrected=corrected)
+        assert error is None
+        direct, _, _ = find_recommendations(df, keyword, grade)
+        indexed, _, _ = find_recommendations(df, keyword, grade, summary=summary, index=index)
+        pd.testing.assert_frame_equal(as_frame(direct), as_frame(expected))
+        pd.testing.assert_frame_equal(as_frame(indexed), as_frame(expected))
+
+
+def test_matches_legacy_output(full_cut_csv):
+    assert_same_recommendations(full_cut_csv, corrected=False)
+
+
+def test_matches_legacy_with_intended_fixes(sparse_cut_csv):
+    # user-015 / user-016 에서 바꾼 년도 가중치 / 안정성 계산을 반영한 기준과 비교
+    assert_same_recommendations(sparse_cut_csv, corrected=True)
+
+
+def test_legacy_stability_differs_when_cuts_missing(sparse_cut_csv):
+    # 기존 로직과 다른 부분이 실제로 있는 데이터인지 확인 (기준 갱신이 의미 있도록)
+    legacy_df = legacy_load(sparse_cut_csv)
+    old, _, _ = legacy_find_recommendations(legacy_df, '공학', 2.5, num_results=1000)
+    new, _, _ = legacy_find_recommendations(legacy_df, '공학', 2.5, num_results=1000, corrected=True)
+    old = {(r['university'], r['major'], r['admission_type'], r['admission_name']): r['stability'] for r in old}
+    new = {(r['university'], r['major'], r['admission_type'], r['admission_name']): r['stability'] for r in new}
+    assert any(not np.isclose(old[key], new[key]) for key in old)
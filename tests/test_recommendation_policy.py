@@ -0,0 +1,34 @@
+import numpy as np
+
+from recommendation_core import (
+    DEFAULT_POLICY, NO_CUT_CATEGORY, RecommendationPolicy, categorize_policies, grade_categories,
+    policy_category_counts,
+)
+
+NARROW = RecommendationPolicy('좁게', thresholds={'상향': 0.5, '적정': -0.5}, lowest_category='안정',
+                              targets={'상향': 5, '적정': 5, '안정': 5})
+CUTS = np.array([2.5, np.nan, 0.0, 1.0, 3.9, 2.0])
+
+
+def test_categorize_policies_matches_grade_categories():
+    matrix = categorize_policies([DEFAULT_POLICY, NARROW], 2.5, CUTS)
+
+    for row, policy in zip(matrix, [DEFAULT_POLICY, NARROW]):
+        assert row.tolist() == grade_categories(2.5, CUTS, policy)[0].tolist()
+    assert (matrix[:, [1, 2]] == NO_CUT_CATEGORY).all()
+
+
+def test_categorize_maps_nan_to_no_cut():
+    assert DEFAULT_POLICY.categorize([np.nan, 0.0]).tolist() == [NO_CUT_CATEGORY, '적정']
+
+
+def test_policy_category_counts():
+    counts = policy_category_counts([DEFAULT_POLICY, NARROW], 2.5, CUTS)
+
+    assert counts.index.tolist() == ['기본', '좁게']
+    assert counts.columns[-1] == NO_CUT_CATEGORY
+    assert counts.sum(axis=1).tolist() == [len(CUTS), len(CUTS)]
+    assert counts.loc['좁게'].to_dict() == {
+        **{category: 0 for category in counts.columns},
+        '상향': 2, '적정': 1, '안정': 1, NO_CUT_CATEGORY: 2,
+    }
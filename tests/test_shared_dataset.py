@@ -0,0 +1,95 @@
+import os
+import subprocess
+import sys
+import textwrap
+import uuid
+
+import pandas as pd
+import pytest
+
+import shared_dataset
+from shared_dataset import SHM_DIR, release_segment, remove_stale_segments, segment_name, share_frame
+
+pytestmark = pytest.mark.skipif(not os.path.isdir(SHM_DIR), reason="/dev/shm 가 없는 환경")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 실행 중인 앱의 블록(kru_*)을 건드리지 않도록 테스트 전용 접두어
+TEST_PREFIX = 'krt'
+
+
+def make_frame():
+    return pd.DataFrame({'year': [2024, 2025], 'cut': [2.5, 3.0]})
+
+
+def exists(name):
+    return os.path.exists(os.path.join(SHM_DIR, name))
+
+
+def run_child(version, exit_call):
+    """다른 프로세스에서 블록을 만들고 종료 (exit_call: 'sys.exit(0)' 또는 'os._exit(0)')"""
+    code = textwrap.dedent(f"""
+        import os, sys
+        import pandas as pd
+        import shared_dataset
+        from shared_dataset import share_frame
+        shared_dataset.SEGMENT_PREFIX = {TEST_PREFIX!r}
+        share_frame({version!r}, lambda: pd.DataFrame({{'a': [1, 2, 3]}}))
+        {exit_call}
+    """)
+    subprocess.run([sys.executable, '-c', code], cwd=ROOT, check=True)
+
+
+@pytest.fixture(autouse=True)
+def test_prefix(monkeypatch):
+    monkeypatch.setattr(shared_dataset, 'SEGMENT_PREFIX', TEST_PREFIX)
+
+
+@pytest.fixture
+def version():
+    versions = []
+
+    def make():
+        versions.append(uuid.uuid4().hex)
+        return versions[-1]
+    yield make
+    for value in versions:
+        for kind, key in (('data', ''), ('summary', 'a'), ('summary', 'b')):
+            name = segment_name(kind, value, key)
+            release_segment(name, unlink=True)
+
+
+def test_creator_unlinks_on_exit(version):
+    current = version()
+    run_child(current, 'sys.exit(0)')
+    assert not exists(segment_name('data', current))
+
+
+def test_startup_sweep_removes_orphans(version):
+    old, current = version(), version()
+    # 강제 종료(atexit 미실행)된 프로세스가 남긴 블록
+    run_child(old, 'os._exit(0)')
+    assert exists(segment_name('data', old))
+
+    share_frame(current, make_frame)
+    removed = remove_stale_segments(current)
+    assert segment_name('data', old) in removed
+    assert not exists(segment_name('data', old))
+    assert exists(segment_name('data', current))
+
+
+def test_sweep_removes_unused_policy_summaries(version):
+    current = version()
+    share_frame(current, make_frame, 'summary', 'a')
+    share_frame(current, make_frame, 'summary', 'b')
+    remove_stale_segments(current, {'summary': {'a'}})
+    assert exists(segment_name('summary', current, 'a'))
+    assert not exists(segment_name('summary', current, 'b'))
+
+
+def test_attached_frame_survives_unlink(version):
+    current = version()
+    df = share_frame(current, make_frame)
+    remove_stale_segments(version())
+    assert not exists(segment_name('data', current))
+    pd.testing.assert_frame_equal(df, make_frame())
+    assert segment_name('data', current) not in shared_dataset._created
@@ -0,0 +1,116 @@
+import threading
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from stage_metrics import StageMetrics, StageTimer
+
+MB = 1 << 20
+
+
+def record(metrics, name, seconds, rows=None):
+    timer = StageTimer(name, rows)
+    timer.seconds = seconds
+    metrics.record(timer)
+
+
+@pytest.fixture
+def tracing():
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    yield
+    if started:
+        tracemalloc.stop()
+
+
+def test_ring_buffer_quantiles_and_eviction():
+    metrics = StageMetrics(capacity=4)
+    for seconds in (1.0, 2.0, 3.0, 4.0, 5.0, 6.0):
+        record(metrics, 'search', seconds, rows=10)
+
+    stat, = metrics.summary()
+    # 분위수 / 최대는 최근 4건, 건수 / 합계는 누계
+    assert stat['window'] == 4
+    assert stat['count'] == 6
+    assert stat['seconds_sum'] == pytest.approx(21.0)
+    assert stat['rows_sum'] == 60
+    assert stat['p50'] == pytest.approx(np.quantile([3, 4, 5, 6], 0.5))
+    assert stat['p95'] == pytest.approx(np.quantile([3, 4, 5, 6], 0.95))
+    assert stat['max'] == 6.0
+
+    metrics.configure(capacity=2)
+    stat, = metrics.summary()
+    assert stat['window'] == 2 and stat['p50'] == pytest.approx(5.5)
+
+
+def test_prometheus_text_format():
+    metrics = StageMetrics(capacity=10, labels={'app': 'kru'})
+    record(metrics, 'search', 0.5, rows=100)
+    record(metrics, 'search', 1.5, rows=300)
+
+    lines = metrics.prometheus_text().splitlines()
+    duration = 'kru_stage_duration_seconds'
+    assert f'# TYPE {duration} summary' in lines
+    assert f'{duration}{{app="kru",stage="search",quantile="0.5"}} 1' in lines
+    assert f'{duration}{{app="kru",stage="search",quantile="0.95"}} 1.45' in lines
+    assert f'{duration}_sum{{app="kru",stage="search"}} 2' in lines
+    assert f'{duration}_count{{app="kru",stage="search"}} 2' in lines
+    assert '# TYPE kru_stage_rows_total counter' in lines
+    assert 'kru_stage_rows_total{app="kru",stage="search"} 400' in lines
+    # tracemalloc 을 켜지 않았으면 메모리 값은 없음
+    assert not any(line.startswith('kru_stage_peak_bytes{') for line in lines)
+
+
+def test_nested_stage_peak_folds_into_parent(tracing):
+    metrics = StageMetrics()
+    with metrics.stage('outer') as outer:
+        block = bytearray(4 * MB)
+        del block
+        with metrics.stage('inner') as inner:
+            block = bytearray(MB)
+            del block
+        # 안쪽 단계가 최대값을 초기화해도 바깥 단계의 이전 최대값은 유지
+        with metrics.stage('inner2') as inner2:
+            block = bytearray(8 * MB)
+            del block
+
+    assert 0.9 * MB <= inner.peak_bytes < 4 * MB
+    assert inner2.peak_bytes >= 0.9 * 8 * MB
+    assert outer.peak_bytes >= 0.9 * 8 * MB
+
+    with metrics.stage('outer') as outer:
+        block = bytearray(4 * MB)
+        del block
+        with metrics.stage('inner'):
+            block = bytearray(MB)
+            del block
+    assert outer.peak_bytes >= 0.9 * 4 * MB
+
+
+def test_concurrent_stage_keeps_peak(tracing):
+    metrics = StageMetrics()
+    allocated, other_done = threading.Event(), threading.Event()
+    peaks = {}
+
+    def first():
+        with metrics.stage('first') as timer:
+            block = bytearray(6 * MB)
+            del block
+            allocated.set()
+            other_done.wait(10)
+        peaks['first'] = timer.peak_bytes
+
+    thread = threading.Thread(target=first)
+    thread.start()
+    allocated.wait(10)
+    # 다른 스레드의 단계가 시작하면서 최대값을 초기화
+    with metrics.stage('second') as second:
+        block = bytearray(MB)
+        del block
+    other_done.set()
+    thread.join()
+
+    assert peaks['first'] >= 0.9 * 6 * MB
+    assert 0.9 * MB <= second.peak_bytes < 6 * MB
@@ -0,0 +1,67 @@
+import os
+
+import numpy as np
+
+from benchmark import generate_admissions_csv
+from recommendation_core import (
+    build_major_index, build_synonym_graph, find_recommendations, format_recommendations, get_major_keywords,
+    load_major_synonyms, normalize_major_text, read_admissions_csv, search_major_ids, sweep_recommendations,
+)
+
+SYNONYM_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'major_synonyms.toml')
+
+
+def dense_synonym_rows(index, graph, groups, min_similarity=0.5, max_share=0.2):
+    """기준 구현: 키워드 × 학과 행렬로 계산한 키워드별 확장 학과 ID"""
+    names = graph['terms']
+    incidence = np.zeros((len(names), len(index['normalized'])), dtype=np.float32)
+    for i, name in enumerate(names):
+        incidence[i, search_major_ids(index, name)] = 1
+    counts = incidence.sum(axis=1)
+    overlap = incidence @ incidence.T
+    union = counts[:, None] + counts[None, :] - overlap
+    with np.errstate(divide='ignore', invalid='ignore'):
+        similarity = np.where(union > 0, overlap / union, 0.0)
+    specific = (counts > 0) & (counts <= max_share * incidence.shape[1])
+    related = (similarity >= min_similarity) & specific[:, None] & specific[None, :]
+    for group in groups:
+        ids = sorted({graph['term_ids'][key] for key in map(normalize_major_text, group)})
+        related[np.ix_(ids, ids)] = True
+    np.fill_diagonal(related, True)
+    return [np.flatnonzero(row) for row in (related.astype(np.float32) @ incidence > 0)]
+
+
+def test_sparse_graph_matches_dense_reference(tmp_path):
+    df, _ = read_admissions_csv(generate_admissions_csv(str(tmp_path / 'data.csv'), 5000, seed=2))
+    index = build_major_index(df)
+    groups = load_major_synonyms(SYNONYM_PATH)
+    graph = build_synonym_graph(index, get_major_keywords(df), groups)
+
+    expected = dense_synonym_rows(index, graph, groups)
+    for term_id, ids in enumerate(expected):
+        row = graph['indices'][graph['indptr'][term_id]:graph['indptr'][term_id + 1]]
+        assert np.array_equal(row, ids), graph['terms'][term_id]
+
+
+def test_recommendations_mark_synonym_matches(tmp_path, admissions_csv):
+    rows = [
+        (year, university, '교과', '학생부교과', major, 2.5)
+        for year in (2024, 2025)
+        for university in ('가대학교', '나대학교')
+        for major in ('컴퓨터공학과', '소프트웨어학과', '경영학과')
+    ]
+    df, _ = read_admissions_csv(admissions_csv(str(tmp_path / 'data.csv'), rows))
+    index = build_major_index(df)
+    graph = build_synonym_graph(index, [], [['컴퓨터', '소프트웨어']])
+
+    recommendations, _, _ = find_recommendations(df, '컴퓨터', 2.5, index=index, synonyms=graph)
+    marks = {rec['major']: rec['via_synonym'] for rec in recommendations}
+    assert marks == {'컴퓨터공학과': False, '소프트웨어학과': True}
+    assert format_recommendations(recommendations).count('[관련 학과]') == 2
+
+    plain, _, _ = find_recommendations(df, '컴퓨터', 2.5, index=index)
+    assert all('via_synonym' not in rec for rec in plain)
+
+    result, _ = sweep_recommendations(df, ['컴퓨터', '경영'], [2.5], index=index, synonyms=graph)
+    assert {rec['major']: rec['via_synonym'] for rec in result['recommendations'][('컴퓨터', 2.5)]} == marks
+    assert all('via_synonym' not in rec for rec in result['recommendations'][('경영', 2.5)])